@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+Example:
+        $ python benchmarks/bench_itemize.py
+        $ python benchmarks/bench_itemize.py --max-lines 1000000
+
+Benchmark of ItemizeFileData.itemize_file (ingestion): generates text
+files of 10k, 100k, 1M and 10M lines (a fraction of duplicate lines) and
+times the itemization of each, ingestion is linear when the time per line
+stays flat as the number of lines grows
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import click
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# pylint: disable=wrong-import-position
+from extractfile import ItemizeFileData  # noqa: E402
+# pylint: enable=wrong-import-position
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+WORDS = (
+    "account", "balance", "ledger", "invoice", "payment", "vendor",
+    "Customer", "Report", "journal", "entry", "audit", "Revenue", "asset",
+    "liability", "equity", "expense", "budget", "forecast", "tax", "payroll",
+)
+
+
+def write_text_file(path, lines, dup_ratio=0.25, seed=7) -> None:
+    """
+    Function: write_text_file(path: str, lines: int, [dup_ratio]: float,
+                              [seed]: int) -> None
+    Writes lines random lines of text (dup_ratio of them repeated) to path
+    """
+    rnd = random.Random(seed)
+    written = []
+    with open(path, 'w', encoding='utf-8') as fh:
+        for index in range(lines):
+            if written and rnd.random() < dup_ratio:
+                line = rnd.choice(written)
+            else:
+                words = " ".join(
+                    rnd.choice(WORDS) for _ in range(rnd.randint(2, 6)))
+                line = f"{words}, No. {index}!"
+                if len(written) < 4096:
+                    written.append(line)
+            fh.write(line + "\n")
+
+
+def time_itemize(path) -> tuple:
+    """
+    Function: time_itemize(path: str) -> tuple
+    -> tuple, (seconds, unique lines, lines) of ItemizeFileData.itemize_file
+    """
+    ifd = ItemizeFileData(path)
+    start = time.perf_counter()
+    ifd.itemize_file()
+    elapsed = time.perf_counter() - start
+    return elapsed, ifd.unique_item_count, ifd.file_item_count
+
+
+@click.command()
+@click.option(
+    '--max-lines',
+    default=SIZES[-1],
+    type=click.IntRange(1, None),
+    help=f"Largest text file to benchmark (default={SIZES[-1]})"
+)
+def bench(max_lines) -> None:
+    """
+    Times itemize_file from 10k lines up to --max-lines lines.
+    """
+    print(f"{'lines':>10} {'unique':>10} {'seconds':>10} {'usec/line':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (s for s in SIZES if s <= max_lines):
+            path = os.path.join(tmp, f"text_{size}.txt")
+            write_text_file(path, size)
+            elapsed, unique, lines = time_itemize(path)
+            print(f"{lines:>10} {unique:>10} {elapsed:>10.2f} "
+                  f"{elapsed / lines * 1e6:>12.2f}")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    bench()  # pylint: disable=no-value-for-parameter
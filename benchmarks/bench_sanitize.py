@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+Example:
+        $ python benchmarks/bench_sanitize.py
+        $ python benchmarks/bench_sanitize.py --lines 100000 --repeat 5
+
+Microbenchmark of the text sanitizer: times the previous loop based
+_sanitize_text (legacy_sanitize), sanitize line by line and sanitize_buffer
+on a whole buffer (str, ASCII bytes and utf-8 bytes), after checking that
+every variant returns exactly the output of legacy_sanitize
+"""
+import os
+import random
+import string
+import sys
+import timeit
+
+import click
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# pylint: disable=wrong-import-position
+import constants as const  # noqa: E402
+from sanitizer import sanitize, sanitize_buffer  # noqa: E402
+# pylint: enable=wrong-import-position
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+WORDS = (
+    "Account", "balance", "LEDGER", "invoice,", "payment.", "vendor's",
+    "(customer)", "report;", "journal-entry", "audit!", "revenue?", "tax:",
+    "café", "naïve", "Straße", "  ", "   ", "\t", "#1", "$500", "50%",
+)
+
+
+def legacy_sanitize(text=None) -> str:
+    """
+    Function: legacy_sanitize(text: str) -> str
+    Previous ItemizeFileData._sanitize_text, reference of the output
+    """
+    if text is None:
+        return None
+    text = text.lower()
+    text = str(text) if not isinstance(text, str) else text
+    while '  ' in text:
+        text = text.replace('  ', ' ')
+    text = text.replace(const.LINE, '')
+    text = text.translate(text.maketrans(
+        "",
+        "",
+        string.punctuation
+    ))
+    return text
+
+
+def make_lines(count, ascii_only, seed=3) -> list:
+    """
+    Function: make_lines(count: int, ascii_only: bool, [seed]: int) -> list
+    -> list, count random lines of text ending with an end line
+    """
+    rnd = random.Random(seed)
+    words = [w for w in WORDS if w.isascii()] if ascii_only else WORDS
+    return [
+        " ".join(rnd.choice(words) for _ in range(rnd.randint(1, 12))) + "\n"
+        for _ in range(count)
+    ]
+
+
+def check(lines) -> None:
+    """
+    Function: check(lines: list) -> None
+    Asserts every sanitizer variant returns the output of legacy_sanitize
+    """
+    expected = [legacy_sanitize(line) for line in lines]
+    buffer = "".join(lines)
+    assert [sanitize(line) for line in lines] == expected
+    assert sanitize_buffer(buffer) == expected
+    assert sanitize_buffer(buffer.encode('utf-8')) == expected
+
+
+@click.command()
+@click.option(
+    '--lines',
+    default=100_000,
+    type=click.IntRange(1, None),
+    help="Number of lines sanitized per run (default=100000)"
+)
+@click.option(
+    '--repeat',
+    default=3,
+    type=click.IntRange(1, None),
+    help="Runs of each variant, the best is reported (default=3)"
+)
+def bench(lines, repeat) -> None:
+    """
+    Times the sanitizer variants on ASCII and utf-8 text.
+    """
+    print(f"{'text':<8} {'variant':<28} {'seconds':>10} {'speedup':>10}")
+    for label, ascii_only in (("ascii", True), ("utf-8", False)):
+        text = make_lines(lines, ascii_only)
+        check(text)
+        buffer = "".join(text)
+        data = buffer.encode('utf-8')
+        # the defaults bind the text of this iteration to each variant
+        variants = (
+            ("legacy _sanitize_text", lambda text=text: [
+                legacy_sanitize(line) for line in text]),
+            ("sanitize (per line)", lambda text=text: [
+                sanitize(line) for line in text]),
+            ("sanitize_buffer (str)",
+             lambda buffer=buffer: sanitize_buffer(buffer)),
+            ("sanitize_buffer (bytes)",
+             lambda data=data: sanitize_buffer(data)),
+        )
+        base = None
+        for name, func in variants:
+            best = min(timeit.repeat(func, number=1, repeat=repeat))
+            base = base or best
+            print(f"{label:<8} {name:<28} {best:>10.4f} {base / best:>9.1f}x")
+
+
+if __name__ == '__main__':
+    bench()  # pylint: disable=no-value-for-parameter
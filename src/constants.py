@@ -9,6 +9,14 @@ LOG = "log.log"
 TEXT = "text.txt"
 CSV = "results.csv"
 KEY = "keys.txt"
+CHUNK_SIZE = 64
+QGRAM = 2
+BLOCK_SIZE = 1 << 20
+INDEX_SUFFIX = ".kci"
+KEYS_SUFFIX = ".kck"
+CACHE_DIR = ".keycollator_cache"
+CACHE_BYTES = 64 << 20
+STATE_SUFFIX = ".kcstate"
 PFILE = {
     1: ".txt",
     2: ".txt",
@@ -90,6 +98,9 @@ RTBLHDR = [
 STBLHDR = [
     "Statistic", "Total"
 ]
+TTBLHDR = [
+    "Tier", "Index", "Pairs", "Compared", "Pruned", "Hits", "Seconds"
+]
 DTFMT = {
     'locale': '%c',
     'default': '%d/%m/%Y %H:%M:%S',
@@ -0,0 +1,524 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Function: write_corpus_index(file_name: str, corpus: Mapping,
+                                 line_tokens: list, [metadata]: dict,
+                                 [automaton]: KeyAutomaton) -> dict
+    Class: CorpusIndex
+        └──obj = CorpusIndex(file_name: str) -> obj
+
+Prebuilt on-disk index of an itemized text file (keycollator index): the
+sanitized lines, their frequencies and first lines, the token ids of each
+line and the posting list of each token, loaded with mmap, the sections
+are read in place (memoryview casts) and decoded only when used
+
+Compiled keys (keycollator compile-keys) are the index of a key file plus
+the flattened KeyAutomaton of the keys (AUTOMATON sections), the metadata
+records the size, mtime and sha256 of the source file and the stop words
+fingerprint, an index whose source changed is stale (index_is_stale)
+
+File layout (native byte order, recorded in the header)
+    MAGIC (6 bytes), INDEX_VERSION (uint16), header length (uint64)
+    header, utf-8 JSON: version, byteorder, lines, vocabulary, metadata,
+        sections (name => [offset from the data start, nbytes, typecode])
+    data, starts at the first multiple of ALIGN after the header, each
+        section is aligned on ALIGN bytes
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+from array import array
+from collections.abc import Mapping
+
+import constants as const
+
+from keyautomaton import KeyAutomaton
+from textcorpus import TextCorpus
+from tokenindex import TokenIndex, TokenLines
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+MAGIC = b'KCIDX\x00'
+INDEX_VERSION = 1
+ALIGN = 8
+ENCODING = 'utf-8'
+SECTIONS = (
+    'lines', 'line_offsets', 'counts', 'first_lines', 'vocab',
+    'vocab_offsets', 'token_offsets', 'token_ids', 'posting_offsets',
+    'postings', 'empty')
+AUTOMATON = 'automaton_'
+
+_PREFIX = struct.Struct('<6sHQ')
+
+
+def is_corpus_index(file_name) -> bool:
+    """
+    Function: is_corpus_index(file_name: str) -> bool
+    -> bool, True if file_name starts with the MAGIC of a corpus index
+    """
+    try:
+        with open(file_name, 'rb') as fh:
+            return fh.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def file_digest(file_name) -> str:
+    """
+    Function: file_digest(file_name: str) -> str
+    -> str, sha256 (hex) of the content of file_name
+    """
+    digest = hashlib.sha256()
+    with open(file_name, 'rb') as fh:
+        for block in iter(lambda: fh.read(const.BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_header(file_name) -> dict:
+    """
+    Function: read_header(file_name: str) -> dict
+    Raises ValueError if file_name is not a corpus index of INDEX_VERSION
+    in the native byte order
+    -> dict, header of the index (see module), '_start' is the offset of
+    the data
+    """
+    with open(file_name, 'rb') as fh:
+        magic, version, length = _PREFIX.unpack(fh.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{file_name} is not a keycollator index")
+        if version != INDEX_VERSION:
+            raise ValueError(
+                f"{file_name} is an index version {version}, expected "
+                f"{INDEX_VERSION}")
+        header = json.loads(fh.read(length).decode(ENCODING))
+    if header['byteorder'] != sys.byteorder:
+        raise ValueError(
+            f"{file_name} was written in {header['byteorder']} endian byte "
+            "order")
+    header['_start'] = -(-(_PREFIX.size + length) // ALIGN) * ALIGN
+    return header
+
+
+def index_is_stale(metadata) -> bool:
+    """
+    Function: index_is_stale(metadata: dict) -> bool
+    Compares the source file of an index with its metadata, same size and
+    mtime is current, otherwise the sha256 of the content decides (a touched
+    but unchanged file is current)
+    -> bool, True if the source changed, False if it did not or if it
+    cannot be checked (no source recorded or source missing)
+    """
+    source = metadata.get('source')
+    if not source or not os.path.isfile(source):
+        return False
+    stat = os.stat(source)
+    if stat.st_size != metadata.get('size'):
+        return True
+    if stat.st_mtime == metadata.get('mtime'):
+        return False
+    return file_digest(source) != metadata.get('sha256')
+
+
+def index_is_current(index_file, file_name, fingerprint=None) -> bool:
+    """
+    Function: index_is_current(index_file: str, file_name: str,
+                               [fingerprint]: str) -> bool
+    -> bool, True if index_file is an index of file_name that is not stale
+    and was built with the stop words fingerprint, otherwise False
+    """
+    if not is_corpus_index(index_file):
+        return False
+    try:
+        metadata = read_header(index_file)['metadata']
+    except ValueError:
+        return False
+    return metadata.get('source') == os.path.abspath(file_name) and \
+        (fingerprint is None or metadata.get('stopwords') == fingerprint) \
+        and not index_is_stale(metadata)
+
+
+def _pack(items) -> tuple:
+    """
+    Function: _pack(items: iterable) -> tuple
+    -> tuple, (utf-8 bytes of items packed, array('q') of their offsets)
+    """
+    corpus = TextCorpus.from_items(items)
+    return corpus.buffer, corpus.offsets
+
+
+def _token_sections(line_tokens) -> dict:
+    """
+    Function: _token_sections(line_tokens: iterable) -> dict
+    -> dict, sections of the tokens of each line: the vocabulary, the token
+    ids of each line and the posting list (sorted line ids) of each token
+    """
+    vocab = {}
+    token_offsets = array('q', [0])
+    token_ids = array('i')
+    postings = []
+    empty = array('i')
+    for lid, tokens in enumerate(line_tokens):
+        if not tokens:
+            empty.append(lid)
+        for token in tokens:
+            tid = vocab.get(token)
+            if tid is None:
+                tid = vocab[token] = len(vocab)
+                postings.append(array('i'))
+            token_ids.append(tid)
+        for token in dict.fromkeys(tokens):
+            postings[vocab[token]].append(lid)
+        token_offsets.append(len(token_ids))
+    vocab_bytes, vocab_offsets = _pack(vocab)
+    posting_offsets = array('q', [0])
+    posting_ids = array('i')
+    for posting in postings:
+        posting_ids.extend(posting)
+        posting_offsets.append(len(posting_ids))
+    return {
+        'vocab': vocab_bytes,
+        'vocab_offsets': vocab_offsets,
+        'token_offsets': token_offsets,
+        'token_ids': token_ids,
+        'posting_offsets': posting_offsets,
+        'postings': posting_ids,
+        'empty': empty,
+    }
+
+
+def _layout(data) -> dict:
+    """
+    Function: _layout(data: dict) -> dict
+    -> dict, key=>[section name]: str, item=>[offset, nbytes, typecode]:
+    list, offset from the start of the data, aligned to ALIGN bytes
+    """
+    sections = {}
+    position = 0
+    for name, section in data.items():
+        typecode = getattr(section, 'typecode', 'B')
+        nbytes = len(section) * (
+            section.itemsize if typecode != 'B' else 1)
+        sections[name] = [position, nbytes, typecode]
+        position += -(-nbytes // ALIGN) * ALIGN
+    return sections
+
+
+def _write_sections(file_name, header, data) -> None:
+    """
+    Function: _write_sections(file_name: str, header: dict,
+                              data: dict) -> None
+    Writes header, then each section of data at its offset (aligned, see
+    header['sections']) to file_name (replaced atomically)
+    """
+    head = json.dumps(header).encode(ENCODING)
+    start = _PREFIX.size + len(head)
+    start = -(-start // ALIGN) * ALIGN
+    temp = file_name + '.tmp'
+    with open(temp, 'wb') as fh:
+        fh.write(_PREFIX.pack(MAGIC, INDEX_VERSION, len(head)))
+        fh.write(head)
+        fh.write(bytes(start - fh.tell()))
+        for name, section in data.items():
+            offset = header['sections'][name][0]
+            fh.write(bytes(start + offset - fh.tell()))
+            fh.write(section)
+    os.replace(temp, file_name)
+
+
+def write_corpus_index(
+        file_name, corpus, line_tokens, metadata=None,
+        automaton=None) -> dict:
+    """
+    Function: write_corpus_index(file_name: str, corpus: Mapping,
+                                 line_tokens: list, [metadata]: dict,
+                                 [automaton]: KeyAutomaton) -> dict
+    Writes the corpus index of corpus (item => count, ItemizedCorpus or
+    dict) and of the token tuple of each of its items (line_tokens, in
+    corpus order) to file_name (replaced atomically), with the arrays of
+    automaton (compiled from the items of corpus, in order) if given
+    -> dict, header of the index
+    """
+    if hasattr(corpus, 'as_text_corpus'):
+        text = corpus.as_text_corpus()
+        lines, line_offsets = text.buffer, text.offsets
+    else:
+        lines, line_offsets = _pack(corpus)
+    first_lines = getattr(corpus, 'first_lines', None)
+    if first_lines is None:
+        first_lines = range(len(corpus))
+    data = {
+        'lines': lines,
+        'line_offsets': line_offsets,
+        'counts': array('i', corpus.values()),
+        'first_lines': array('i', first_lines),
+    }
+    data.update(_token_sections(line_tokens))
+    if automaton is not None:
+        for name, table in automaton.to_arrays().items():
+            data[AUTOMATON + name] = table
+    header = {
+        'version': INDEX_VERSION,
+        'byteorder': sys.byteorder,
+        'lines': len(corpus),
+        'vocabulary': len(data['vocab_offsets']) - 1,
+        'metadata': metadata or {},
+        'sections': _layout(data),
+    }
+    _write_sections(file_name, header, data)
+    return header
+
+
+class PostingMap(Mapping):
+    """
+    Class: PostingMap
+        └──obj = PostingMap(vocab: tuple, offsets: array,
+                            postings: array) -> obj
+
+    Posting lists of a CorpusIndex, token => sorted line ids, read in place
+    (mapping like TokenIndex._postings)
+
+    Parameters
+    ----------
+    vocab:=tuple, token of each token id
+    offsets:=array('q'), lines of token i at postings[offsets[i]:offsets[i + 1]]
+    postings:=array('i'), line ids of the posting lists
+    """
+
+    __slots__ = ('_vocab', '_ids', '_offsets', '_postings')
+
+    def __init__(self, vocab, offsets, postings) -> None:
+        """
+        PostingMap => Method:__init__ to instantiate class attributes
+            └──obj = PostingMap(vocab: tuple, offsets: array,
+                                postings: array) -> obj
+        """
+        self._vocab = vocab
+        self._ids = {token: tid for tid, token in enumerate(vocab)}
+        self._offsets = offsets
+        self._postings = postings
+
+    def __reduce__(self) -> tuple:
+        return (type(self), (
+            self._vocab, array('q', self._offsets),
+            array('i', self._postings)))
+
+    def __len__(self) -> int:
+        return len(self._vocab)
+
+    def __iter__(self):
+        return iter(self._vocab)
+
+    def __getitem__(self, token):
+        tid = self._ids[token]
+        return self._postings[self._offsets[tid]:self._offsets[tid + 1]]
+
+
+class CorpusIndex(Mapping):
+    """
+    Class: CorpusIndex
+        └──obj = CorpusIndex(file_name: str) -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _file_name:=str, path of the index
+    _map:=mmap, read-only mapping of the index
+    _header:=dict, header of the index (see module)
+    _sections:=dict, key=>[section name]: str, item=>[section]: memoryview
+    _lookup:=dict, key=>[line]: str, item=>[line id]: int (built on demand)
+    _token_index:=TokenIndex, over _sections (built on demand)
+    _automaton:=KeyAutomaton, restored from the AUTOMATON sections (on demand)
+
+    Methods
+    -------
+    index(item: str) -> int: Id of item (-1 if missing)
+    as_text_corpus() -> TextCorpus: Lines as a TextCorpus (in place)
+    close() -> None: Closes the mapping
+
+    Parameters
+    ----------
+    file_name:=str, path of an index written by write_corpus_index
+    """
+
+    __slots__ = (
+        '_file_name', '_map', '_header', '_sections', '_lookup',
+        '_token_index', '_automaton')
+
+    def __init__(self, file_name) -> None:
+        """
+        CorpusIndex => Method:__init__ to instantiate class attributes
+            └──obj = CorpusIndex(file_name: str) -> obj
+        Raises ValueError if file_name is not a corpus index of
+        INDEX_VERSION in the native byte order
+        """
+        self._file_name = file_name
+        self._header = read_header(file_name)
+        with open(file_name, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        start = self._header['_start']
+        view = memoryview(self._map)
+        self._sections = {
+            name: view[start + offset:start + offset + nbytes].cast(typecode)
+            for name, (offset, nbytes, typecode)
+            in self._header['sections'].items()
+        }
+        self._lookup = None
+        self._token_index = None
+        self._automaton = None
+
+    def __len__(self) -> int:
+        return self._header['lines']
+
+    def __iter__(self):
+        return iter(self.as_text_corpus())
+
+    def __getitem__(self, item) -> int:
+        iid = self.index(item)
+        if iid < 0:
+            raise KeyError(item)
+        return self._sections['counts'][iid]
+
+    def __contains__(self, item) -> bool:
+        return self.index(item) >= 0
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}(file_name={self._file_name}, '
+                f'lines={len(self)}, '
+                f'vocabulary={self._header["vocabulary"]})')
+
+    @property
+    def metadata(self) -> dict:
+        """
+        CorpusIndex => Property: metadata() -> dict
+        -> dict, metadata recorded when the index was written
+        """
+        return self._header['metadata']
+
+    @property
+    def counts(self) -> memoryview:
+        """
+        CorpusIndex => Property: counts() -> memoryview
+        -> memoryview('i'), occurrences of each line, in line order
+        """
+        return self._sections['counts']
+
+    @property
+    def first_lines(self) -> memoryview:
+        """
+        CorpusIndex => Property: first_lines() -> memoryview
+        -> memoryview('i'), index of the first line of each item in the
+        indexed file, in line order
+        """
+        return self._sections['first_lines']
+
+    @property
+    def vocabulary(self) -> tuple:
+        """
+        CorpusIndex => Property: vocabulary() -> tuple
+        -> tuple, token of each token id (decoded on each access)
+        """
+        return tuple(TextCorpus(
+            self._sections['vocab'], self._sections['vocab_offsets']))
+
+    @property
+    def line_tokens(self) -> TokenLines:
+        """
+        CorpusIndex => Property: line_tokens() -> TokenLines
+        -> TokenLines, token tuple of each line (the lines of token_index)
+        """
+        return self.token_index.lines
+
+    @property
+    def token_index(self) -> TokenIndex:
+        """
+        CorpusIndex => Property: token_index() -> TokenIndex
+        -> TokenIndex, inverted token index read from the posting lists
+        """
+        if self._token_index is None:
+            vocab = self.vocabulary
+            self._token_index = TokenIndex.from_postings(
+                TokenLines(
+                    vocab,
+                    self._sections['token_offsets'],
+                    self._sections['token_ids']),
+                PostingMap(
+                    vocab,
+                    self._sections['posting_offsets'],
+                    self._sections['postings']),
+                self._sections['empty'])
+        return self._token_index
+
+    @property
+    def automaton(self) -> KeyAutomaton:
+        """
+        CorpusIndex => Property: automaton() -> KeyAutomaton
+        -> KeyAutomaton, of the lines (compiled keys), restored on the first
+        access, None if the index holds no automaton
+        """
+        if self._automaton is None and AUTOMATON + 'fail' in self._sections:
+            self._automaton = KeyAutomaton.from_arrays(self, {
+                name[len(AUTOMATON):]: section
+                for name, section in self._sections.items()
+                if name.startswith(AUTOMATON)})
+        return self._automaton
+
+    def values(self) -> memoryview:
+        """
+        CorpusIndex => Method: values() -> memoryview
+        -> memoryview('i'), occurrences of each line, in line order
+        """
+        return self._sections['counts']
+
+    def items(self):
+        """
+        CorpusIndex => Method: items() -> zip
+        -> zip, (line, occurrences) of each line, in line order
+        """
+        return zip(self, self._sections['counts'])
+
+    def index(self, item) -> int:
+        """
+        CorpusIndex => Method: index(item: str) -> int
+        -> int, id of item (line order), -1 if missing, the lookup table
+        is built on the first call
+        """
+        if self._lookup is None:
+            self._lookup = {line: lid for lid, line in enumerate(self)}
+        return self._lookup.get(item, -1)
+
+    def as_text_corpus(self) -> TextCorpus:
+        """
+        CorpusIndex => Method: as_text_corpus() -> TextCorpus
+        -> TextCorpus, the lines read in place from the mapping
+        """
+        return TextCorpus(
+            self._sections['lines'], self._sections['line_offsets'])
+
+    def close(self) -> None:
+        """
+        CorpusIndex => Method: close() -> None
+        Releases the sections and closes the mapping, the mapping stays
+        open while a TextCorpus or TokenIndex of the index is in use
+        """
+        self._sections = {}
+        self._token_index = None
+        self._automaton = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass
@@ -13,13 +13,24 @@ Text File
                 (removes punctionation/end-lines/converts to all lower case)
                     └──> Extracts Raw Text
 
-This module provides a class ItemizeFileData (filename, [stopwords]) which stores
-data from the file using the following methods:
+This module provides a class ItemizeFileData (filename, [stopwords], [stream],
+[mapped], [jobs], [start], [end]) which stores data from the file using the
+following methods:
 
  ...
 
 *get_raw(self) -> list
     =>Opens the file (filename) and creates a list containing items for each line of text
+*iter_raw(self) -> generator
+    =>Streams the lines of the file (filename) from the file handle
+*iter_mapped(self) -> generator
+    =>Memory-maps the file (filename) and splits it into lines by byte offsets
+*raw_line(self, index) -> str
+    =>Line index of the file, decoded from the mapping or from _raw
+*close(self) -> None
+    =>Closes the memory mapping of the file
+*iter_items(self, lines) -> generator
+    =>Sanitizes and removes the stopwords of each line of lines
 *sanitize(self, text=None) -> str
     =>If text is passed to method it will be sanitized usingthe private method
 *_sanitize_text(text) -> str, elseit cycles through each key in _itemized_text and
@@ -30,18 +41,39 @@ data from the file using the following methods:
     =>Verifies file_name (filename) exists
 *itemize_file(self) -> dict
     =>Searches text file (self._filename) for unique lines oftext, sanitizes each
-*line of text, adds values to the listed attributes
+*line of text, counts the occurrences of each unique line (linear time)
+*_itemize_parallel(self) -> None
+    =>Itemizes newline-aligned byte ranges of the file in a process pool
 *_sort_itemized_text(self) -> bool
     =>Sorts _itemized_text (dict) by item count (integer)
+*write_index(self, file_name, automaton=None) -> dict
+    =>Writes the itemized text, counts, tokens and posting lists as an index
+*tokenize_items(self) -> TokenLines
+    =>Tokenizes each item of _itemized_text once, stores the token ids of
+*the items in _tokens for the matching tiers
 """
+import mmap
 import os.path
-import string
+import re
 import threading
 
-from collections import defaultdict
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 import constants as const
 
+from corpusindex import (
+    CorpusIndex, file_digest, index_is_stale, is_corpus_index,
+    write_corpus_index)
+from itemizedcorpus import CorpusColumn, ItemizedCorpus
+from proceduretimer import PROFILER, SpanTimes, clock
+from runprofiler import RUN_PROFILER
+from sanitizer import sanitize, sanitize_buffer
+from stopwords import StopWords
+from tokencache import tokenize_items
+from tokenindex import TokenLines
+
 __author__ = "David Rush"
 __copyright__ = "Copyright 2022, Rush Solutions, LLC"
 __credits__ = ["David Rush", "...", "...", "..."]
@@ -51,10 +83,115 @@ __maintainer__ = "David Rush"
 __email__ = "davidprush@gmail.com"
 __status__ = "Development"
 
+ENCODING = 'utf-8'
+MEMO_LINES = 4096
+
+_LINE_END = re.compile(b'\r\n|\r|\n')
+
+
+def line_end(mapping, start, end) -> int:
+    """
+    Function: line_end(mapping: mmap | bytes, start: int, end: int) -> int
+    Finds the first end line of mapping[start:end] like a file opened in
+    text mode (universal newlines: '\\r\\n', '\\r' or '\\n'), a '\\r' at
+    end - 1 keeps the '\\n' that follows it
+    -> int, offset after the end line, -1 if mapping[start:end] has none
+    """
+    found = _LINE_END.search(mapping, start, end)
+    if found is None:
+        return -1
+    stop = found.end()
+    if stop == end and mapping[stop - 1:stop] == b'\r' and \
+            mapping[stop:stop + 1] == b'\n':
+        stop += 1
+    return stop
 
-class ItemizeFileData:
+
+def byte_ranges(file_name, parts, start=0, end=None) -> list:
+    """
+    Function: byte_ranges(file_name: str, parts: int, [start]: int,
+                          [end]: int) -> list
+    Splits the file (or its byte range start:end) into at most parts byte
+    ranges of similar size, each range ends after an end line (line_end, a
+    '\\r\\n' is never split) or at end
+    -> list, (start, end) byte offsets of each range, in file order
+    """
+    size = os.path.getsize(file_name)
+    size = size if end is None else min(end, size)
+    if size <= start:
+        return []
+    ranges = []
+    first = start
+    with open(file_name, 'rb') as fh:
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            for part in range(1, parts):
+                stop = line_end(
+                    mapping,
+                    max(start, first + (size - first) * part // parts - 1),
+                    size)
+                if stop == -1:
+                    break
+                ranges.append((start, stop))
+                start = stop
+    if start < size:
+        ranges.append((start, size))
+    return ranges
+
+
+def iter_blocks(file_name, start=0, end=None, size=const.BLOCK_SIZE):
+    """
+    Function: iter_blocks(file_name: str, [start]: int, [end]: int,
+                          [size]: int) -> generator
+    Reads the byte range start:end of the file (memory-mapped) in blocks
+    of about size bytes, each block ends after an end line (line_end) or at
+    end
+    -> generator, each item is a block of whole lines as bytes
     """
-    Itemizefile(filename: str, [stopwords]: list, optional)
+    with open(file_name, 'rb') as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            end = len(mapping) if end is None else min(end, len(mapping))
+            while start < end:
+                stop = line_end(mapping, min(start + size, end) - 1, end)
+                if stop == -1:
+                    stop = end
+                yield mapping[start:stop]
+                start = stop
+
+
+def _itemize_range(file_name, start, end, stop_words) -> tuple:
+    """
+    Function: _itemize_range(file_name: str, start: int, end: int,
+                             stop_words: StopWords) -> tuple
+    Process pool worker of ItemizeFileData._itemize_parallel, itemizes the
+    lines of the byte range start:end of the file, sanitized a block of
+    lines at a time (sanitize_buffer, StopWords.pop_lines)
+    -> tuple, (lines in the range, key=>[unique item]: str,
+        item=>[count, index of its first line in the range]: list)
+    """
+    found = {}
+    lines = 0
+    for block in iter_blocks(file_name, start, end):
+        items = sanitize_buffer(block)
+        if stop_words is not None:
+            items = stop_words.pop_lines(items)
+        for item in items:
+            lines += 1
+            if item not in ('', ' '):
+                seen = found.get(item)
+                if seen is None:
+                    found[item] = [1, lines - 1]
+                else:
+                    seen[0] += 1
+    return lines, found
+
+
+class ItemizeFileData:  # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-public-methods
+    """
+    Itemizefile(filename: str, [stopwords]: list, [stream]: bool,
+                [mapped]: bool, [jobs]: int, optional)
 
     ...
 
@@ -62,17 +199,37 @@ class ItemizeFileData:
     ----------
     _filename:=str, set to optional file_name parameter
     _file_exists:=bool, True if _filename exists, false otherwise
-    _raw:=list, raw list of text from the file
-    _stopwords:=list, words to be removed from the text
-    _itemized_text:=dict, init to defaultdict(int),
-    _origin:= init to defaultdict(int),
+    _raw:=list, raw list of text from the file (empty when streaming)
+    _stream:=bool, True to stream the file instead of reading it into _raw
+    _mapped:=bool, True to memory-map the file instead of reading it into _raw
+    _jobs:=int, processes itemizing byte ranges of the file (1 is serial)
+    _start:=int, byte offset of the first line itemized (0 is the start)
+    _end:=int, byte offset where itemizing stops (None is the end of file)
+    _map:=mmap, read-only mapping of the file (None until itemized mapped)
+    _line_offsets:=array('q'), byte offset of line i at _line_offsets[i],
+        end at _line_offsets[i + 1] (memory-mapped)
+    _stopwords:=StopWords, words to be removed from the text (frozenset)
+    _itemized_text:=ItemizedCorpus, compact mapping key=>[unique line]: str,
+        item=>[number of lines of the file equal to the key]: int
+        (a CorpusIndex when the file is a prebuilt index)
+    _origin:=CorpusColumn, view of _itemized_text, key=>[unique line]: str,
+        item=>[index of its first line in the file]: int
     _unique_item_count:=int, total num. of unique items added to _itemized_text
     _file_item_count:=int, total num. of items (lines) of text from _filename
+    _tokens:=TokenLines, tokens longer than 3 chars of each item of
+        _itemized_text (token id columns, in item order)
 
     Methods
     -------
     get_raw() -> list =>Opens the file (filename) and creates a list containing
                     unique items for each line of text
+    iter_raw() -> generator =>Streams the lines of the file (filename)
+    iter_mapped() -> generator =>Memory-maps the file (filename), splits it
+                    into lines by byte offsets, decodes each line lazily
+    raw_line(index) -> str =>Line index of the file (mapping or _raw)
+    close() -> None =>Closes the memory mapping of the file
+    iter_items(lines) -> generator =>Sanitizes and removes the stopwords of
+                    each line of lines (generator pipeline)
     sanitize(text=None) -> str =>If text is passed to method it will be sanitized
                     usingthe private method _sanitize_text(text) -> str, elseit
                     cycles through each key in _itemized_text and runs_sanitize_text(text)
@@ -80,39 +237,76 @@ class ItemizeFileData:
     pop_stopwords(text=None) -> str =>Removes stop_words from text: str
     file_exists(file_name=None) -> bool =>Verifies file_name (filename) exists
     itemize_file() -> dict =>Searches text file (self._filename) for
-                    unique lines oftext, sanitizes each line of text, adds values to
-                    the listed attributes
+                    unique lines oftext, sanitizes each line of text, counts the
+                    occurrences of each unique line (linear time)
+    _itemize_parallel() -> None =>Itemizes byte ranges of the file in a
+                    process pool and merges the unique items in file order
     _sort_itemized_text() -> bool =>Sorts _itemized_text (dict) by item count (integer)
+    write_index(file_name, [automaton]) -> dict =>Writes the itemized text,
+                    counts, tokens and posting lists as a prebuilt index
+                    (CorpusIndex), with the KeyAutomaton of compiled keys
+    _load_index(index) -> dict =>Uses a prebuilt index in place of itemizing
+    tokenize_items() -> TokenLines =>Tokenizes each item of _itemized_text
+                    once, stores the token ids of the items in _tokens
 
     Parameters
     ----------
     file_name:=str, required filename of text to be used by this instance
-    stopwords:=list, stop words to be removed from text, default=consts.STOP_WORDS
+    stopwords:=list | StopWords, stop words to be removed from text,
+        default=consts.STOP_WORDS
+    stream:=bool, streams the file through a generator pipeline instead of
+        reading it into _raw (files larger than RAM), default=False
+    mapped:=bool, memory-maps the file (mmap) and keeps byte offsets of its
+        lines instead of reading it into _raw, default=False
+    jobs:=int, number of processes itemizing newline-aligned byte ranges of
+        the file in parallel, default=1 (serial)
+
+    The byte range of an incremental run is set through the start and end
+    properties before itemize_file
     """
 
     def __init__(
         self,
         file_name,
-        stop_words=None
+        stop_words=None,
+        stream=False,
+        mapped=False,
+        jobs=1
     ) -> None:
         """
         ItemizeFileData => Method:__init__ to instantiate class attributes
 
-        obj = Itemizefile(filename: str, [stopwords]: list)
+        obj = Itemizefile(filename: str, [stopwords]: list, [stream]: bool,
+                          [mapped]: bool, [jobs]: int)
         file_name:=str, required filename of text to be used by this instance
-        stopwords:=list, stop words to be removed from text, default=consts.STOP_WORDS
+        stopwords:=list | StopWords, stop words to be removed from text,
+            default=consts.STOP_WORDS
+        stream:=bool, streams the file through a generator pipeline instead
+            of reading it into _raw, default=False
+        mapped:=bool, memory-maps the file and keeps byte offsets of its
+            lines instead of reading it into _raw, default=False
+        jobs:=int, processes itemizing byte ranges of the file, default=1
         """
         self._filename = file_name
+        self._stream = stream
+        self._jobs = jobs
+        self._mapped = mapped
+        self._start = 0
+        self._end = None
+        self._map = None
+        self._line_offsets = array('q', [0])
         self._file_exists = self.file_exists(file_name)
         self._stopwords = self._set_stopwords(stop_words)
         self._raw = []
-        self._itemized_text = defaultdict(int)
-        self._origin = defaultdict(int)
+        self._itemized_text = ItemizedCorpus()
+        self._origin = CorpusColumn(
+            self._itemized_text, self._itemized_text.first_lines)
         self._unique_item_count = 0
         self._file_item_count = 0
         self._stopwords_popped = 0
         self._populated = False
-        self.thread = threading.Thread(target=self.itemize_file, args=())
+        self._tokens = ()
+        self.thread = threading.Thread(target=self._ingest, args=())
         if self._stopwords is not None:
             if len(self._stopwords) != 0:
                 self._set_stopwords()
@@ -150,6 +344,38 @@ class ItemizeFileData:
         """
         self._filename = value
 
+    @property
+    def start(self) -> int:
+        """
+        ItemizeFileData => Property: _start
+        return self._start
+        """
+        return self._start
+
+    @start.setter
+    def start(self, value) -> None:
+        """
+        ItemizeFileData => Property: _start, setter
+        self._start = value
+        """
+        self._start = value
+
+    @property
+    def end(self) -> int:
+        """
+        ItemizeFileData => Property: _end
+        return self._end
+        """
+        return self._end
+
+    @end.setter
+    def end(self, value) -> None:
+        """
+        ItemizeFileData => Property: _end, setter
+        self._end = value
+        """
+        self._end = value
+
     @property
     def itemized_text(self) -> dict:
         """
@@ -166,6 +392,14 @@ class ItemizeFileData:
         """
         self._itemized_text = obj
 
+    @property
+    def tokens(self) -> TokenLines:
+        """
+        ItemizeFileData => Property: _tokens
+        return self._tokens
+        """
+        return self._tokens
+
     @property
     def stopwords(self) -> list:
         """
@@ -178,9 +412,9 @@ class ItemizeFileData:
     def stopwords(self, obj=None) -> None:
         """
         ItemizeFileData => Property: _stopwords, setter
-        self._stopwords = list(obj)
+        self._stopwords = self._set_stopwords(obj)
         """
-        self._stopwords = list(obj)
+        self._stopwords = self._set_stopwords(obj)
 
     @property
     def unique_item_count(self) -> int:
@@ -230,6 +464,104 @@ class ItemizeFileData:
         print("The file: {0} does not exist!".format(self._filename))
         return []
 
+    def iter_raw(self):
+        """
+        ItemizeFileData
+            └──>Method:  iter_raw(self) -> generator
+        Streams the lines of the file (filename) from the file handle,
+        without keeping them in _raw
+        -> generator, each item is a line of text
+        """
+        if self._file_exists:
+            with open(self._filename, 'r', encoding=ENCODING) as fh:
+                yield from fh
+        else:
+            print(f"The file: {self._filename} does not exist!")
+
+    def iter_mapped(self, start=0, end=None):
+        """
+        ItemizeFileData
+            └──>Method:  iter_mapped(self, [start]: int, [end]: int) -> generator
+        Maps the file (filename) read-only in memory (mmap, shared with
+        the OS page cache) and splits it (or its byte range start:end,
+        newline-aligned) into lines, records the byte offset of each
+        line in _line_offsets, each line is decoded only when the
+        pipeline reaches it
+        -> generator, each item is a line of text
+        """
+        self.close()
+        self._line_offsets = array('q', [start])
+        if not self._file_exists:
+            print(f"The file: {self._filename} does not exist!")
+            return
+        with open(self._filename, 'rb') as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        mapping = self._map
+        offsets = self._line_offsets
+        size = len(mapping) if end is None else min(end, len(mapping))
+        while start < size:
+            stop = line_end(mapping, start, size)
+            if stop == -1:
+                stop = size
+            offsets.append(stop)
+            yield self._decode(mapping[start:stop])
+            start = stop
+
+    def raw_line(self, index) -> str:
+        """
+        ItemizeFileData
+            └──>Method:  raw_line(index: int) -> str
+        Line index (0 based) of the file, decoded from the mapping
+        (_line_offsets) when the file is memory-mapped, else from _raw
+        -> str, raw line of text
+        """
+        if self._map is not None:
+            return self._decode(self._map[
+                self._line_offsets[index]:self._line_offsets[index + 1]])
+        return self._raw[index]
+
+    def close(self) -> None:
+        """
+        ItemizeFileData
+            └──>Method:  close() -> None
+        Closes the memory mapping of the file (if any)
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def iter_items(self, lines, times=None):
+        """
+        ItemizeFileData
+            └──>Method:  iter_items(lines: iterable,
+                                    [times]: SpanTimes) -> generator
+        Sanitizes and removes the stopwords of each line of lines, in
+        order, repeated lines are cleaned once while memoized unless
+        streaming or memory-mapped, the memo holds at most MEMO_LINES raw
+        lines (emptied when full: a memo of every raw line outgrows the CPU
+        caches and costs more than it saves on large files), the time of
+        each step is added to times (sanitize, stopwords) if given
+        -> generator, each item is a cleaned line of text ('' if empty)
+        """
+        clean = self.sanitize if times is None \
+            else times.tally('sanitize', self.sanitize)
+        pop_stopwords = self.pop_stopwords if times is None \
+            else times.tally('stopwords', self.pop_stopwords)
+        if self._stream or self._mapped:
+            for line in lines:
+                yield pop_stopwords(clean(line))
+            return
+        cleaned = {}
+        for line in lines:
+            item = cleaned.get(line)
+            if item is None:
+                if len(cleaned) >= MEMO_LINES:
+                    cleaned.clear()
+                item = cleaned[line] = pop_stopwords(clean(line))
+            yield item
+
     def sanitize(self, text=None) -> str:
         """
         ItemizeFileData
@@ -254,33 +586,11 @@ class ItemizeFileData:
         ItemizeFileData
             └──>Method:  pop_stopwords(text: str) -> str
         Removes stopwords from text (str) regardless of position in
+        (frozenset lookup of each word, see StopWords)
         -> str, without stop words
         """
-        if isinstance(self._stopwords, list):
-            text_pop = []
-            text_lst = []
-            # for word in self._stopwords:
-            text_lst = text.split(' ')
-            for w in text_lst:
-                if w != ' ':
-                    if w not in self._stopwords:
-                        text_pop.append(str(w))
-            text = ' '.join(text_pop)
-            # text = text[len(word) + 1] \
-            #     if (word == "{0} ".format(text[0: len(word)])) \
-            #     else text
-            # text = text[0: len(text) - len(word) + 1] \
-            #     if (word == " {0}".format(text[0: len(text) - len(word)])) \
-            #     else text
-            # # verify text is not a single instance of the stopword
-            # if word != text:
-            #     word = " {0} ".format(word)
-            #     if word in text:
-            #         self._stopwords_popped += 1
-            #         text = text.replace(word, " ")
-            # else:
-            #     self._stopwords_popped += 1
-            #     text = " "
+        if self._stopwords is not None:
+            return self._stopwords.pop(text)
         return text
 
     def echo_stopwords(self) -> bool:
@@ -318,45 +628,230 @@ class ItemizeFileData:
             else:
                 return False
 
+    @RUN_PROFILER.profiled()
+    @PROFILER.timed('itemize')
     def itemize_file(self) -> dict:
         """
         ItemizeFileData
             └──>Method:  itemize_file() -> dict
         Searches the text file (filename) for unique lines of text,
-        sanitizes each line of text, adds a total count value of int
-        as 0 for each key
+        sanitizes each line of text, counts the occurrences of each
+        unique line (hash-based dedup, linear in the number of lines),
+        in streaming mode (_stream) the lines are read from the file
+        handle through the iter_items pipeline, only the unique
+        sanitized items are kept in memory, memory-mapped (_mapped)
+        keeps byte offsets of the lines into the mapping (raw_line),
+        with _jobs > 1 newline-aligned byte ranges of the file are
+        itemized in a process pool then merged (_itemize_parallel),
+        a prebuilt index (keycollator index) is loaded instead unless its
+        source file changed (then the source is itemized), a byte range
+        (_start, _end) of the file is itemized memory-mapped, with the
+        PROFILER enabled the read, sanitize and stopwords steps are timed
         -> dict
                 keys: uqique lines of text from file as str
-                items: int (0) for future use as counter
+                items: int, number of lines of the file equal to the key
         -> None, if _itemized_text has no items
         """
         self._populated = False
-        for self._file_item_count, item in enumerate(self.get_raw()):
-            indx = item = self.pop_stopwords(self.sanitize(item))
+        if self._file_exists and is_corpus_index(self._filename):
+            index = CorpusIndex(self._filename)
+            if not index_is_stale(index.metadata):
+                return self._load_index(index)
+            print(f"The index: {self._filename} is stale, itemizing: "
+                  f"{index.metadata['source']}")
+            index.close()
+            self._filename = index.metadata['source']
+        self._itemized_text = ItemizedCorpus()
+        self._origin = CorpusColumn(
+            self._itemized_text, self._itemized_text.first_lines)
+        self._file_item_count = 0
+        times = SpanTimes() if PROFILER.enabled else None
+        since = clock()
+        lines = self._read_lines()
+        if times is not None and isinstance(lines, list):
+            times.split('read', since)
+        elif times is not None:
+            lines = times.iterate('read', lines)
+        for self._file_item_count, item in enumerate(
+                self.iter_items(lines, times), 1):
             if item != '' and item != ' ':
-                self._origin[indx] = self._file_item_count
-                if item not in [x for x in self._itemized_text]:
-                    self._unique_item_count += 1
-                    self._itemized_text[item] = 0
+                self._itemized_text.add(item, self._file_item_count - 1)
+        if times is not None:
+            PROFILER.merge(times)
+        self._unique_item_count = len(self._itemized_text)
         if self._unique_item_count != 0:
             self._populated = True
             return self._itemized_text
         else:
             return None
 
+    def _read_lines(self):
+        """
+        ItemizeFileData
+            └──>Method:  _read_lines() -> list | generator
+        Reads the lines of the file the way the options select: itemized
+        in a process pool (_jobs > 1, no lines left to itemize), a byte
+        range or memory-mapped (iter_mapped), streamed (iter_raw) or read
+        into _raw (get_raw)
+        -> list | generator, raw lines of text
+        """
+        if self._jobs > 1 and self._file_exists:
+            self._itemize_parallel()
+            return ()
+        if self._mapped or self._start or self._end is not None:
+            return self.iter_mapped(self._start, self._end)
+        if self._stream:
+            return self.iter_raw()
+        return self.get_raw()
+
+    def _itemize_parallel(self) -> None:
+        """
+        ItemizeFileData
+            └──>Method:  _itemize_parallel() -> None
+        Splits the file (or its byte range _start:_end) into _jobs
+        newline-aligned byte ranges, itemizes
+        each range in a process pool (_itemize_range), then merges the
+        per-range unique items in file order: counts are added and the
+        first-seen line (_origin) is offset by the lines of the
+        preceding ranges
+        """
+        ranges = byte_ranges(
+            self._filename, self._jobs, self._start, self._end)
+        if not ranges:
+            return
+        with ProcessPoolExecutor(
+            max_workers=min(self._jobs, len(ranges))
+        ) as executor:
+            shards = executor.map(
+                _itemize_range,
+                repeat(self._filename),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+                repeat(self._stopwords))
+            for lines, found in shards:
+                for item, (count, first) in found.items():
+                    self._itemized_text.add(
+                        item, self._file_item_count + first, count)
+                self._file_item_count += lines
+
+    @PROFILER.timed('tokenize')
+    def tokenize_items(self) -> TokenLines:
+        """
+        ItemizeFileData
+            └──>Method:  tokenize_items() -> TokenLines
+        Tokenizes each item of _itemized_text once, the tokens are held as
+        token ids aligned with the items (no str copy of the items)
+        -> TokenLines, tokens longer than 3 characters of each item, in
+                item order
+        -> tuple (empty), a CorpusIndex holds its tokens (token_index)
+        """
+        if isinstance(self._itemized_text, CorpusIndex):
+            self._tokens = ()
+            return self._tokens
+        self._tokens = tokenize_items(self._itemized_text)
+        return self._tokens
+
+    def write_index(self, file_name, automaton=None) -> dict:
+        """
+        ItemizeFileData
+            └──>Method:  write_index(file_name: str,
+                                     [automaton]: KeyAutomaton) -> dict
+        Writes the itemized text with its counts, first lines, tokens
+        and posting lists to file_name as a prebuilt index (CorpusIndex),
+        with automaton (KeyAutomaton of the items) for compiled keys
+        -> dict, header of the index
+        -> None, if _itemized_text has no items
+        """
+        if not self._populated or \
+                isinstance(self._itemized_text, CorpusIndex):
+            print(f"The file: {self._filename} is not itemized!")
+            return None
+        if len(self._tokens) != len(self._itemized_text):
+            self.tokenize_items()
+        stat = os.stat(self._filename)
+        return write_corpus_index(
+            file_name,
+            self._itemized_text,
+            self._tokens,
+            {
+                'source': os.path.abspath(self._filename),
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'sha256': file_digest(self._filename),
+                'file_lines': self._file_item_count,
+                'stopwords': self._stopwords_fingerprint(),
+            },
+            automaton=automaton)
+
+    def _load_index(self, index) -> dict:
+        """
+        ItemizeFileData
+            └──>Method:  _load_index(index: CorpusIndex) -> dict
+        Uses the prebuilt index of filename (memory-mapped) in place of
+        itemizing it, warns if it was built with other stopwords
+        -> CorpusIndex, mapping of the unique lines to their counts
+        -> None, if the index has no items
+        """
+        if index.metadata.get('stopwords') != self._stopwords_fingerprint():
+            print(f"The index: {self._filename} was built with other "
+                  "stopwords!")
+        self._itemized_text = index
+        self._origin = CorpusColumn(index, index.first_lines)
+        self._file_item_count = index.metadata.get('file_lines', len(index))
+        self._unique_item_count = len(index)
+        if self._unique_item_count != 0:
+            self._populated = True
+            return self._itemized_text
+        return None
+
+    def _stopwords_fingerprint(self) -> str:
+        """
+        ItemizeFileData
+            └──>Method:  _stopwords_fingerprint() -> str
+        -> str, fingerprint of _stopwords ('' without stopwords)
+        """
+        return self._stopwords.fingerprint \
+            if self._stopwords is not None else ''
+
+    def _ingest(self) -> None:
+        """
+        ItemizeFileData
+            └──>Method:  _ingest() -> None
+        Target of self.thread, itemizes then tokenizes the file (a span
+        named after the file)
+        """
+        with PROFILER.span(os.path.basename(self._filename)):
+            if self.itemize_file() is not None:
+                self.tokenize_items()
+
+    @staticmethod
+    def _decode(line) -> str:
+        """
+        ItemizeFileData
+            └──>Method:  _decode(line: bytes) -> str
+        Decodes a line of the mapping like a file opened in text mode
+        ('\\r\\n' and '\\r' end lines are read as '\\n')
+        -> str, utf-8 line with a '\\n' end line
+        """
+        line = str(line, ENCODING, 'replace')
+        if line.endswith('\r\n'):
+            return line[:-2] + const.LINE
+        if line.endswith('\r'):
+            return line[:-1] + const.LINE
+        return line
+
     def _set_stopwords(self, stopwords=None) -> list:
         """
         ItemizeFileData
-            └──>Method:  _set_stopwords() -> list
-        Combines nltk stopwords with stopwords as sorted list
-        -> list, expanded stopword list (appends nltk stopwords)
+            └──>Method:  _set_stopwords() -> StopWords
+        Compiles stopwords (list) into a StopWords (frozenset of the
+        sanitized words), a StopWords is used as is
+        -> StopWords, None without stopwords
         """
-        if stopwords is not None:
-            stopwords = [
-                self.sanitize(str(word)) for word in stopwords
-            ]
-            stopwords.sort()
+        if isinstance(stopwords, StopWords):
             return stopwords
+        if stopwords is not None:
+            return StopWords(stopwords)
         return None
 
     def _sort_itemized_text(self) -> bool:
@@ -379,18 +874,7 @@ class ItemizeFileData:
         ItemizeFileData
             └──>Method:  _sanitize_text(text) -> str
         Removes all punctuation and end lines then converts it
-        to all lower case
+        to all lower case (compiled single pass, see sanitizer)
         -> str, sanitized text
         """
-        if text is not None:
-            text = text.lower()
-            text = str(text) if not isinstance(text, str) else text
-            while '  ' in text:
-                text = text.replace('  ', ' ')
-            text = text.replace(const.LINE, '')
-            text = text.translate(text.maketrans(
-                "",
-                "",
-                string.punctuation
-            ))
-            return text
+        return sanitize(text)
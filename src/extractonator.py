@@ -27,8 +27,16 @@ import termtables as tt
 
 from collections import defaultdict
 
+from corpusindex import index_is_current, is_corpus_index
 from extractfile import ItemizeFileData as ifd
+from proceduretimer import PROFILER
+from resultcache import ResultCache, content_digest
+from resultselect import select_keys
+from runprofiler import RUN_PROFILER
+from runstate import IncrementalState, span_digest
+from stopwords import StopWords
 from threadanalysis import KeyTextAnalysis as kta
+from threadanalysis import MATCH_VERSION, as_text_corpus
 
 import constants as const
 
@@ -42,7 +50,8 @@ __email__ = "davidprush@gmail.com"
 __status__ = "Development"
 
 
-class KeyKrawler:
+# the attributes follow the options of the command line
+class KeyKrawler:  # pylint: disable=too-many-instance-attributes
     """
     KeyKrawler(
                 text_file=TEXT, key_file=KEY, csv_file=CSV,
@@ -65,15 +74,31 @@ class KeyKrawler:
 
     Attributes
     ----------
-    _txtifd = ifd(TEXT, STOP_WORDS)
-    _keyifd = ifd(KEY, STOP_WORDS)
-    _csv = CSV
-    _log = LOG
+    stopwords = StopWords(STOP_WORDS, stopwords_file, _cache)
+    _txtifd = ifd(text_file, stopwords, stream, mapped, ingest_jobs)
+    _keyifd = ifd(_compiled_keys(key_file, stopwords), stopwords)
+    _csv = csv_file
+    _log = log_file
     _limres = limit_result
     _abrvt = abreviate
     _uplb = ubound
     _lolb = lbound
     _fuzrat = fuzz_ratio
+    _engine = engine
+    _jobs = jobs
+    _chunk = chunk_size
+    _backend = backend
+    _mode = mode
+    _stream = stream
+    _mapped = mapped
+    _ingjobs = ingest_jobs
+    _stpfls = stopwords_file
+    _stpfp = stopwords.fingerprint
+    _weighted = weighted
+    _cache = ResultCache() if cache else None
+    _incr = incremental
+    _state = None
+    _cached = False
     _vrbs = verbose
     _cmprsns = 0
     _lgcnt = 0
@@ -90,10 +115,18 @@ class KeyKrawler:
     -------
     echo_result()
     echo_stats()
+    stats2file(file_name: str)
     results2file()
     get_key2text_matches()
-    _purge_limits()
-    _limresult()
+    _incremental_state()
+    _source_key()
+    _source_probes()
+    _content_key()
+    _read_cache(cache_key: str, [confirm]: bool)
+    _write_cache(cache_key: str, counts: dict, [confirm]: bool)
+    _new_analysis()
+    _run_analysis([source_key]: str, [counts]: dict)
+    _compiled_keys()
     _vrbs()
     _verify_files()
 
@@ -109,10 +142,23 @@ class KeyKrawler:
     abreviate=32,
     verbose=False,
     lbound=None,
-    ubound=None
+    ubound=None,
+    engine='scan',
+    jobs=None,
+    chunk_size=None,
+    backend='thread',
+    mode='auto',
+    stream=False,
+    mapped=False,
+    ingest_jobs=1,
+    stopwords_file=None,
+    weighted=True,
+    cache=True,
+    incremental=False
     """
 
-    def __init__(
+    # the options mirror the keycollator command line, keyword-only
+    def __init__(  # pylint: disable=too-many-arguments,too-many-locals
         self, *,
         text_file=const.TEXT,
         key_file=const.KEY,
@@ -124,7 +170,19 @@ class KeyKrawler:
         abreviate=32,
         verbose=False,
         lbound=None,
-        ubound=None
+        ubound=None,
+        engine='scan',
+        jobs=None,
+        chunk_size=None,
+        backend='thread',
+        mode='auto',
+        stream=False,
+        mapped=False,
+        ingest_jobs=1,
+        stopwords_file=None,
+        weighted=True,
+        cache=True,
+        incremental=False
     ) -> None:
         """
         Class: KeyKrawler
@@ -135,20 +193,40 @@ class KeyKrawler:
                         logging=False, fuzz_ratio=99,
                         limit_result=None, abreviate=32,
                         verbose=False, ubound_limit=None,
-                        lbound_limit=None
+                        lbound_limit=None, engine='scan',
+                        jobs=None, chunk_size=None, backend='thread',
+                        mode='auto', stream=False, mapped=False,
+                        ingest_jobs=1, stopwords_file=None,
+                        weighted=True, cache=True, incremental=False
                     ) -> obj
 
         Attributes
         ----------
-        _txtifd = ifd(TEXT, STOP_WORDS)
-        _keyifd = ifd(KEY, STOP_WORDS)
-        _csv = CSV
-        _log = LOG
+        stopwords = StopWords(STOP_WORDS, stopwords_file, _cache)
+        _txtifd = ifd(text_file, stopwords, stream, mapped, ingest_jobs)
+        _keyifd = ifd(_compiled_keys(key_file, stopwords), stopwords)
+        _csv = csv_file
+        _log = log_file
         _limres = limit_result
         _abrvt = abreviate
         _uplb = ubound
         _lolb = lbound
         _fuzrat = fuzz_ratio
+        _engine = engine
+        _jobs = jobs
+        _chunk = chunk_size
+        _backend = backend
+        _mode = mode
+        _stream = stream
+        _mapped = mapped
+        _ingjobs = ingest_jobs
+        _stpfls = stopwords_file
+        _stpfp = stopwords.fingerprint
+        _weighted = weighted
+        _cache = ResultCache() if cache else None
+        _incr = incremental
+        _state = None
+        _cached = False
         _vrbs = verbose
         _cmprsns = 0
         _lgcnt = 0
@@ -173,21 +251,48 @@ class KeyKrawler:
         abreviate=32,
         verbose=False,
         lbound=None,
-        ubound=None
+        ubound=None,
+        engine='scan',
+        jobs=None,
+        chunk_size=None,
+        backend='thread',
+        mode='auto',
+        stream=False,
+        mapped=False,
+        ingest_jobs=1,
+        stopwords_file=None,
+        weighted=True,
+        cache=True,
+        incremental=False
         """
-        self._txtifd = ifd(const.TEXT, const.STOP_WORDS)
-        self._keyifd = ifd(const.KEY, const.STOP_WORDS)
-        self._reskta = kta(
-            self._txtifd.itemized_text,
-            self._keyifd.itemized_text,
-            fuzz_ratio)
-        self._csv = const.CSV
-        self._log = const.LOG
+        self._cache = ResultCache() if cache else None
+        stopwords = StopWords(const.STOP_WORDS, stopwords_file, self._cache)
+        self._txtifd = ifd(
+            text_file, stopwords, stream=stream, mapped=mapped,
+            jobs=ingest_jobs)
+        self._keyifd = ifd(
+            self._compiled_keys(key_file, stopwords), stopwords)
+        self._csv = csv_file
+        self._log = log_file
         self._limres = limit_result
         self._abrvt = abreviate
         self._uplb = ubound
         self._lolb = lbound
         self._fuzrat = fuzz_ratio
+        self._engine = engine
+        self._jobs = jobs
+        self._chunk = chunk_size
+        self._backend = backend
+        self._mode = mode
+        self._stream = stream
+        self._mapped = mapped
+        self._ingjobs = ingest_jobs
+        self._stpfls = stopwords_file
+        self._stpfp = stopwords.fingerprint
+        self._weighted = weighted
+        self._incr = incremental
+        self._state = None
+        self._cached = False
         self._vrbs = verbose
         self._cmprsns = 0
         self._lgcnt = 0
@@ -196,6 +301,8 @@ class KeyKrawler:
         self._drlst = defaultdict(str)
         self._pwd = os.getcwd()
         self._pwdlst = [i for i in os.listdir()]
+        self._tokidx = None
+        self._reskta = self._new_analysis()
 
     def filename_update(self):
         """
@@ -260,8 +367,7 @@ class KeyKrawler:
         Print the results formatted in a table to the console
         """
         table_data = []
-        self._purge_limits()
-        for i, item in enumerate([x for x in self._reskta.keys_found]):
+        for i, (item, count) in enumerate(self._reskta.keys_found.items()):
             item = const.LOGTXT['echo_result'].format(
                 item[0:self._abrvt]
                 if len(item) > self._abrvt
@@ -269,7 +375,7 @@ class KeyKrawler:
             table_data.append([
                 i,
                 item,
-                self._reskta.keys_found
+                count
             ])
         tt.print(
             table_data,
@@ -282,13 +388,20 @@ class KeyKrawler:
     def echo_stats(self) -> None:
         """
         KeyKrawler => Method: echo_stats() -> None
-        Prints analysis totals in a table to the console
+        Prints analysis totals in a table to the console, then the pairs
+        (key, line) reaching each match tier, compared, pruned by its
+        index and matched, with the time spent in the tier (the rows of
+        the tiers are not additive, the totals count each pair once)
         """
+        stats = self._reskta.match_stats
+        keys, text = self._unique_counts()
         table_data = [
-            ["Keys", self._keyifd.unique_item_count],
-            ["Text", self._txtifd.unique_item_count],
+            ["Keys", '-' if keys is None else keys],
+            ["Text", '-' if text is None else text],
             ["Matches", self._reskta.total_matches],
-            ["Comparisons", self._reskta.total_comparisons]
+            ["Pairs", stats.pairs],
+            ["Comparisons", self._reskta.total_comparisons],
+            ["Pruned", stats.pruned]
             # ["Logs", self._logger.log_count]
             # ["Runtime", self.__timer.timestamp(True)]
         ]
@@ -299,79 +412,301 @@ class KeyKrawler:
             padding=(0, 0),
             alignment="lc"
         )
+        tt.print(
+            stats.rows(),
+            header=const.TTBLHDR,
+            style=tt.styles.rounded,
+            padding=(0, 0),
+            alignment="llrrrrr"
+        )
+
+    def stats2file(self, file_name) -> dict:
+        """
+        KeyKrawler => Method: stats2file(file_name: str) -> dict
+        Writes the totals and the counters of each match tier of the
+        analysis (see echo_stats) to file_name as JSON
+        -> dict, stats written
+        """
+        keys, text = self._unique_counts()
+        return self._reskta.match_stats.write(file_name, {
+            'text_file': self._txtifd.filename,
+            'key_file': self._keyifd.filename,
+            'keys': keys,
+            'text': text,
+            'mode': self._reskta.mode,
+            'engine': self._engine,
+            'fuzz_ratio': self._fuzrat,
+            'cached': self._cached,
+            'matches': self._reskta.total_matches,
+        })
+
+    def _unique_counts(self) -> tuple:
+        """
+        KeyKrawler => Method: _unique_counts() -> tuple
+        -> tuple, (unique keys, unique lines of text), None for a file
+        that was not itemized (results read from _cache)
+        """
+        return tuple(
+            None if self._cached and not count else count
+            for count in (
+                self._keyifd.unique_item_count,
+                self._txtifd.unique_item_count))
 
     def get_key2text_matches(self) -> dict:
         """
         KeyKrawler => Method: get_key2text_matches() -> None
         Completes all necessary procedures to evaluate the text
         by finding key matches in the text
+        the results of unchanged files are looked up in _cache before
+        itemizing them (_source_key, lookup span), a hit confirmed by the
+        probes of the files skips the ingest and the matching
+        (_run_analysis)
+        in incremental mode (_incr) only the lines appended since the
+        last run are itemized and matched, the counts of the last run are
+        added (IncrementalState), each stage is a span of the PROFILER
+        (ingest, analyze, write)
         -> dict,
             where key:=[unique text/str]
             and item:=[ total number of matches found in text]
         """
-        self._txtifd.thread.start()
-        self._keyifd.thread.start()
-        self._txtifd.thread.join()
-        self._keyifd.thread.join()
-        self._reskta = kta(
-            self._txtifd.itemized_text,
-            self._keyifd.itemized_text,
-            self._fuzrat
-        )
-        if self._reskta.run_keys2text_all():
+        source_key = self._source_key()
+        counts = None
+        if source_key is not None:
+            with PROFILER.span('lookup'):
+                counts = self._read_cache(source_key, confirm=True)
+        if counts is None:
+            with PROFILER.span('ingest'):
+                if self._incr:
+                    self._keyifd.thread.start()
+                    self._keyifd.thread.join()
+                    self._state = self._incremental_state()
+                self._txtifd.thread.start()
+                if not self._incr:
+                    self._keyifd.thread.start()
+                self._txtifd.thread.join()
+                if not self._incr:
+                    self._keyifd.thread.join()
+        with PROFILER.span('analyze'):
+            self._reskta = self._new_analysis()
+            found = self._run_analysis(source_key, counts)
+        if self._state is not None:
+            self._state.save(self._txtifd.end, self._reskta.key_counts)
+        if found:
+            self._tokidx = self._reskta.token_index
             if self.results2file():
                 return self._reskta.keys_found
         return None
 
+    @PROFILER.timed('state')
+    def _incremental_state(self) -> IncrementalState:
+        """
+        KeyKrawler => Method: _incremental_state() -> IncrementalState
+        Loads the state of the last run over the text file (matching
+        options digested as params) and sets the byte range of the text
+        to itemize: from the offset of the last run to the current end
+        of the file (lines appended during this run are left for the next)
+        -> IncrementalState, None if the text can not be run incrementally
+        (a prebuilt index, unweighted matches)
+        """
+        text_file = self._txtifd.filename
+        if not self._txtifd.file_exists(text_file) or \
+                is_corpus_index(text_file):
+            print(f"The text: {text_file} can not be run incrementally")
+            return None
+        if not self._weighted:
+            print(f"Unique lines are not additive, full run of: {text_file}")
+            return None
+        params = ResultCache.key(
+            MATCH_VERSION,
+            content_digest(as_text_corpus(self._keyifd.itemized_text)),
+            self._fuzrat,
+            self._stpfp)
+        state = IncrementalState(text_file, params)
+        self._txtifd.start = state.load()
+        self._txtifd.end = os.path.getsize(text_file)
+        return state
+
+    def _source_key(self) -> str:
+        """
+        KeyKrawler => Method: _source_key() -> str
+        Keys the results of the run by what decides them without reading
+        any file: the path, size and mtime of the text and key files, the
+        stop words fingerprint, the fuzz ratio, weighted and MATCH_VERSION
+        (a hit is confirmed by the probes of the files, _source_probes)
+        -> str, entry of the run in _cache, None without a cache, in
+        incremental mode (the results depend on the last run) or if a
+        file is missing
+        """
+        if self._cache is None or self._incr:
+            return None
+        files = (self._txtifd.filename, self._keyifd.filename)
+        if not all(os.path.isfile(name) for name in files):
+            return None
+        stamps = []
+        for name in files:
+            stat = os.stat(name)
+            stamps += [os.path.abspath(name), stat.st_size, stat.st_mtime_ns]
+        return self._cache.key(
+            MATCH_VERSION,
+            *stamps,
+            self._stpfp,
+            self._fuzrat,
+            self._weighted)
+
+    def _source_probes(self) -> list:
+        """
+        KeyKrawler => Method: _source_probes() -> list
+        -> list, span_digest of the text and key files (sha256 of their
+        size and of their first and last bytes), a rewrite keeping the
+        size and mtime of a file changes its probe
+        """
+        return [
+            span_digest(name, os.path.getsize(name))
+            for name in (self._txtifd.filename, self._keyifd.filename)]
+
+    def _content_key(self) -> str:
+        """
+        KeyKrawler => Method: _content_key() -> str
+        Keys the results of the analysis (_reskta) by the content of the
+        itemized text (and its counts when weighted) and keys, the fuzz
+        ratio, weighted and MATCH_VERSION
+        -> str, entry of the analysis in _cache, None if the text or the
+        keys are empty
+        """
+        if len(self._reskta.text_dict) == 0 or \
+                len(self._reskta.key_dict) == 0:
+            return None
+        return self._cache.key(
+            MATCH_VERSION,
+            *self._reskta.content_digests(),
+            self._fuzrat,
+            self._weighted)
+
+    @PROFILER.timed('cache')
+    def _read_cache(self, cache_key, confirm=False) -> dict:
+        """
+        KeyKrawler => Method: _read_cache(cache_key: str,
+                                          [confirm]: bool) -> dict
+        Reads the entry cache_key of _cache, with confirm (entry of the
+        source files, _source_key) the entry holds the probes of the
+        files when it was written, a hit is kept only if they still match
+        -> dict, key=>[key]: str, item=>[count]: int, key counts of the
+        entry, None if it is missing or not confirmed
+        """
+        entry = self._cache.get(cache_key)
+        if entry is None or not confirm:
+            return entry
+        if entry.get('probes') != self._source_probes():
+            return None
+        return entry.get('counts')
+
+    def _write_cache(self, cache_key, counts, confirm=False) -> None:
+        """
+        KeyKrawler => Method: _write_cache(cache_key: str, counts: dict,
+                                           [confirm]: bool) -> None
+        Stores counts as the entry cache_key of _cache, with confirm (entry
+        of the source files) with the probes of the files (_read_cache)
+        """
+        if confirm:
+            counts = {'probes': self._source_probes(), 'counts': counts}
+        self._cache.put(cache_key, counts)
+
+    def _compiled_keys(self, key_file, stopwords) -> str:
+        """
+        KeyKrawler => Method: _compiled_keys(key_file: str,
+                                             stopwords: StopWords) -> str
+        Picks the compiled keys of key_file (keycollator compile-keys) when
+        they are current (same key file by mtime or sha256, same stop words)
+        -> str, path of the compiled keys, or key_file if none is current
+        """
+        compiled = key_file + const.KEYS_SUFFIX
+        if index_is_current(compiled, key_file, stopwords.fingerprint):
+            return compiled
+        if os.path.exists(compiled):
+            print(f"The compiled keys: {compiled} are stale, run: "
+                  f"keycollator compile-keys -k {key_file}")
+        return key_file
+
+    def _new_analysis(self) -> kta:
+        """
+        KeyKrawler => Method: _new_analysis() -> KeyTextAnalysis
+        Creates the KeyTextAnalysis of the itemized text and keys
+        with the matching options of this instance, the TokenIndex of a
+        previous analysis (_tokidx) is reused on the same text
+        """
+        return kta(
+            self._txtifd.itemized_text,
+            self._keyifd.itemized_text,
+            self._fuzrat,
+            engine=self._engine,
+            jobs=self._jobs,
+            chunk_size=self._chunk,
+            backend=self._backend,
+            mode=self._mode,
+            weighted=self._weighted,
+            text_tokens=self._txtifd.tokens,
+            key_tokens=self._keyifd.tokens,
+            token_index=self._tokidx
+        )
+
+    def _run_analysis(self, source_key=None, counts=None) -> bool:
+        """
+        KeyKrawler => Method: _run_analysis([source_key]: str,
+                                            [counts]: dict) -> bool
+        Runs the analysis (_reskta): counts (read from _cache by the
+        caller) replace the matching, without source_key (_source_key,
+        already looked up by the caller) the analysis is looked up in
+        _cache by its content (_content_key), a miss is matched
+        (keys2text_find) then stored, the counts of the last incremental
+        run (_state) are added, the limits (_limres, _lolb, _uplb) select
+        the keys_found, which are printed and dumped
+        -> bool, True if keys were found, otherwise False
+        """
+        analysis = self._reskta
+        cache_key = source_key
+        if counts is None and cache_key is None and self._cache is not None:
+            cache_key = self._content_key()
+            if cache_key is not None:
+                counts = self._read_cache(cache_key)
+        self._cached = counts is not None
+        if self._cached:
+            print("Analyzing text for keys (cached)...")
+            analysis.add_key_counts(counts)
+        else:
+            analysis.keys2text_find()
+            if cache_key is not None and analysis.text_corpus is not None:
+                self._write_cache(
+                    cache_key, dict(analysis.key_counts),
+                    confirm=source_key is not None)
+        if self._state is not None and self._state.counts:
+            analysis.add_key_counts(self._state.counts)
+        with PROFILER.span('sort'):
+            analysis.keys_found = select_keys(
+                analysis.key_counts, self._limres, self._lolb, self._uplb)
+        if len(analysis.key_counts) == 0:
+            return False
+        return analysis.echo_keys_found() and analysis.dump_keys_found() \
+            and analysis.dump_keys2text_index()
+
+    @RUN_PROFILER.profiled()
+    @PROFILER.timed('write')
     def results2file(self) -> bool:
         """
         KeyKrawler => Method: results2file() -> bool
-        Get KeyTextAnalysis results from _reskta.keys_found
-        and formats to write it to CSV file (_csv)
+        Get KeyTextAnalysis results from _reskta.keys_found (already
+        selected within the limits) and formats to write it to CSV file (_csv)
         """
         with open(self._csv, 'w') as fh:
             write_count = 0
-            self._purge_limits()
-            for item in self._reskta.keys_found:
+            for item, count in self._reskta.keys_found.items():
                 write_count += 1
                 csv_formatted_item = const.LOGTXT['csv_formatted_item'].format(
-                    str(item), str(self._reskta.keys_found), const.LINE)
+                    str(item), str(count), const.LINE)
                 fh.write(csv_formatted_item)
             fh.close()
             return True
         return False
 
-    def _limresult(self) -> bool:
-        """
-        KeyKrawler => Method: _limresult() -> bool
-        Remove items above the _limres
-        -> bool, True if limit is set for items to be removed from result
-        """
-        if self._limres is not None:
-            for i, item in enumerate([x for x in self._reskta.keys_found]):
-                if i >= self._limres:
-                    del self._reskta.keys_found[item]
-            return True
-        return False
-
-    def _purge_limits(self) -> bool:
-        """
-        KeyKrawler => Method: _purge_limits() -> bool
-        Remove items with total number of matches
-        below the lower boundry and above upper-boundry
-        -> bool, True if items were removed outside the limits set
-        """
-        if self._lolb is not None \
-                and self._uplb is not None:
-            for item in enumerate([x for x in self._reskta.keys_found]):
-                if (self._reskta.keys_found[item] < self._lolb) \
-                    and (self._reskta.keys_found[item]
-                         > self._uplb):
-                    del self._reskta.keys_found[item]
-                    self._rcnt -= 1
-            return True
-        return True
-
     def _verify_files(self, *args) -> bool:
         """
         KeyKrawler => Method: _verify_files(*args) -> bool
@@ -0,0 +1,430 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Class: ItemizedCorpus
+        └──obj = ItemizedCorpus() -> obj
+
+Compact store of the unique items (sanitized lines) of a file: the items
+are packed word coded in a single buffer (offsets array), their counts and
+the index of their first line are int32 columns, and an open addressing
+table of item ids (probed by crc32, grown past MAX_LOAD, a byte of the
+crc32 of each item skips most comparisons) replaces the dict, so the store
+holds a few arrays instead of one Python object per item and per dict,
+offsets are uint32 until the buffer outgrows them
+
+Word coding: each word of an item (split on single spaces) is replaced by
+its id in the vocabulary of the corpus (1 to 3 bytes, the words seen first
+get the short ids), a number of MIN_NUMBER digits or more by its packed
+decimal digits (2 per byte, never added to the vocabulary), a word of
+letters and digits by the codes of its runs joined by GLUE, an item with a
+word missing from a full vocabulary is stored as RAW and its utf-8 bytes,
+the coding of an item never changes so equal items have equal codes
+(compared without decoding)
+
+Implements the read-only mapping interface (item => count) consumed by
+KeyTextAnalysis, iteration follows the insertion (first-seen) order, the
+items are decoded once into a TextCorpus (as_text_corpus) that the next
+iterations read, until an item is added
+"""
+import re
+import zlib
+
+from array import array
+from collections.abc import Mapping
+
+from textcorpus import TextCorpus
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+ENCODING = 'utf-8'
+MIN_TABLE = 8
+MAX_LOAD = 0.7
+MAX_OFFSET = 0xFFFFFFFF
+MAX_WORDS = 1 << 18
+MIN_NUMBER = 3
+GLUE = b'\xfd'
+RAW = b'\xfe'
+NUMBER = b'\xff'
+
+_GLUED = '\x00'
+_DIGIT = re.compile('[0-9]')
+_RUNS = re.compile('[0-9]+|[^0-9]+')
+_CODES = re.compile(
+    rb'[\x00-\x7f]|[\x80-\xef].|[\xf0-\xfc]..|\xfd|'
+    rb'\xff[\x00-\x99]*?[\x0f\x1f\x2f\x3f\x4f\x5f\x6f\x7f\x8f\x9f\xff]',
+    re.DOTALL)
+
+
+def _word_code(wid) -> bytes:
+    """
+    Function: _word_code(wid: int) -> bytes
+    -> bytes, code of the word id wid: 1 byte below 128, 2 bytes (first
+    byte 0x80 to 0xef) below 28800, else 3 bytes (first byte 0xf0 to 0xfc)
+    """
+    if wid < 0x80:
+        return bytes((wid,))
+    if wid < 0x7080:
+        wid -= 0x80
+        return bytes((0x80 | wid >> 8, wid & 0xFF))
+    wid -= 0x7080
+    return bytes((0xF0 + (wid >> 16), wid >> 8 & 0xFF, wid & 0xFF))
+
+
+def _number_code(digits) -> bytes:
+    """
+    Function: _number_code(digits: str) -> bytes
+    -> bytes, NUMBER then digits packed 2 per byte (hex nibbles), ended by
+    the nibble f, padded with f to a whole byte (decoded by rstrip('f'))
+    """
+    return NUMBER + bytes.fromhex(digits + ('f' if len(digits) % 2 else 'ff'))
+
+
+class _Words(dict):
+    """
+    Class: _Words
+        └──obj = _Words(words: dict) -> obj
+
+    Word of each code (code => word), the codes missing are numbers decoded
+    from their packed digits (_number_code)
+
+    ...
+
+    Attributes
+    ----------
+    codes:=dict, key=>[word]: str, item=>[code]: bytes, vocabulary
+    """
+
+    __slots__ = ('codes',)
+
+    def __init__(self, words) -> None:
+        """
+        _Words => Method:__init__ to instantiate class attributes
+            └──obj = _Words(words: dict) -> obj
+        """
+        super().__init__(words)
+        self.codes = {}
+
+    def __missing__(self, code) -> str:
+        return code[1:].hex().rstrip('f')
+
+
+class ItemizedCorpus(Mapping):  # pylint: disable=too-many-instance-attributes
+    """
+    Class: ItemizedCorpus
+        └──obj = ItemizedCorpus() -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _buffer:=bytearray, packed word coded items
+    _offsets:=array('I' | 'q'), start of item i at _offsets[i], end at
+        _offsets[i + 1]
+    _counts:=array('i'), occurrences of item i
+    _first:=array('i'), index of the first line of item i
+    _tags:=array('B'), high byte of the crc32 of the codes of item i
+    _table:=array('i'), open addressing table of item ids + 1 (0 is empty)
+    _words:=_Words, key=>[code]: bytes, item=>[word]: str, and the
+        vocabulary (_words.codes)
+    _text:=TextCorpus, the items decoded (as_text_corpus), None until
+        decoded and when an item is added
+
+    Methods
+    -------
+    add(item: str, line: int, [count]: int) -> int: Adds count occurrences
+    index(item: str) -> int: Id of item (-1 if missing)
+    first_line(item: str) -> int: Index of the first line of item
+    as_text_corpus() -> TextCorpus: Items as a TextCorpus (decoded once)
+    """
+
+    __slots__ = (
+        '_buffer', '_offsets', '_counts', '_first', '_tags', '_table',
+        '_words', '_text')
+
+    def __init__(self) -> None:
+        """
+        ItemizedCorpus => Method:__init__ to instantiate class attributes
+            └──obj = ItemizedCorpus() -> obj
+        """
+        self._buffer = bytearray()
+        self._offsets = array('I', [0])
+        self._counts = array('i')
+        self._first = array('i')
+        self._tags = array('B')
+        self._table = array('i', bytes(MIN_TABLE * 4))
+        self._words = _Words({GLUE: _GLUED})
+        self._text = None
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __iter__(self):
+        return iter(self.as_text_corpus())
+
+    def __getitem__(self, item) -> int:
+        iid = self.index(item)
+        if iid < 0:
+            raise KeyError(item)
+        return self._counts[iid]
+
+    def __contains__(self, item) -> bool:
+        return self.index(item) >= 0
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}(items={len(self)}, '
+                f'nbytes={self.nbytes})')
+
+    @property
+    def counts(self) -> array:
+        """
+        ItemizedCorpus => Property: counts() -> array
+        -> array('i'), occurrences of each item, in item order
+        """
+        return self._counts
+
+    @property
+    def first_lines(self) -> array:
+        """
+        ItemizedCorpus => Property: first_lines() -> array
+        -> array('i'), index of the first line of each item, in item order
+        """
+        return self._first
+
+    @property
+    def nbytes(self) -> int:
+        """
+        ItemizedCorpus => Property: nbytes() -> int
+        -> int, size of the buffer plus the columns and the table (not
+        the vocabulary)
+        """
+        return len(self._buffer) + sum(
+            col.itemsize * len(col) for col in (
+                self._offsets, self._counts, self._first, self._tags,
+                self._table))
+
+    def values(self) -> array:
+        """
+        ItemizedCorpus => Method: values() -> array
+        -> array('i'), occurrences of each item, in item order (read-only)
+        """
+        return self._counts
+
+    def items(self):
+        """
+        ItemizedCorpus => Method: items() -> zip
+        -> zip, (item, occurrences) of each item, in item order
+        """
+        return zip(self, self._counts)
+
+    def index(self, item) -> int:
+        """
+        ItemizedCorpus => Method: index(item: str) -> int
+        -> int, id of item (position in item order), -1 if missing
+        """
+        data = self._encode(item, False)
+        if data is None:
+            return -1
+        return self._probe(data, zlib.crc32(data))[0]
+
+    def first_line(self, item) -> int:
+        """
+        ItemizedCorpus => Method: first_line(item: str) -> int
+        -> int, index of the first line of item, KeyError if missing
+        """
+        iid = self.index(item)
+        if iid < 0:
+            raise KeyError(item)
+        return self._first[iid]
+
+    def add(self, item, line, count=1) -> int:
+        """
+        ItemizedCorpus => Method: add(item: str, line: int,
+                                      [count]: int) -> int
+        Adds count occurrences of item, line is kept as its first line
+        when item is new
+        -> int, id of item
+        """
+        data = self._encode(item, True)
+        crc = zlib.crc32(data)
+        iid, slot = self._probe(data, crc)
+        if iid >= 0:
+            self._counts[iid] += count
+            return iid
+        iid = len(self._counts)
+        self._text = None
+        self._buffer += data
+        if len(self._buffer) > MAX_OFFSET and self._offsets.typecode == 'I':
+            self._offsets = array('q', self._offsets)
+        self._offsets.append(len(self._buffer))
+        self._counts.append(count)
+        self._first.append(line)
+        self._tags.append(crc >> 24)
+        self._table[slot] = iid + 1
+        if len(self._counts) > MAX_LOAD * len(self._table):
+            self._grow()
+        return iid
+
+    def as_text_corpus(self) -> TextCorpus:
+        """
+        ItemizedCorpus => Method: as_text_corpus() -> TextCorpus
+        -> TextCorpus, the items decoded and packed as utf-8, in item order,
+        decoded once and shared until an item is added
+        """
+        if self._text is None:
+            buffer = self._buffer
+            offsets = self._offsets
+            self._text = TextCorpus.from_items(
+                self._decode(buffer[offsets[iid]:offsets[iid + 1]])
+                for iid in range(len(self._counts)))
+        return self._text
+
+    def _encode(self, item, grow) -> bytes:
+        """
+        ItemizedCorpus => Method: _encode(item: str, grow: bool) -> bytes
+        Word codes item, with grow its words missing from the vocabulary
+        are added while it is not full
+        -> bytes, codes of item, RAW then its utf-8 bytes if a word is
+        missing from the full vocabulary (or item holds _GLUED), None if a
+        word is missing without grow (item is not in the corpus)
+        """
+        if _GLUED in item:
+            return RAW + item.encode(ENCODING)
+        codes = self._words.codes
+        data = []
+        for word in item.split(' '):
+            code = codes.get(word)
+            if code is None:
+                code = self._new_code(word, grow)
+                if code is None:
+                    return None
+                if code is RAW:
+                    return RAW + item.encode(ENCODING)
+            data.append(code)
+        return b''.join(data)
+
+    def _new_code(self, word, grow) -> bytes:
+        """
+        ItemizedCorpus => Method: _new_code(word: str, grow: bool) -> bytes
+        Codes a word missing from the vocabulary: a number (_number_code),
+        the runs of a word of letters and digits joined by GLUE, or a new
+        word id (with grow)
+        -> bytes, code of word, RAW if the vocabulary is full, None if word
+        is missing without grow
+        """
+        number = word.isascii() and word.isdigit()
+        if number and len(word) >= MIN_NUMBER:
+            return _number_code(word)
+        words = self._words
+        if not number and _DIGIT.search(word):
+            runs = []
+            for run in _RUNS.findall(word):
+                code = words.codes.get(run) or self._new_code(run, grow)
+                if code is None or code is RAW:
+                    return code
+                runs.append(code)
+            return GLUE.join(runs)
+        if len(words.codes) >= MAX_WORDS:
+            return RAW
+        if not grow:
+            return None
+        code = words.codes[word] = _word_code(len(words.codes))
+        words[code] = word
+        return code
+
+    def _decode(self, data) -> str:
+        """
+        ItemizedCorpus => Method: _decode(data: bytes) -> str
+        -> str, item of the codes data
+        """
+        if data[:1] == RAW:
+            return data[1:].decode(ENCODING)
+        item = ' '.join(map(self._words.__getitem__, _CODES.findall(data)))
+        if GLUE in data:
+            item = item.replace(' ' + _GLUED + ' ', '')
+        return item
+
+    def _probe(self, data, crc) -> tuple:
+        """
+        ItemizedCorpus => Method: _probe(data: bytes, crc: int) -> tuple
+        Linear probing of _table from the slot of crc
+        -> tuple, (id of data or -1, slot of data or first empty slot)
+        """
+        table = self._table
+        tags = self._tags
+        buffer = self._buffer
+        offsets = self._offsets
+        mask = len(table) - 1
+        slot = crc & mask
+        tag = crc >> 24
+        entry = table[slot]
+        while entry:
+            iid = entry - 1
+            if tags[iid] == tag and \
+                    buffer[offsets[iid]:offsets[iid + 1]] == data:
+                return iid, slot
+            slot = (slot + 1) & mask
+            entry = table[slot]
+        return -1, slot
+
+    def _grow(self) -> None:
+        """
+        ItemizedCorpus => Method: _grow() -> None
+        Doubles _table and re-inserts the item ids (crc32 of their codes)
+        """
+        table = array('i', bytes(len(self._table) * 8))
+        mask = len(table) - 1
+        buffer = self._buffer
+        offsets = self._offsets
+        for iid in range(len(self._counts)):
+            slot = zlib.crc32(buffer[offsets[iid]:offsets[iid + 1]]) & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = iid + 1
+        self._table = table
+
+
+class CorpusColumn(Mapping):
+    """
+    Class: CorpusColumn
+        └──obj = CorpusColumn(corpus: ItemizedCorpus, column: array) -> obj
+
+    Read-only mapping view item => column[id of item] of an ItemizedCorpus
+    (e.g. its first lines), without a per-item dict
+
+    Parameters
+    ----------
+    corpus:=ItemizedCorpus, corpus of the items
+    column:=array, one value per item of corpus, in item order
+    """
+
+    __slots__ = ('_corpus', '_column')
+
+    def __init__(self, corpus, column) -> None:
+        """
+        CorpusColumn => Method:__init__ to instantiate class attributes
+            └──obj = CorpusColumn(corpus: ItemizedCorpus,
+                                  column: array) -> obj
+        """
+        self._corpus = corpus
+        self._column = column
+
+    def __len__(self) -> int:
+        return len(self._corpus)
+
+    def __iter__(self):
+        return iter(self._corpus)
+
+    def __getitem__(self, item) -> int:
+        iid = self._corpus.index(item)
+        if iid < 0:
+            raise KeyError(item)
+        return self._column[iid]
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Class: KeyAutomaton
+        └──obj = KeyAutomaton(keys: iterable, optional) -> obj
+
+Aho-Corasick automaton compiled from every key of a key dictionary, scans
+a line of text once and reports every key contained in the line
+(equivalent to testing `key in line` for each key)
+
+The trie transitions are a single dict keyed by edge (node << CHAR_BITS |
+code point of the char), a built automaton flattens into arrays (to_arrays)
+stored with the compiled keys (keycollator compile-keys) and is restored
+without rebuilding the trie nor the failure links (from_arrays)
+"""
+from array import array
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+CHAR_BITS = 21
+CHAR_MASK = (1 << CHAR_BITS) - 1
+
+
+class KeyAutomaton:
+    """
+    Class: KeyAutomaton
+        └──obj = KeyAutomaton(keys: iterable, optional) -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _keys:=list, keys added to the automaton, the index is the key id
+    _goto:=dict, trie transitions, edge (node << CHAR_BITS | ord(char)) => node
+    _fail:=list, failure link of each node
+    _out:=list, tuple of key ids emitted when a node is reached
+    _empty:=list, ids of empty keys (contained in every line)
+    _built:=bool, True once failure links are computed
+
+    Methods
+    -------
+    add(key: str) -> int: Adds a key to the trie, returns the key id
+    build() -> bool: Computes the failure links and output sets
+    find(text: str) -> set: Ids of the keys contained in text
+    find_keys(text: str) -> set: Keys contained in text
+    to_arrays() -> dict: Transitions, failure links and outputs as arrays
+    from_arrays(keys: list, arrays: dict) -> KeyAutomaton: Restores a
+        built automaton from to_arrays
+
+    Parameters
+    ----------
+    keys:=iterable, optional keys to add and build at instantiation
+    """
+
+    def __init__(self, keys=None) -> None:
+        """
+        KeyAutomaton => Method:__init__ to instantiate class attributes
+            └──obj = KeyAutomaton(keys: iterable, optional) -> obj
+        """
+        self._keys = []
+        self._goto = {}
+        self._fail = [0]
+        self._out = [()]
+        self._empty = []
+        self._built = False
+        if keys is not None:
+            for key in keys:
+                self.add(key)
+            self.build()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def keys(self) -> list:
+        """
+        KeyAutomaton => Property: keys() -> list
+        -> list, keys indexed by key id
+        """
+        return self._keys
+
+    @property
+    def nodes(self) -> int:
+        """
+        KeyAutomaton => Property: nodes() -> int
+        -> int, number of trie nodes
+        """
+        return len(self._fail)
+
+    @classmethod
+    def from_arrays(cls, keys, arrays) -> 'KeyAutomaton':
+        """
+        KeyAutomaton => Method: from_arrays(keys: list,
+                                            arrays: dict) -> KeyAutomaton
+        Restores a built automaton from the keys (in key id order) and the
+        arrays (or memoryviews) of to_arrays, nothing is recomputed
+        """
+        automaton = cls()
+        automaton._keys = list(keys)
+        automaton._goto = dict(zip(arrays['goto_edges'], arrays['goto_nodes']))
+        automaton._fail = arrays['fail'].tolist()
+        ids = arrays['out_ids'].tolist()
+        offsets = arrays['out_offsets'].tolist()
+        automaton._out = [
+            tuple(ids[start:end]) for start, end in zip(offsets, offsets[1:])]
+        automaton._empty = arrays['empty_ids'].tolist()
+        automaton._built = True
+        return automaton
+
+    def to_arrays(self) -> dict:
+        """
+        KeyAutomaton => Method: to_arrays() -> dict
+        Flattens the built automaton, the transitions are parallel arrays
+        of edges and nodes, the outputs of node n are the key ids at
+        out_ids[out_offsets[n]:out_offsets[n + 1]]
+        -> dict, key=>[name]: str, item=>[table]: array
+        """
+        if not self._built:
+            self.build()
+        out_offsets = array('q', [0])
+        out_ids = array('i')
+        for out in self._out:
+            out_ids.extend(out)
+            out_offsets.append(len(out_ids))
+        return {
+            'goto_edges': array('q', self._goto.keys()),
+            'goto_nodes': array('i', self._goto.values()),
+            'fail': array('i', self._fail),
+            'out_offsets': out_offsets,
+            'out_ids': out_ids,
+            'empty_ids': array('i', self._empty),
+        }
+
+    def add(self, key) -> int:
+        """
+        KeyAutomaton => Method: add(key: str) -> int
+        Adds key to the trie, invalidates previously built links
+        -> int, key id
+        """
+        kid = len(self._keys)
+        self._keys.append(key)
+        self._built = False
+        if key == '':
+            self._empty.append(kid)
+            return kid
+        goto = self._goto
+        node = 0
+        for char in key:
+            edge = node << CHAR_BITS | ord(char)
+            nxt = goto.get(edge)
+            if nxt is None:
+                nxt = goto[edge] = len(self._fail)
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] = self._out[node] + (kid,)
+        return kid
+
+    def build(self) -> bool:
+        """
+        KeyAutomaton => Method: build() -> bool
+        Computes failure links breadth first (nodes by depth, a child is
+        always created after its parent) and merges the output of each node
+        with the output of its failure node
+        -> bool, True if the automaton holds keys, otherwise False
+        """
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        parent = array('i', bytes(4 * len(fail)))
+        code = array('i', bytes(4 * len(fail)))
+        for edge, nxt in goto.items():
+            parent[nxt] = edge >> CHAR_BITS
+            code[nxt] = edge & CHAR_MASK
+        depth = array('i', bytes(4 * len(fail)))
+        for node in range(1, len(fail)):
+            depth[node] = depth[parent[node]] + 1
+        for node in sorted(range(1, len(fail)), key=depth.__getitem__):
+            if not parent[node]:
+                fail[node] = 0
+                continue
+            char = code[node]
+            link = fail[parent[node]]
+            while link and (link << CHAR_BITS | char) not in goto:
+                link = fail[link]
+            link = fail[node] = goto.get(link << CHAR_BITS | char, 0)
+            if out[link]:
+                out[node] = out[node] + out[link]
+        self._built = True
+        return len(self._keys) != 0
+
+    def find(self, text) -> set:
+        """
+        KeyAutomaton => Method: find(text: str) -> set
+        Scans text once
+        -> set, ids of every key contained in text
+        """
+        if not self._built:
+            self.build()
+        found = set(self._empty)
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        node = 0
+        for char in text:
+            char = ord(char)
+            nxt = goto.get(node << CHAR_BITS | char)
+            while nxt is None and node:
+                node = fail[node]
+                nxt = goto.get(node << CHAR_BITS | char)
+            node = nxt or 0
+            if out[node]:
+                found.update(out[node])
+        return found
+
+    def find_keys(self, text) -> set:
+        """
+        KeyAutomaton => Method: find_keys(text: str) -> set
+        -> set, every key contained in text
+        """
+        return {self._keys[kid] for kid in self.find(text)}
@@ -11,7 +11,7 @@ Example:
 
 Todo:
     ✖ Fix pylint errors
-    ✖ Add command line option to add a stopwords file
+    ✔ Add command line option to add a stopwords file
     ✖ Fix all cli options
     ✖ Add comments
     ✖ Refactor code and remove redunancies
@@ -28,12 +28,18 @@ Todo:
     ✖ @dependabot configuration
     ✖ Release Drafter (release-drafter.yml)
 """
-import sys
+import os
 
 import click
 
+from proceduretimer import PROFILER
 from proceduretimer import ProcedureTimer as pt
+from runprofiler import RUN_PROFILER
 from extractonator import KeyKrawler as kk
+from extractfile import ItemizeFileData as ifd
+from stopwords import StopWords
+from corpusindex import index_is_current
+from keyautomaton import KeyAutomaton
 
 import constants as const
 
@@ -54,14 +60,15 @@ __status__ = "Development"
     invoke_without_command=True)
 @click.option(
     '-t', '--text-file',
-    default=const.TEXT,
+    default=None,
     type=click.Path(exists=True),
     help='''Path/file name of the text to be searched
-    for against items in the key file'''
+    for against items in the key file, or of its prebuilt
+    index (see: keycollator index)'''
 )
 @click.option(
     '-k', '--key-file',
-    default=const.KEY,
+    default=None,
     type=click.Path(exists=True),
     help='''Path/file name of the key file containing a
         dictionary, key items, glossary, or reference
@@ -69,7 +76,7 @@ __status__ = "Development"
 )
 @click.option(
     '-r', '--result-file',
-    default=const.CSV,
+    default=None,
     type=click.Path(exists=True),
     help="Path/file name of the output file that \
         will contain the results (CSV or TXT)"
@@ -77,6 +84,7 @@ __status__ = "Development"
 @click.option(
     '--limit-result',
     default=None,
+    type=click.IntRange(1, None),
     help="Limit the number of results"
 )
 @click.option(
@@ -93,6 +101,131 @@ __status__ = "Development"
         uses acceptance ratios with integer values from 0 to 99,
         where 99 is nearly identical and 0 is not similar'''
 )
+@click.option(
+    '--engine',
+    default='scan',
+    type=click.Choice(['scan', 'aho']),
+    help='''Direct-match engine (default=scan), scan tests every
+        key against every line, aho compiles all keys into one
+        Aho-Corasick automaton and scans each line once'''
+)
+@click.option(
+    '-j', '--jobs',
+    default=None,
+    type=click.IntRange(1, None),
+    help="Number of worker threads (default=number of CPUs)"
+)
+@click.option(
+    '--chunk-size',
+    default=const.CHUNK_SIZE,
+    type=click.IntRange(1, None),
+    help=f"Number of keys (or lines) in each work unit "
+         f"(default={const.CHUNK_SIZE})"
+)
+@click.option(
+    '--backend',
+    default='thread',
+    type=click.Choice(['thread', 'process']),
+    help='''Worker pool type (default=thread), process runs the
+        matching in a process pool to use all CPU cores'''
+)
+@click.option(
+    '--mode',
+    default='auto',
+    type=click.Choice(['auto', 'key', 'line']),
+    help='''Matching mode (default=auto), key evaluates each key
+        against every line, line evaluates each line once against
+        the candidate keys, auto picks line when there are more
+        keys than lines'''
+)
+@click.option(
+    '--stream',
+    is_flag=True,
+    help='''Stream the text file through a generator pipeline
+        instead of reading it into memory (files larger than RAM)'''
+)
+@click.option(
+    '--mmap', 'mapped',
+    is_flag=True,
+    help='''Memory-map the text file and split it into lines by
+        byte offsets, lines are decoded lazily (shared page cache)'''
+)
+@click.option(
+    '--ingest-jobs',
+    default=1,
+    type=click.IntRange(1, None),
+    help='''Number of processes itemizing newline-aligned byte
+        ranges of the text file (default=1)'''
+)
+@click.option(
+    '--stopwords-file',
+    multiple=True,
+    type=click.Path(exists=True),
+    help='''Path/file name of a stopwords file (one word per line)
+        added to the default stopwords, can be repeated'''
+)
+@click.option(
+    '--unique-lines',
+    is_flag=True,
+    help='''Count the unique matching lines instead of the
+        occurrences of the matching lines in the text file'''
+)
+@click.option(
+    '--no-cache',
+    is_flag=True,
+    help='''Match again instead of reading the results of a
+        previous run on the same text and keys from the cache'''
+)
+@click.option(
+    '--incremental',
+    is_flag=True,
+    help='''Match only the lines appended to the text file since
+        the previous incremental run and add its counts'''
+)
+@click.option(
+    '--timings',
+    is_flag=True,
+    help='''Print the wall time, CPU time and calls of each stage
+        of the run (read, sanitize, itemize, tokenize, match tiers,
+        sort, write) as a tree'''
+)
+@click.option(
+    '--trace-file',
+    default=None,
+    type=click.Path(dir_okay=False),
+    help='''Path/file name to write a trace of the run (each stage
+        and each work unit of the workers with its process and
+        thread id)'''
+)
+@click.option(
+    '--trace-format',
+    default='chrome',
+    type=click.Choice(['chrome', 'flat'], case_sensitive=False),
+    help='''Format of the trace file: chrome (Trace Event JSON for
+        about://tracing or Perfetto) or flat (JSON), default=chrome'''
+)
+@click.option(
+    '--stats',
+    is_flag=True,
+    help='''Print the totals of the run and the pairs (key, line)
+        compared, pruned and matched by each match tier with its
+        time'''
+)
+@click.option(
+    '--stats-file',
+    default=None,
+    type=click.Path(dir_okay=False),
+    help='''Path/file name to write the totals and the counters of
+        each match tier as JSON'''
+)
+@click.option(
+    '--profile',
+    default=None,
+    type=click.Path(file_okay=False),
+    help='''Directory to write a profile of the run (cProfile .prof
+        files of the run and of each stage, and a report of the hot
+        functions and top allocation sites of each stage)'''
+)
 @click.option(
     '--ubound-limit',
     default=None,
@@ -127,13 +260,35 @@ __status__ = "Development"
 )
 @click.option(
     '-L', '--log-file',
-    default=const.LOG,
+    default=None,
     type=click.Path(exists=True),
     help="Path/file name to be used for the log file"
 )
-def cli(
+@click.pass_context
+# one parameter per option of the command line, passed by name by click
+def cli(  # pylint: disable=too-many-arguments,too-many-locals
+    ctx,
+    *,
     verbose,
     fuzz_ratio,
+    engine,
+    jobs,
+    chunk_size,
+    backend,
+    mode,
+    stream,
+    mapped,
+    ingest_jobs,
+    stopwords_file,
+    unique_lines,
+    no_cache,
+    incremental,
+    timings,
+    trace_file,
+    trace_format,
+    stats,
+    stats_file,
+    profile,
     key_file,
     text_file,
     limit_result,
@@ -147,28 +302,182 @@ def cli(
     """
     keycollator is an app that finds keys in a text file.
     """
+    if ctx.invoked_subcommand is not None:
+        return
     appkk = kk(
-        text_file=text_file,
-        key_file=key_file,
-        csv_file=result_file,
-        log_file=log_file,
+        text_file=text_file or const.TEXT,
+        key_file=key_file or const.KEY,
+        csv_file=result_file or const.CSV,
+        log_file=log_file or const.LOG,
         logging=logging,
         fuzz_ratio=fuzz_ratio,
         limit_result=limit_result,
         abreviate=abreviate,
         verbose=verbose,
         lbound=lbound_limit,
-        ubound=ubound_limit
+        ubound=ubound_limit,
+        engine=engine,
+        jobs=jobs,
+        chunk_size=chunk_size,
+        backend=backend,
+        mode=mode,
+        stream=stream,
+        mapped=mapped,
+        ingest_jobs=ingest_jobs,
+        stopwords_file=stopwords_file,
+        weighted=not unique_lines,
+        cache=not no_cache,
+        incremental=incremental
+    )
+    main(
+        appkk,
+        timings=timings,
+        trace_file=trace_file,
+        trace_format=trace_format.lower(),
+        stats=stats,
+        stats_file=stats_file,
+        profile=profile
     )
-    main(appkk)
+
+
+@cli.command('index')
+@click.option(
+    '-t', '--text-file',
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Path/file name of the text to be indexed"
+)
+@click.option(
+    '-o', '--output',
+    default=None,
+    type=click.Path(dir_okay=False),
+    help='''Path/file name of the index
+        (default=TEXT_FILE.kci)'''
+)
+@click.option(
+    '--ingest-jobs',
+    default=1,
+    type=click.IntRange(1, None),
+    help='''Number of processes itemizing newline-aligned byte
+        ranges of the text file (default=1)'''
+)
+@click.option(
+    '--stopwords-file',
+    multiple=True,
+    type=click.Path(exists=True),
+    help='''Path/file name of a stopwords file (one word per line)
+        added to the default stopwords, can be repeated'''
+)
+def index(text_file, output, ingest_jobs, stopwords_file):
+    """
+    Builds the prebuilt index of a text file, pass the index
+    as --text-file to skip itemizing and tokenizing the text.
+    """
+    index_timer = pt(msg='index')
+    text = ifd(
+        text_file, StopWords(const.STOP_WORDS, stopwords_file),
+        jobs=ingest_jobs)
+    if text.itemize_file() is None:
+        raise click.ClickException(f"No lines to index in {text_file}")
+    output = output or text_file + const.INDEX_SUFFIX
+    header = text.write_index(output)
+    index_timer.stop_timer(msg='index')
+    click.echo(
+        f"Indexed {text.file_item_count} lines ({header['lines']} unique, "
+        f"{header['vocabulary']} tokens) of {text_file} to {output}")
+    index_timer.echo()
+
+
+@cli.command('compile-keys')
+@click.option(
+    '-k', '--key-file',
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Path/file name of the key file to be compiled"
+)
+@click.option(
+    '-o', '--output',
+    default=None,
+    type=click.Path(dir_okay=False),
+    help='''Path/file name of the compiled keys
+        (default=KEY_FILE.kck, picked up by --key-file)'''
+)
+@click.option(
+    '--stopwords-file',
+    multiple=True,
+    type=click.Path(exists=True),
+    help='''Path/file name of a stopwords file (one word per line)
+        added to the default stopwords, can be repeated'''
+)
+@click.option(
+    '--force',
+    is_flag=True,
+    help="Compile the keys even if the compiled keys are current"
+)
+def compile_keys(key_file, output, stopwords_file, force):
+    """
+    Compiles the sanitized keys, their tokens and their automaton,
+    loaded in place of the key file while it does not change.
+    """
+    compile_timer = pt(msg='compile_keys')
+    stopwords = StopWords(const.STOP_WORDS, stopwords_file)
+    output = output or key_file + const.KEYS_SUFFIX
+    if not force and index_is_current(
+            output, key_file, stopwords.fingerprint):
+        click.echo(f"The compiled keys: {output} are current")
+        return
+    keys = ifd(key_file, stopwords)
+    if keys.itemize_file() is None:
+        raise click.ClickException(f"No keys to compile in {key_file}")
+    header = keys.write_index(
+        output, automaton=KeyAutomaton(keys.itemized_text))
+    compile_timer.stop_timer(msg='compile_keys')
+    click.echo(
+        f"Compiled {header['lines']} keys ({header['vocabulary']} tokens) "
+        f"of {key_file} to {output}")
+    compile_timer.echo()
 
 
 def main(obj, **kwargs):
-    app_timer = pt(msg=sys._getframe().f_code.co_name)
-    obj.get_key2text_matches()
-    app_timer.stop_timer(msg=sys._getframe().f_code.co_name)
+    """
+    Function: main(obj: KeyKrawler, [timings]: bool, [trace_file]: str,
+                   [trace_format]: str, [stats]: bool, [stats_file]: str,
+                   [profile]: str, optional) -> None
+    Finds the keys of obj in its text, then prints or writes the timings,
+    trace, match stats and profile requested on the command line
+    """
+    timings = kwargs.get('timings', False)
+    trace_file = kwargs.get('trace_file')
+    stats_file = kwargs.get('stats_file')
+    profile = kwargs.get('profile')
+    if timings or trace_file is not None:
+        PROFILER.enable(trace=trace_file is not None)
+    if profile is not None:
+        RUN_PROFILER.enable()
+    app_timer = pt(msg='main')
+    with RUN_PROFILER.stage('main'), PROFILER.span('main'):
+        obj.get_key2text_matches()
+    app_timer.stop_timer(msg='main')
     app_timer.echo()
+    if profile is not None:
+        RUN_PROFILER.disable()
+        written = ', '.join(
+            os.path.basename(path) for path in RUN_PROFILER.write(profile))
+        click.echo(f"Wrote the profile of the run to {profile} ({written})")
+    if kwargs.get('stats', False):
+        obj.echo_stats()
+    if stats_file is not None:
+        obj.stats2file(stats_file)
+        click.echo(f"Wrote the match stats to {stats_file}")
+    if timings:
+        PROFILER.echo_tree()
+    if trace_file is not None:
+        trace_format = kwargs.get('trace_format', 'chrome')
+        PROFILER.write_trace(trace_file, fmt=trace_format)
+        click.echo(
+            f"Wrote {len(PROFILER.events)} trace events ({trace_format}) "
+            f"to {trace_file}")
 
 
 if __name__ == '__main__':
-    cli()
+    cli()  # pylint: disable=no-value-for-parameter,missing-kwoa
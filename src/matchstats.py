@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Class: MatchStats
+        └──obj = MatchStats([indexes]: dict, optional) -> obj
+
+Counters of the match tiers (direct, tokenized, fuzzy) of a run: the
+key/line pairs reaching each tier, the pairs compared (substring test or
+fuzzy score), the pairs ruled out by the index or filter of the tier
+without a comparison (pruned), the pairs matched (hits) and the wall time
+spent in the tier, each worker keeps its own counters (added once per key
+or line) merged once by the analysis, no counter is shared between workers
+
+The pairs of a tier are the pairs left by the previous tier (not matched),
+the counters of the tiers are not additive: the totals count each pair
+once, every pair reaches the first tier (pairs), a pair is either matched
+by a tier (hits), compared by the last tier without a match, or ruled out
+by the index of the last tier (pruned)
+"""
+import json
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+TIERS = ('direct', 'tokenized', 'fuzzy')
+FIELDS = ('pairs', 'evaluated', 'pruned', 'hits', 'seconds')
+
+
+class MatchStats:
+    """
+    Class: MatchStats
+        └──obj = MatchStats([indexes]: dict, optional) -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _tiers:=dict, key=>[tier]: str, item=>[pairs, evaluated, pruned, hits,
+        seconds]: list
+    _indexes:=dict, key=>[tier]: str, item=>[index or filter of the tier]: str
+
+    Methods
+    -------
+    add(tier: str, pairs: int, evaluated: int, hits: int,
+        seconds: float) -> None: Adds to the counters of tier
+    merge(other: MatchStats | dict) -> None: Adds the counters of a worker
+    drain() -> dict: Counters, then clears them
+    totals() -> dict: Counters of each tier
+    rows() -> list: Row of each tier (echo_stats), not additive
+    to_dict() -> dict: JSON serializable counters
+    write(file_name: str, [extra]: dict) -> dict: Writes to_dict as JSON
+
+    Parameters
+    ----------
+    indexes:=dict, optional, key=>[tier]: str, item=>[index or filter of
+        the tier]: str, e.g. {'fuzzy': 'q-gram index'}
+    """
+
+    __slots__ = ('_tiers', '_indexes')
+
+    def __init__(self, indexes=None) -> None:
+        """
+        MatchStats => Method:__init__ to instantiate class attributes
+            └──obj = MatchStats([indexes]: dict, optional) -> obj
+        """
+        self._tiers = {tier: [0, 0, 0, 0, 0.0] for tier in TIERS}
+        self._indexes = dict(indexes) if indexes else {}
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(tiers={self._tiers})'
+
+    @property
+    def indexes(self) -> dict:
+        """
+        MatchStats => Property: indexes() -> dict
+        -> dict, index or filter of each tier
+        """
+        return self._indexes
+
+    @indexes.setter
+    def indexes(self, value) -> None:
+        """
+        MatchStats => Property: indexes(value: dict) -> None
+        """
+        self._indexes = dict(value)
+
+    @property
+    def pairs(self) -> int:
+        """
+        MatchStats => Property: pairs() -> int
+        -> int, pairs (key, line) of the run, every pair reaches the first
+        tier
+        """
+        return self._tiers[TIERS[0]][0]
+
+    @property
+    def comparisons(self) -> int:
+        """
+        MatchStats => Property: comparisons() -> int
+        -> int, pairs matched by a tier or compared by the last tier, each
+        pair counted once (pairs - pruned)
+        """
+        return self.pairs - self.pruned
+
+    @property
+    def pruned(self) -> int:
+        """
+        MatchStats => Property: pruned() -> int
+        -> int, pairs left after the last tier that it did not compare
+        (ruled out by its index), each pair counted once
+        """
+        pairs, evaluated = self._tiers[TIERS[-1]][:2]
+        return pairs - evaluated
+
+    @property
+    def hits(self) -> int:
+        """
+        MatchStats => Property: hits() -> int
+        -> int, pairs matched by every tier
+        """
+        return sum(counts[3] for counts in self._tiers.values())
+
+    def add(self, tier, pairs=0, evaluated=0, hits=0, seconds=0.0) -> None:
+        """
+        MatchStats => Method: add(tier: str, [pairs]: int, [evaluated]: int,
+                                  [hits]: int, [seconds]: float) -> None
+        Adds to the counters of tier, the pairs not evaluated are pruned
+        """
+        counts = self._tiers[tier]
+        counts[0] += pairs
+        counts[1] += evaluated
+        counts[2] += pairs - evaluated
+        counts[3] += hits
+        counts[4] += seconds
+
+    def merge(self, other) -> None:
+        """
+        MatchStats => Method: merge(other: MatchStats | dict) -> None
+        Adds the counters of other (a worker, or its drain)
+        """
+        if isinstance(other, MatchStats):
+            other = other.totals()
+        for tier, counts in other.items():
+            mine = self._tiers[tier]
+            for field, value in enumerate(counts):
+                mine[field] += value
+
+    def drain(self) -> dict:
+        """
+        MatchStats => Method: drain() -> dict
+        -> dict, counters of each tier (totals), then clears them (e.g.
+        the counters of a work unit in a process pool worker)
+        """
+        totals = self.totals()
+        self._tiers = {tier: [0, 0, 0, 0, 0.0] for tier in TIERS}
+        return totals
+
+    def totals(self) -> dict:
+        """
+        MatchStats => Method: totals() -> dict
+        -> dict, key=>[tier]: str, item=>[pairs, evaluated, pruned, hits,
+        seconds]: tuple
+        """
+        return {tier: tuple(counts) for tier, counts in self._tiers.items()}
+
+    def rows(self) -> list:
+        """
+        MatchStats => Method: rows() -> list
+        -> list, [tier, index, pairs, evaluated, pruned, hits, seconds] of
+        each tier (TTBLHDR)
+        """
+        return [
+            [tier, self._indexes.get(tier, '-')] + counts[:4] +
+            [f'{counts[4]:.3f}']
+            for tier, counts in self._tiers.items()]
+
+    def to_dict(self) -> dict:
+        """
+        MatchStats => Method: to_dict() -> dict
+        -> dict, counters of each tier (with its index, not additive) and
+        the totals (each pair counted once)
+        """
+        tiers = {}
+        for tier, counts in self._tiers.items():
+            tiers[tier] = dict(zip(FIELDS, counts))
+            tiers[tier]['index'] = self._indexes.get(tier)
+        return {
+            'pairs': self.pairs,
+            'comparisons': self.comparisons,
+            'pruned': self.pruned,
+            'hits': self.hits,
+            'tiers': tiers,
+        }
+
+    def write(self, file_name, extra=None) -> dict:
+        """
+        MatchStats => Method: write(file_name: str, [extra]: dict) -> dict
+        Writes to_dict (with the items of extra, e.g. keys, lines, fuzz
+        ratio of the run) to file_name as JSON
+        -> dict, stats written
+        """
+        stats = dict(extra) if extra else {}
+        stats.update(self.to_dict())
+        with open(file_name, 'w', encoding='utf-8') as fh:
+            json.dump(stats, fh, indent=2)
+        return stats
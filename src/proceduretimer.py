@@ -5,9 +5,21 @@ Author: David Rush <davidprush@gmail.com>
 License: MIT
     ProcedureTimer
         └──obj = ProcedureTimer(msg: str, optional) -> obj
+    SpanTimes
+        └──obj = SpanTimes() -> obj
+    SpanProfiler
+        └──obj = SpanProfiler() -> obj
+    PROFILER:=SpanProfiler, shared by the pipeline stages (disabled until
+        enable(), e.g. keycollator --timings, --trace-file)
 """
+import json
+import os
+import threading
 import time
 
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
 
 class ProcedureTimer:
     """
@@ -140,10 +152,7 @@ class ProcedureTimer:
         Creates a formatted str for console output.
         """
         self._t2s()
-        self.__fstr = "[{0}]seconds".format(
-            self._fspan
-        )
-        return self.__fstr
+        return f"[{self._fspan}]seconds"
 
     def stop_timer(self, *, msg="stop_timer"):
         """
@@ -165,9 +174,9 @@ class ProcedureTimer:
         Updates _toc and calculates _span
         """
         if not self._sflag:
-            self._tupdate
+            self._tupdate()
         self._t2s()
-        print("{0}:{1}".format(self._msg, self._ftstr()))
+        print(f"{self._msg}:{self._ftstr()}")
 
     def timestamp(self, as_str=False):
         """
@@ -181,8 +190,7 @@ class ProcedureTimer:
         self._tupdate()
         if as_str:
             return str(self._fspan)
-        else:
-            return self._tspan
+        return self._tspan
 
     def timestampstr(self):
         """
@@ -190,3 +198,508 @@ class ProcedureTimer:
         """
         self._tupdate()
         return self._ftstr()
+
+
+TRACE_FORMATS = ('chrome', 'flat')
+
+
+def clock() -> tuple:
+    """
+    Function: clock() -> tuple
+    -> tuple, (wall time, CPU time of the calling thread) in seconds
+    """
+    return time.perf_counter(), time.thread_time()
+
+
+class SpanTimes:
+    """
+    Class: SpanTimes
+        └──obj = SpanTimes() -> obj
+
+    Totals of short spans (e.g. the match tiers of a worker, the sanitizing
+    of each line) accumulated without locks by a single thread or process,
+    merged once into a SpanProfiler (SpanProfiler.merge)
+
+    ...
+
+    Attributes
+    ----------
+    _totals:=dict, key=>[span name]: str, item=>[calls, wall, cpu]: list
+
+    Methods
+    -------
+    split(name: str, since: tuple, [calls]: int, [exclude]: tuple) -> tuple:
+        Adds the time since since to name, returns clock()
+    spent(name: str) -> tuple: (wall, cpu) added to name
+    tally(name: str, func: callable) -> callable: func timed into name
+    iterate(name: str, iterable: iterable) -> generator: Items of iterable,
+        the time of each next() added to name
+    totals() -> dict: Totals by span name (picklable)
+    drain() -> dict: Totals by span name, then clears them
+    """
+
+    __slots__ = ('_totals',)
+
+    def __init__(self) -> None:
+        """
+        SpanTimes => Method:__init__ to instantiate class attributes
+            └──obj = SpanTimes() -> obj
+        """
+        self._totals = {}
+
+    def __len__(self) -> int:
+        return len(self._totals)
+
+    def split(self, name, since, calls=1, exclude=(0.0, 0.0)) -> tuple:
+        """
+        SpanTimes => Method: split(name: str, since: tuple, [calls]: int,
+                                   [exclude]: tuple) -> tuple
+        Adds the wall and CPU time elapsed since since (clock()), minus
+        exclude (time already added to another span), and calls to name
+        -> tuple, clock() now, the start of the next split
+        """
+        now = clock()
+        total = self._totals.get(name)
+        if total is None:
+            total = self._totals[name] = [0, 0.0, 0.0]
+        total[0] += calls
+        total[1] += now[0] - since[0] - exclude[0]
+        total[2] += now[1] - since[1] - exclude[1]
+        return now
+
+    def spent(self, name) -> tuple:
+        """
+        SpanTimes => Method: spent(name: str) -> tuple
+        -> tuple, (wall, cpu) added to name so far
+        """
+        total = self._totals.get(name)
+        return (total[1], total[2]) if total is not None else (0.0, 0.0)
+
+    def tally(self, name, func):
+        """
+        SpanTimes => Method: tally(name: str, func: callable) -> callable
+        -> callable, func adding the time of each of its calls to name
+        """
+        split = self.split
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            since = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                split(name, since)
+        return timed
+
+    def iterate(self, name, iterable):
+        """
+        SpanTimes => Method: iterate(name: str, iterable: iterable) -> generator
+        -> generator, the items of iterable, the time spent producing each
+        item is added to name
+        """
+        items = iter(iterable)
+        split = self.split
+        while True:
+            since = clock()
+            try:
+                item = next(items)
+            except StopIteration:
+                split(name, since, calls=0)
+                return
+            split(name, since)
+            yield item
+
+    def totals(self) -> dict:
+        """
+        SpanTimes => Method: totals() -> dict
+        -> dict, key=>[span name]: str, item=>[calls, wall, cpu]: list
+        """
+        return {name: list(total) for name, total in self._totals.items()}
+
+    def drain(self) -> dict:
+        """
+        SpanTimes => Method: drain() -> dict
+        -> dict, totals() then clears them (e.g. per work unit)
+        """
+        totals = self.totals()
+        self._totals.clear()
+        return totals
+
+
+class SpanProfiler:
+    """
+    Class: SpanProfiler
+        └──obj = SpanProfiler() -> obj
+
+    Hierarchical profiler of the pipeline stages: nested spans (context
+    manager or decorator, each timed by a ProcedureTimer) record the wall
+    time, the CPU time of their thread and their number of calls by path
+    (names of the enclosing spans), a span opened in a thread without open
+    spans nests in the innermost open span of the main thread (e.g. the
+    ingest threads), disabled spans cost a single test, when tracing each
+    span and each event (e.g. a work unit of a pool worker) is also kept
+    with its start, duration, process and thread id, exported as Chrome
+    Trace Event JSON (about://tracing, Perfetto) or flat JSON (write_trace)
+
+    ...
+
+    Attributes
+    ----------
+    _enabled:=bool, False until enable()
+    _spans:=dict, key=>[path]: tuple, item=>[calls, wall, cpu]: list, in
+        order of first opening
+    _local:=threading.local, stack of the open spans of each thread
+    _main:=list, stack of the open spans of the main thread
+    _lock:=threading.Lock, guards _spans and _events
+    _tracing:=bool, True to keep an event of each span and of event()
+    _events:=list, dict of each event (name, cat, start, dur, cpu, pid,
+        tid, thread, args), start and dur in seconds (time.perf_counter)
+
+    Methods
+    -------
+    enable([trace]: bool) -> None: Starts recording spans (and events)
+    disable() -> None: Stops recording spans
+    reset() -> None: Removes every span and event recorded
+    event(name: str, span: tuple, [cpu]: float, [args]: dict,
+          [cat]: str) -> None: Keeps an event (tracing)
+    drain_events() -> list: Events kept, then clears them
+    add_events(events: list) -> None: Keeps the events of another process
+    trace([fmt]: str) -> dict: Chrome Trace Event or flat JSON object
+    write_trace(file_name: str, [fmt]: str) -> dict: Writes trace(fmt)
+    span(name: str, [parent]: tuple) -> context manager: Times a span
+    timed([name]: str) -> decorator: Times every call of a function
+    path() -> tuple: Path of the innermost open span
+    record(path: tuple, wall: float, cpu: float, [calls]: int) -> None
+    merge(times: SpanTimes | dict, [parent]: tuple) -> None: Records the
+        totals of SpanTimes as children of parent
+    tree() -> list: (depth, name, calls, wall, cpu) of each span
+    echo_tree() -> None: Prints the tree of spans
+    """
+
+    def __init__(self) -> None:
+        """
+        SpanProfiler => Method:__init__ to instantiate class attributes
+            └──obj = SpanProfiler() -> obj
+        """
+        self._enabled = False
+        self._spans = {}
+        self._local = threading.local()
+        self._main = []
+        self._lock = threading.Lock()
+        self._tracing = False
+        self._events = []
+
+    @property
+    def enabled(self) -> bool:
+        """
+        SpanProfiler => Property: enabled() -> bool
+        -> bool, True if spans are recorded
+        """
+        return self._enabled
+
+    @property
+    def tracing(self) -> bool:
+        """
+        SpanProfiler => Property: tracing() -> bool
+        -> bool, True if events are kept (enable(trace=True))
+        """
+        return self._tracing
+
+    @property
+    def events(self) -> list:
+        """
+        SpanProfiler => Property: events() -> list
+        -> list, dict of each event kept, in order of completion
+        """
+        return self._events
+
+    @property
+    def spans(self) -> dict:
+        """
+        SpanProfiler => Property: spans() -> dict
+        -> dict, key=>[path]: tuple, item=>[calls, wall, cpu]: list
+        """
+        return self._spans
+
+    def enable(self, trace=False) -> None:
+        """
+        SpanProfiler => Method: enable([trace]: bool) -> None
+        Starts recording spans, with trace also keeps their events
+        """
+        self._enabled = True
+        self._tracing = self._tracing or trace
+
+    def disable(self) -> None:
+        """
+        SpanProfiler => Method: disable() -> None
+        """
+        self._enabled = False
+        self._tracing = False
+
+    def reset(self) -> None:
+        """
+        SpanProfiler => Method: reset() -> None
+        """
+        with self._lock:
+            self._spans = {}
+            self._events = []
+
+    def event(self, name, span, cpu=None, args=None, cat='worker') -> None:
+        """
+        SpanProfiler => Method: event(name: str, span: tuple, [cpu]: float,
+                                      [args]: dict, [cat]: str) -> None
+        Keeps an event of the calling thread and process over span, (start,
+        end) in time.perf_counter seconds, ignored unless tracing
+        """
+        if not self._tracing:
+            return
+        start, end = span
+        thread = threading.current_thread()
+        event = {
+            'name': name,
+            'cat': cat,
+            'start': start,
+            'dur': end - start,
+            'cpu': cpu,
+            'pid': os.getpid(),
+            'tid': threading.get_native_id(),
+            'thread': thread.name,
+            'args': args if args is not None else {},
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def drain_events(self) -> list:
+        """
+        SpanProfiler => Method: drain_events() -> list
+        -> list, events kept so far, then clears them (e.g. the events of
+        a work unit in a process pool worker)
+        """
+        with self._lock:
+            events = self._events
+            self._events = []
+        return events
+
+    def add_events(self, events) -> None:
+        """
+        SpanProfiler => Method: add_events(events: list) -> None
+        Keeps the events of another process (drain_events), the clock of
+        time.perf_counter is shared by the processes of the system
+        """
+        if self._tracing and events:
+            with self._lock:
+                self._events.extend(events)
+
+    def trace(self, fmt='chrome') -> dict:
+        """
+        SpanProfiler => Method: trace([fmt]: str) -> dict
+        fmt='chrome', Trace Event Format: a complete event ('X') of each
+            event in microseconds from the first event, with the process
+            and thread ids, and the name of each thread ('M' metadata)
+        fmt='flat', the spans (path, calls, wall, cpu) and the events in
+            seconds from the first event
+        -> dict, JSON serializable trace
+        """
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(
+                f"fmt must be one of {TRACE_FORMATS}")
+        with self._lock:
+            events = sorted(self._events, key=lambda e: e['start'])
+            spans = dict(self._spans)
+        origin = events[0]['start'] if events else 0.0
+        if fmt == 'flat':
+            return {
+                'spans': [
+                    {'path': '/'.join(path), 'calls': calls,
+                     'wall': wall, 'cpu': cpu}
+                    for path, (calls, wall, cpu) in spans.items()],
+                'events': [
+                    dict(event, start=event['start'] - origin)
+                    for event in events],
+            }
+        trace_events = []
+        threads = {}
+        for event in events:
+            args = dict(event['args'])
+            if event['cpu'] is not None:
+                args['cpu_ms'] = round(event['cpu'] * 1e3, 3)
+            trace_events.append({
+                'name': event['name'],
+                'cat': event['cat'],
+                'ph': 'X',
+                'ts': round((event['start'] - origin) * 1e6, 3),
+                'dur': round(event['dur'] * 1e6, 3),
+                'pid': event['pid'],
+                'tid': event['tid'],
+                'args': args,
+            })
+            threads[(event['pid'], event['tid'])] = event['thread']
+        for (pid, tid), name in threads.items():
+            trace_events.append({
+                'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                'args': {'name': name}})
+        for pid in sorted({pid for pid, _ in threads}):
+            trace_events.append({
+                'name': 'process_name', 'ph': 'M', 'pid': pid,
+                'args': {'name': 'keycollator' if pid == os.getpid()
+                         else f'worker {pid}'}})
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, file_name, fmt='chrome') -> dict:
+        """
+        SpanProfiler => Method: write_trace(file_name: str,
+                                            [fmt]: str) -> dict
+        Writes trace(fmt) to file_name as JSON
+        -> dict, trace written
+        """
+        trace = self.trace(fmt)
+        with open(file_name, 'w', encoding='utf-8') as fh:
+            json.dump(trace, fh)
+        return trace
+
+    def span(self, name, parent=None):
+        """
+        SpanProfiler => Method: span(name: str, [parent]: tuple)
+        Times the enclosed block as a child of parent (path), by default
+        of the innermost open span
+        -> context manager, yields the path of the span (None if disabled)
+        """
+        if not self._enabled:
+            return nullcontext()
+        return self._span(name, parent)
+
+    def timed(self, name=None):
+        """
+        SpanProfiler => Method: timed([name]: str) -> decorator
+        Times every call of the decorated function as a span name (the
+        qualified name of the function by default)
+        """
+        def decorate(func):
+            label = name if name is not None else func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(label):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def path(self) -> tuple:
+        """
+        SpanProfiler => Method: path() -> tuple
+        -> tuple, path of the innermost open span of this thread (or of
+        the main thread), () if none
+        """
+        stack = self._stack()
+        if stack:
+            return stack[-1]
+        return self._main[-1] if self._main else ()
+
+    def record(self, path, wall, cpu, calls=1) -> None:
+        """
+        SpanProfiler => Method: record(path: tuple, wall: float, cpu: float,
+                                       [calls]: int) -> None
+        Adds calls, wall and CPU seconds to the span path
+        """
+        with self._lock:
+            total = self._spans.get(path)
+            if total is None:
+                total = self._spans[path] = [0, 0.0, 0.0]
+            total[0] += calls
+            total[1] += wall
+            total[2] += cpu
+
+    def merge(self, times, parent=None) -> None:
+        """
+        SpanProfiler => Method: merge(times: SpanTimes | dict,
+                                      [parent]: tuple) -> None
+        Records the totals of times (SpanTimes or SpanTimes.totals() of
+        another process) as children of parent (innermost open span)
+        """
+        if not self._enabled:
+            return
+        parent = self.path() if parent is None else parent
+        totals = times.totals() if isinstance(times, SpanTimes) else times
+        for name, (calls, wall, cpu) in totals.items():
+            self.record(parent + (name,), wall, cpu, calls)
+
+    def tree(self) -> list:
+        """
+        SpanProfiler => Method: tree() -> list
+        Orders the spans depth first, children in order of first opening
+        -> list, (depth, name, calls, wall, cpu) of each span
+        """
+        with self._lock:
+            spans = dict(self._spans)
+        children = {}
+        for path in spans:
+            children.setdefault(path[:-1], []).append(path)
+        rows = []
+        todo = list(reversed(children.get((), [])))
+        while todo:
+            path = todo.pop()
+            calls, wall, cpu = spans[path]
+            rows.append((len(path) - 1, path[-1], calls, wall, cpu))
+            todo.extend(reversed(children.get(path, [])))
+        return rows
+
+    def echo_tree(self) -> None:
+        """
+        SpanProfiler => Method: echo_tree() -> None
+        Prints the tree of spans: wall and CPU seconds, share of the wall
+        time of the root span and calls
+        """
+        rows = self.tree()
+        if not rows:
+            return
+        width = max(4 * depth + len(name) for depth, name, *_ in rows) + 3
+        print(f"{'Span'.ljust(width)}{'Wall(s)':>10}{'CPU(s)':>10}{'%':>8}"
+              f"{'Calls':>10}")
+        root = 0.0
+        for depth, name, calls, wall, cpu in rows:
+            if depth == 0:
+                root = wall
+                label = name
+            else:
+                label = "    " * (depth - 1) + "└──" + name
+            share = 100.0 * wall / root if root else 0.0
+            print(f"{label.ljust(width)}{wall:>10.3f}{cpu:>10.3f}"
+                  f"{share:>8.1f}{calls:>10}")
+
+    @contextmanager
+    def _span(self, name, parent):
+        """
+        SpanProfiler => Method: _span(name: str, parent: tuple)
+        -> generator, context manager of span (see span)
+        """
+        stack = self._stack()
+        path = (self.path() if parent is None else parent) + (name,)
+        with self._lock:
+            self._spans.setdefault(path, [0, 0.0, 0.0])
+        stack.append(path)
+        timer = ProcedureTimer(msg=name)
+        cpu = time.thread_time()
+        try:
+            yield path
+        finally:
+            timer.stop_timer(msg=name)
+            stack.pop()
+            cpu = time.thread_time() - cpu
+            self.record(path, timer.tspan, cpu)
+            self.event(name, (timer.tic, timer.toc), cpu,
+                       {'path': '/'.join(path)}, cat='span')
+
+    def _stack(self) -> list:
+        """
+        SpanProfiler => Method: _stack() -> list
+        -> list, stack of the open spans of this thread
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = \
+                self._main if threading.current_thread() is \
+                threading.main_thread() else []
+        return stack
+
+
+PROFILER = SpanProfiler()
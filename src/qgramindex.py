@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Class: QGramIndex
+        └──obj = QGramIndex(items: iterable, [q]: int, optional) -> obj
+
+q-gram index over a list of strings, prefilter for fuzz.partial_ratio:
+returns only the items sharing enough q-grams with a query to possibly
+reach a fuzz ratio, so fuzzy scoring runs on those candidates only
+
+partial_ratio(s1, s2) scores the shorter string S (s1 on ties, length m)
+against windows W (len(W) <= m) of the longer one with
+Levenshtein.ratio = 2 * LCS / (m + len(W)) (rounded to an int), a score of
+at least fuzz implies ratio >= (fuzz - 0.5) / 100 and an indel distance
+D <= 2 * m * (1 - ratio). Each indel destroys at most q of the m - q + 1
+q-grams of S, so at least m - q + 1 - q * D q-grams of S appear in the
+longer string, items below that count cannot reach fuzz (no false negative)
+"""
+import math
+
+from array import array
+from collections import Counter, defaultdict
+
+import constants as const
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+
+def qgrams(text, q=const.QGRAM) -> Counter:
+    """
+    Function: qgrams(text: str, [q]: int, optional) -> Counter
+    -> Counter, key=>[q-gram]: str, item=>[occurrences in text]: int
+    """
+    return Counter(text[i:i + q] for i in range(len(text) - q + 1))
+
+
+def min_shared_qgrams(length, fuzz_ratio, q=const.QGRAM) -> int:
+    """
+    Function: min_shared_qgrams(length: int, fuzz_ratio: int,
+                                [q]: int, optional) -> int
+    length:=int, length of the shorter string of the pair
+    -> int, minimum number of q-grams of the shorter string found in the
+    longer one for partial_ratio to reach fuzz_ratio (<= 0, no pruning)
+    """
+    if fuzz_ratio <= 0:
+        return 0
+    min_ratio = (fuzz_ratio - 0.5) / 100
+    max_indel = math.floor(2 * length * (1 - min_ratio) + 1e-9)
+    return length - q + 1 - q * max_indel
+
+
+class QGramIndex:
+    """
+    Class: QGramIndex
+        └──obj = QGramIndex(items: iterable, [q]: int, optional) -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _q:=int, length of the q-grams
+    _postings:=dict, key=>[q-gram]: str,
+        item=>[(ids, multiplicities)]: (array('i'), array('i'))
+    _lengths:=array('i'), length of each item, the position is the item id
+    _by_length:=dict, key=>[length]: int, item=>[ids]: list
+    _need:=dict, key=>[(length, fuzz_ratio)], item=>[min_shared_qgrams]
+
+    Methods
+    -------
+    candidates(query: str, fuzz_ratio: int, [query_first]: bool) -> list:
+        Ids of the items that may reach fuzz_ratio with query
+
+    Parameters
+    ----------
+    items:=iterable, strings to index, ids follow the iteration order
+    q:=int, length of the q-grams, default=const.QGRAM
+    """
+
+    def __init__(self, items, q=const.QGRAM) -> None:
+        """
+        QGramIndex => Method:__init__ to instantiate class attributes
+            └──obj = QGramIndex(items: iterable, [q]: int, optional) -> obj
+        """
+        self._q = q
+        self._lengths = array('i')
+        self._by_length = defaultdict(list)
+        self._need = {}
+        postings = {}
+        for iid, item in enumerate(items):
+            self._lengths.append(len(item))
+            self._by_length[len(item)].append(iid)
+            for gram, count in qgrams(item, q).items():
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = (array('i'), array('i'))
+                posting[0].append(iid)
+                posting[1].append(count)
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    @property
+    def q(self) -> int:
+        """
+        QGramIndex => Property: q() -> int
+        -> int, length of the q-grams
+        """
+        return self._q
+
+    def _min_shared(self, length, fuzz_ratio) -> int:
+        """
+        QGramIndex => Method: _min_shared(length: int, fuzz_ratio: int) -> int
+        -> int, min_shared_qgrams(length, fuzz_ratio), memoized
+        """
+        need = self._need.get((length, fuzz_ratio))
+        if need is None:
+            need = self._need[(length, fuzz_ratio)] = \
+                min_shared_qgrams(length, fuzz_ratio, self._q)
+        return need
+
+    def candidates(self, query, fuzz_ratio, query_first=True) -> list:
+        """
+        QGramIndex => Method: candidates(query: str, fuzz_ratio: int,
+                                         [query_first]: bool) -> list
+        query_first:=bool, True if query is the first argument given to
+            fuzz.partial_ratio (decides the shorter string on equal lengths)
+        -> list, sorted ids of the items that may score >= fuzz_ratio with
+        query, every item outside the list scores below fuzz_ratio
+        """
+        if fuzz_ratio <= 0:
+            return list(range(len(self._lengths)))
+        size = len(query)
+        item_shared = defaultdict(int)
+        query_shared = defaultdict(int)
+        for gram, count in qgrams(query, self._q).items():
+            for iid, icount in zip(*self._postings.get(gram, ((), ()))):
+                item_shared[iid] += icount
+                query_shared[iid] += count
+        found = []
+        for iid, shared in item_shared.items():
+            length = self._lengths[iid]
+            if size < length or (size == length and query_first):
+                if query_shared[iid] >= self._min_shared(size, fuzz_ratio):
+                    found.append(iid)
+            elif shared >= self._min_shared(length, fuzz_ratio):
+                found.append(iid)
+        for length, iids in self._by_length.items():
+            if self._min_shared(min(size, length), fuzz_ratio) <= 0:
+                found.extend(iid for iid in iids if iid not in item_shared)
+        found.sort()
+        return found
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Function: content_digest(corpus: TextCorpus, [counts]: iterable) -> str
+    Class: ResultCache
+        └──obj = ResultCache([directory]: str, [max_bytes]: int,
+                             optional) -> obj
+
+Persistent cache of match results (keys_found) on disk, one joblib file per
+entry named by the sha256 of its key parts (e.g. the content digests of the
+text and of the keys, the fuzz ratio and the matching version), the least
+recently used entries (file mtime, refreshed on every hit) are evicted once
+the entries exceed max_bytes
+"""
+import hashlib
+import json
+import os
+import pickle
+import struct
+import zlib
+
+from array import array
+
+import joblib
+
+import constants as const
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+ENTRY = '.z'
+# errors of joblib.load on a truncated, corrupt or incompatible file
+LOAD_ERRORS = (
+    OSError, EOFError, ValueError, TypeError, LookupError, AttributeError,
+    ImportError, struct.error, zlib.error, pickle.UnpicklingError)
+
+
+def content_digest(corpus, counts=None) -> str:
+    """
+    Function: content_digest(corpus: TextCorpus, [counts]: iterable) -> str
+    -> str, sha256 (hex) of the packed lines and offsets of corpus, and of
+    counts (occurrences of each line) if given
+    """
+    digest = hashlib.sha256(corpus.buffer)
+    digest.update(array('q', corpus.offsets).tobytes())
+    if counts is not None:
+        digest.update(array('q', counts).tobytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Class: ResultCache
+        └──obj = ResultCache([directory]: str, [max_bytes]: int,
+                             optional) -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _directory:=str, directory of the entries
+    _max_bytes:=int, size bound of the entries (least recently used evicted)
+    _hits:=int, entries found by get
+    _misses:=int, entries missing in get
+
+    Methods
+    -------
+    key(*parts) -> str: Name of the entry of parts (JSON serializable)
+    get(key: str) -> object: Value of the entry (None if missing)
+    put(key: str, value: object) -> None: Stores the entry, evicts
+    clear() -> int: Removes every entry
+
+    Parameters
+    ----------
+    directory:=str, directory of the entries, default=CACHE_DIR
+    max_bytes:=int, size bound of the entries, default=CACHE_BYTES
+    """
+
+    def __init__(
+        self,
+        directory=const.CACHE_DIR,
+        max_bytes=const.CACHE_BYTES
+    ) -> None:
+        """
+        ResultCache => Method:__init__ to instantiate class attributes
+            └──obj = ResultCache([directory]: str, [max_bytes]: int,
+                                 optional) -> obj
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}(directory={self._directory}, '
+                f'max_bytes={self._max_bytes})')
+
+    @property
+    def directory(self) -> str:
+        """
+        ResultCache => Property: directory() -> str
+        -> str, directory of the entries
+        """
+        return self._directory
+
+    @property
+    def hits(self) -> int:
+        """
+        ResultCache => Property: hits() -> int
+        -> int, entries found by get
+        """
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """
+        ResultCache => Property: misses() -> int
+        -> int, entries missing in get
+        """
+        return self._misses
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        ResultCache => Method: key(*parts) -> str
+        -> str, sha256 (hex) of parts (JSON serializable), name of the entry
+        """
+        return hashlib.sha256(
+            json.dumps(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        ResultCache => Method: get(key: str) -> object
+        Loads the entry key and marks it as the most recently used, an
+        unreadable entry is removed
+        -> object, value of the entry, None if missing
+        """
+        path = self._path(key)
+        try:
+            value = joblib.load(path)
+            os.utime(path)
+        except FileNotFoundError:
+            self._misses += 1
+            return None
+        except LOAD_ERRORS:
+            self._misses += 1
+            self._remove(path)
+            return None
+        self._hits += 1
+        return value
+
+    def put(self, key, value) -> None:
+        """
+        ResultCache => Method: put(key: str, value: object) -> None
+        Stores value as the entry key (replaced atomically) then evicts the
+        least recently used entries beyond max_bytes
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        path = self._path(key)
+        temp = f'{path}.{os.getpid()}.tmp'
+        joblib.dump(value, temp)
+        os.replace(temp, path)
+        self._evict()
+
+    def clear(self) -> int:
+        """
+        ResultCache => Method: clear() -> int
+        -> int, number of entries removed
+        """
+        entries = self._entries()
+        for _, _, path in entries:
+            self._remove(path)
+        return len(entries)
+
+    def _path(self, key) -> str:
+        """
+        ResultCache => Method: _path(key: str) -> str
+        -> str, path of the entry key
+        """
+        return os.path.join(self._directory, key + ENTRY)
+
+    def _entries(self) -> list:
+        """
+        ResultCache => Method: _entries() -> list
+        -> list, (mtime, size, path) of each entry, least recently used first
+        """
+        entries = []
+        try:
+            with os.scandir(self._directory) as scan:
+                for entry in scan:
+                    if entry.name.endswith(ENTRY) and entry.is_file():
+                        stat = entry.stat()
+                        entries.append(
+                            (stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return []
+        return sorted(entries)
+
+    def _evict(self) -> None:
+        """
+        ResultCache => Method: _evict() -> None
+        Removes the least recently used entries until the entries fit in
+        max_bytes (the most recent entry is always kept)
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries[:-1]:
+            if total <= self._max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path) -> None:
+        """
+        ResultCache => Method: _remove(path: str) -> None
+        Removes path, ignores an entry already removed (concurrent runs)
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Function: select_keys(counts: dict, [limit]: int, [lbound]: int,
+                          [ubound]: int) -> dict
+
+Result selection of a run (keys_found): the keys with counts outside the
+lower/upper boundaries are skipped while the counts are read, the keys left
+are sorted once by count (descending), with a limit only the top limit keys
+are kept in a bounded heap (heapq.nlargest, O(n log limit)) so the whole
+result set is never sorted
+"""
+import heapq
+
+from operator import itemgetter
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+
+def select_keys(counts, limit=None, lbound=None, ubound=None) -> dict:
+    """
+    Function: select_keys(counts: dict, [limit]: int, [lbound]: int,
+                          [ubound]: int) -> dict
+    Keeps the keys of counts with lbound <= count <= ubound (a boundary of
+    None is not applied), the top limit keys when limit is set, keys with
+    equal counts keep the order of counts
+    -> dict, key=>[key]: str, item=>[count]: int, by count descending
+    """
+    items = counts.items()
+    if lbound is not None or ubound is not None:
+        items = (
+            (key, count) for key, count in items
+            if (lbound is None or count >= lbound)
+            and (ubound is None or count <= ubound))
+    if limit is not None:
+        return dict(heapq.nlargest(limit, items, key=itemgetter(1)))
+    return dict(sorted(items, key=itemgetter(1), reverse=True))
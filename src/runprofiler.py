@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Class: RunProfiler
+        └──obj = RunProfiler() -> obj
+    RUN_PROFILER:=RunProfiler, shared by the pipeline stages (disabled until
+        enable(), e.g. keycollator --profile)
+
+Deterministic profile (cProfile) and allocation sites (tracemalloc) of each
+stage of a run (itemize_file, keys2text_find, results2file and main, the
+rest of the run): a stage gets its own cProfile.Profile in the thread
+running it (the profile of an enclosing stage of the thread is paused, so
+the stages do not overlap), the pool threads of a stage add to its profile,
+the allocations of a stage are the growth of the traced memory between a
+snapshot at its start and at its end (every thread), a disabled profiler
+costs a single test per stage
+"""
+import cProfile
+import linecache
+import os
+import pstats
+import threading
+import tracemalloc
+
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+PROFILE_SUFFIX = '.prof'
+REPORT = 'profile.txt'
+RUN = 'keycollator'
+TOP_FUNCTIONS = 30
+TOP_STAGE_FUNCTIONS = 15
+TOP_ALLOCATIONS = 10
+TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class RunProfiler:
+    """
+    Class: RunProfiler
+        └──obj = RunProfiler() -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _enabled:=bool, False until enable()
+    _tracing:=bool, True if enable() started tracemalloc
+    _profiles:=dict, key=>[stage]: str, item=>[cProfile.Profile]: list
+    _allocations:=dict, key=>[stage]: str, item=>dict, key=>[site]: str,
+        item=>[size, count]: list, memory grown by each allocation site
+    _calls:=dict, key=>[stage]: str, item=>[profiles]: int, calls of the
+        stage and its pool threads
+    _local:=threading.local, stack of the profiles of the stages open in
+        the thread
+    _lock:=threading.Lock, guards _profiles, _allocations and _calls
+
+    Methods
+    -------
+    enable() -> None: Starts profiling the stages (and tracemalloc)
+    disable() -> None: Stops profiling, stops tracemalloc if started here
+    reset() -> None: Removes every profile and allocation recorded
+    stage(name: str, [allocations]: bool): Context manager, profiles the
+        block as the stage name
+    profiled([name]: str, [allocations]: bool) -> decorator: Profiles
+        every call as a stage
+    stats([name]: str) -> pstats.Stats: Profile of a stage (or the run)
+    top_allocations(name: str, [limit]: int) -> list: Allocation sites
+    write(directory: str) -> list: .prof files and the report
+    """
+
+    def __init__(self) -> None:
+        """
+        RunProfiler => Method:__init__ to instantiate class attributes
+            └──obj = RunProfiler() -> obj
+        """
+        self._enabled = False
+        self._tracing = False
+        self._profiles = {}
+        self._allocations = {}
+        self._calls = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}(enabled={self._enabled}, '
+                f'stages={list(self._profiles)})')
+
+    @property
+    def enabled(self) -> bool:
+        """
+        RunProfiler => Property: enabled() -> bool
+        -> bool, True if the stages are profiled
+        """
+        return self._enabled
+
+    @property
+    def stages(self) -> list:
+        """
+        RunProfiler => Property: stages() -> list
+        -> list, stages profiled, in order of their first completion
+        """
+        with self._lock:
+            return [name for name, profiles in self._profiles.items()
+                    if profiles]
+
+    def enable(self) -> None:
+        """
+        RunProfiler => Method: enable() -> None
+        Starts profiling the stages and tracing the allocations (unless
+        tracemalloc is already tracing)
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._enabled = True
+
+    def disable(self) -> None:
+        """
+        RunProfiler => Method: disable() -> None
+        """
+        self._enabled = False
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def reset(self) -> None:
+        """
+        RunProfiler => Method: reset() -> None
+        """
+        with self._lock:
+            self._profiles = {}
+            self._allocations = {}
+            self._calls = {}
+
+    def stage(self, name, allocations=True):
+        """
+        RunProfiler => Method: stage(name: str, [allocations]: bool)
+        Profiles the enclosed block as the stage name, with allocations
+        the growth of the traced memory of the block is recorded (False
+        for the pool threads of a stage, already in the snapshots of the
+        stage)
+        -> context manager
+        """
+        if not self._enabled:
+            return nullcontext()
+        return self._stage(name, allocations)
+
+    def profiled(self, name=None, allocations=True):
+        """
+        RunProfiler => Method: profiled([name]: str,
+                                        [allocations]: bool) -> decorator
+        Profiles every call of the decorated function as the stage name
+        (the name of the function by default)
+        """
+        def decorate(func):
+            label = name if name is not None else func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(label, allocations):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def stats(self, name=None) -> pstats.Stats:
+        """
+        RunProfiler => Method: stats([name]: str) -> pstats.Stats
+        -> pstats.Stats, profiles of every call of the stage name (of
+        every stage if None), None if nothing was profiled
+        """
+        with self._lock:
+            if name is None:
+                profiles = [p for ps in self._profiles.values() for p in ps]
+            else:
+                profiles = list(self._profiles.get(name, ()))
+        if not profiles:
+            return None
+        return pstats.Stats(*profiles)
+
+    def top_allocations(self, name, limit=TOP_ALLOCATIONS) -> list:
+        """
+        RunProfiler => Method: top_allocations(name: str,
+                                               [limit]: int) -> list
+        -> list, (site, size, count) of the limit allocation sites that
+        grew the traced memory the most during the stage name
+        """
+        with self._lock:
+            sites = dict(self._allocations.get(name, {}))
+        top = sorted(sites.items(), key=lambda site: site[1][0], reverse=True)
+        return [(site, size, count) for site, (size, count) in top[:limit]
+                if size > 0]
+
+    def write(self, directory) -> list:
+        """
+        RunProfiler => Method: write(directory: str) -> list
+        Writes the profile of each stage (stage.prof) and of the whole run
+        (RUN.prof), loadable by pstats or snakeviz, and the report (REPORT):
+        the hot functions of the run by cumulative and by own time, then
+        the hot functions and top allocation sites of each stage
+        -> list, paths written
+        """
+        os.makedirs(directory, exist_ok=True)
+        written = []
+        run = self.stats()
+        if run is None:
+            return written
+        path = os.path.join(directory, RUN + PROFILE_SUFFIX)
+        run.dump_stats(path)
+        written.append(path)
+        for name in self.stages:
+            path = os.path.join(directory, name + PROFILE_SUFFIX)
+            self.stats(name).dump_stats(path)
+            written.append(path)
+        path = os.path.join(directory, REPORT)
+        with open(path, 'w', encoding='utf-8') as fh:
+            self._report(fh)
+        written.append(path)
+        return written
+
+    def _report(self, fh) -> None:
+        """
+        RunProfiler => Method: _report(fh: file) -> None
+        Writes the report of the run and of each stage to fh
+        """
+        run = self.stats()
+        run.stream = fh
+        fh.write("Run: hot functions by cumulative time\n")
+        run.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        fh.write("Run: hot functions by own time\n")
+        run.sort_stats('tottime').print_stats(TOP_FUNCTIONS)
+        for name in self.stages:
+            stats = self.stats(name)
+            stats.stream = fh
+            fh.write(f"{'=' * 79}\nStage: {name} ({self._calls.get(name, 0)} "
+                     "profiles, pool threads included)\n")
+            stats.sort_stats('tottime').print_stats(TOP_STAGE_FUNCTIONS)
+            sites = self.top_allocations(name)
+            fh.write(f"Stage: {name} top allocation sites\n")
+            if not sites:
+                fh.write("    (none traced)\n")
+            for site, size, count in sites:
+                filename, lineno = site.rsplit(':', 1)
+                line = linecache.getline(filename, int(lineno)).strip()
+                fh.write(f"{size / 1024:>12.1f} KiB {count:>10} blocks  "
+                         f"{site}\n{' ' * 16}{line}\n")
+            fh.write("\n")
+
+    def _stack(self) -> list:
+        """
+        RunProfiler => Method: _stack() -> list
+        -> list, profiles of the stages open in the calling thread
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def _stage(self, name, allocations):
+        """
+        RunProfiler => Method: _stage(name: str, allocations: bool)
+        Pauses the profile of the enclosing stage of the thread, profiles
+        the block (a profile that can not be enabled, e.g. another tool
+        profiling every thread, leaves the block to that tool) and records
+        the allocation sites grown during the block
+        """
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        if parent is not None:
+            parent.disable()
+        before = self._snapshot() if allocations else None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            profile = None
+        stack.append(profile)
+        try:
+            yield profile
+        finally:
+            stack.pop()
+            if profile is not None:
+                profile.disable()
+            after = self._snapshot() if before is not None else None
+            self._record(name, profile, before, after)
+            if parent is not None:
+                parent.enable()
+
+    @staticmethod
+    def _snapshot():
+        """
+        RunProfiler => Method: _snapshot() -> tracemalloc.Snapshot
+        -> tracemalloc.Snapshot, traced memory without the frames of the
+        profiler and of the imports, None unless tracemalloc is tracing
+        """
+        if not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.take_snapshot().filter_traces(TRACE_FILTERS)
+
+    def _record(self, name, profile, before, after) -> None:
+        """
+        RunProfiler => Method: _record(name: str, profile: cProfile.Profile,
+                                       before: tracemalloc.Snapshot,
+                                       after: tracemalloc.Snapshot) -> None
+        Adds the profile and the allocation sites of a call of the stage
+        """
+        sites = []
+        if before is not None and after is not None:
+            for diff in after.compare_to(before, 'lineno'):
+                if diff.size_diff > 0:
+                    frame = diff.traceback[0]
+                    sites.append((
+                        f'{frame.filename}:{frame.lineno}',
+                        diff.size_diff, diff.count_diff))
+        with self._lock:
+            self._calls[name] = self._calls.get(name, 0) + 1
+            profiles = self._profiles.setdefault(name, [])
+            if profile is not None:
+                profiles.append(profile)
+            grown = self._allocations.setdefault(name, {})
+            for site, size, count in sites:
+                totals = grown.setdefault(site, [0, 0])
+                totals[0] += size
+                totals[1] += count
+
+
+RUN_PROFILER = RunProfiler()
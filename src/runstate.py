@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Function: span_digest(file_name: str, end: int) -> str
+    Class: IncrementalState
+        └──obj = IncrementalState(file_name: str, params: str) -> obj
+
+State of the last incremental run over an append-only text file (e.g. a
+log): the byte offset reached and the matches (keys_found) of the file up
+to that offset, stored next to the file (STATE_SUFFIX), the next run only
+itemizes and matches the lines appended after the offset then adds the
+stored counts, a file truncated or rewritten since (size below the offset,
+digest of its start changed) or other matching options fall back to a full
+run
+"""
+import hashlib
+import os
+
+import joblib
+
+import constants as const
+
+from resultcache import LOAD_ERRORS
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+STATE_VERSION = 1
+PROBE = 1 << 16
+
+
+def span_digest(file_name, end) -> str:
+    """
+    Function: span_digest(file_name: str, end: int) -> str
+    -> str, sha256 (hex) of end and of the first and last PROBE bytes of
+    the byte range 0:end of the file (a rewrite of the start of the file
+    changes it without reading the whole range)
+    """
+    digest = hashlib.sha256(str(end).encode('utf-8'))
+    with open(file_name, 'rb') as fh:
+        digest.update(fh.read(min(end, PROBE)))
+        if end > PROBE:
+            fh.seek(max(PROBE, end - PROBE))
+            digest.update(fh.read(end - fh.tell()))
+    return digest.hexdigest()
+
+
+class IncrementalState:
+    """
+    Class: IncrementalState
+        └──obj = IncrementalState(file_name: str, params: str) -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _filename:=str, text file of the runs
+    _path:=str, path of the state (file_name + STATE_SUFFIX)
+    _params:=str, digest of the matching options (keys, fuzz ratio, ...)
+    _offset:=int, byte offset reached by the last run (0 is a full run)
+    _counts:=dict, key=>[key]: str, item=>[count]: int, matches of the
+        file up to _offset
+
+    Methods
+    -------
+    load() -> int: Byte offset to resume from (0 for a full run)
+    save(end: int, counts: dict) -> None: Stores the offset and counts
+
+    Parameters
+    ----------
+    file_name:=str, text file of the runs (append-only)
+    params:=str, digest of the matching options, a state saved with other
+        params is ignored
+    """
+
+    def __init__(self, file_name, params) -> None:
+        """
+        IncrementalState => Method:__init__ to instantiate class attributes
+            └──obj = IncrementalState(file_name: str, params: str) -> obj
+        """
+        self._filename = file_name
+        self._path = file_name + const.STATE_SUFFIX
+        self._params = params
+        self._offset = 0
+        self._counts = {}
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}(file_name={self._filename}, '
+                f'offset={self._offset})')
+
+    @property
+    def path(self) -> str:
+        """
+        IncrementalState => Property: path() -> str
+        -> str, path of the state
+        """
+        return self._path
+
+    @property
+    def offset(self) -> int:
+        """
+        IncrementalState => Property: offset() -> int
+        -> int, byte offset reached by the last run
+        """
+        return self._offset
+
+    @property
+    def counts(self) -> dict:
+        """
+        IncrementalState => Property: counts() -> dict
+        -> dict, matches of the file up to offset
+        """
+        return self._counts
+
+    def load(self) -> int:
+        """
+        IncrementalState => Method: load() -> int
+        Reads the state of the last run, falls back to a full run (offset
+        0, no counts) when it is missing or unreadable, was saved with
+        other params, or the file was truncated, rewritten or its last
+        line (without an end line) was extended since
+        -> int, byte offset to resume from
+        """
+        self._offset = 0
+        self._counts = {}
+        try:
+            state = joblib.load(self._path)
+        except FileNotFoundError:
+            print(f"No previous run of: {self._filename}, full run")
+            return 0
+        except LOAD_ERRORS:
+            print(f"The state: {self._path} is unreadable, full run")
+            return 0
+        size = os.path.getsize(self._filename)
+        if not isinstance(state, dict) or \
+                state.get('version') != STATE_VERSION or \
+                state.get('source') != os.path.abspath(self._filename) or \
+                state.get('params') != self._params:
+            reason = "was saved with other options"
+        elif size < state['offset']:
+            reason = "is past the end of the file (truncated)"
+        elif state['partial'] and size > state['offset']:
+            reason = "ends in a line extended since"
+        elif span_digest(self._filename, state['offset']) != state['digest']:
+            reason = "does not match the file (rewritten)"
+        else:
+            self._offset = state['offset']
+            self._counts = state['counts']
+            return self._offset
+        print(f"The state: {self._path} {reason}, full run")
+        return 0
+
+    def save(self, end, counts) -> None:
+        """
+        IncrementalState => Method: save(end: int, counts: dict) -> None
+        Stores end (byte offset reached) and counts (matches of the file up
+        to end), replaced atomically, notes a last line without an end line
+        """
+        partial = False
+        if end:
+            with open(self._filename, 'rb') as fh:
+                fh.seek(end - 1)
+                partial = fh.read(1) != b'\n'
+        state = {
+            'version': STATE_VERSION,
+            'source': os.path.abspath(self._filename),
+            'params': self._params,
+            'offset': end,
+            'partial': partial,
+            'digest': span_digest(self._filename, end),
+            'counts': dict(counts),
+        }
+        temp = f'{self._path}.{os.getpid()}.tmp'
+        joblib.dump(state, temp)
+        os.replace(temp, self._path)
+        self._offset = end
+        self._counts = state['counts']
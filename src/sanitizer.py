@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Function: sanitize(text: str) -> str
+    Function: sanitize_buffer(buffer: bytes | str) -> list
+
+Compiled text sanitizer: converts to lower case, collapses runs of spaces
+to a single space, then removes end lines and punctuation, the translation
+tables and the whitespace pattern are built once at import
+
+sanitize_buffer cleans a whole buffer of end line terminated lines at once
+(bytes fast path for ASCII-only buffers) then splits it into lines, runs of
+spaces never span an end line so the result equals sanitize on each line,
+'\\r\\n' and '\\r' end lines are read as '\\n' like a file opened in text
+mode
+"""
+import re
+import string
+
+import constants as const
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+ENCODING = 'utf-8'
+
+_SPACES = re.compile(' {2,}')
+_DELETE = str.maketrans('', '', string.punctuation + const.LINE)
+_PUNCTUATION = str.maketrans('', '', string.punctuation)
+_BSPACES = re.compile(b' {2,}')
+_BPUNCTUATION = string.punctuation.encode('ascii')
+_BLINE = const.LINE.encode('ascii')
+
+
+def sanitize(text) -> str:
+    """
+    Function: sanitize(text: str) -> str
+    -> str, text in lower case, runs of spaces collapsed, without end
+    lines nor punctuation (None if text is None)
+    """
+    if text is None:
+        return None
+    return _SPACES.sub(' ', text.lower()).translate(_DELETE)
+
+
+def sanitize_buffer(buffer) -> list:
+    """
+    Function: sanitize_buffer(buffer: bytes | str) -> list
+    Sanitizes every line of buffer in one pass, bytes are decoded as utf-8
+    (ASCII-only bytes stay bytes until the final split), '\\r\\n' and
+    '\\r' are read as end lines like a file opened in text mode
+    -> list, sanitized lines of buffer, in order (a final end line does not
+    start a new line)
+    """
+    if not buffer:
+        return []
+    if isinstance(buffer, (bytes, bytearray, memoryview)):
+        buffer = bytes(buffer).replace(b'\r\n', _BLINE).replace(
+            b'\r', _BLINE)
+        if buffer.isascii():
+            lines = _BSPACES.sub(b' ', buffer.lower()).translate(
+                None, _BPUNCTUATION).decode('ascii').split(const.LINE)
+            if buffer.endswith(_BLINE):
+                lines.pop()
+            return lines
+        buffer = str(buffer, ENCODING, 'replace')
+    else:
+        buffer = buffer.replace('\r\n', const.LINE).replace(
+            '\r', const.LINE)
+    lines = _SPACES.sub(' ', buffer.lower()).translate(
+        _PUNCTUATION).split(const.LINE)
+    if buffer.endswith(const.LINE):
+        lines.pop()
+    return lines
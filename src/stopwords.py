@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Class: StopWords
+        └──obj = StopWords([words]: iterable, [files]: iterable,
+                           [cache]: ResultCache, optional) -> obj
+
+Stopword engine: compiles stop words (e.g. constants.STOP_WORDS) plus the
+words of optional stopword files (one word per line, '#' comments) into a
+frozenset of sanitized words, membership costs the same for 10 or 10k+
+stop words, the compiled set is cached per process (keyed by the words and
+the path, size and mtime of each file) so it is sanitized once per run of
+the same list, with a ResultCache the words compiled from files are also
+stored on disk (CACHE_DIR) so the next runs skip reading and sanitizing
+the files until one changes, lines are filtered in bulk by pop_lines
+"""
+import hashlib
+import os
+
+import constants as const
+
+from sanitizer import sanitize
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+COMMENT = '#'
+STOPWORDS_VERSION = 1
+
+_COMPILED = {}
+
+
+def read_stopwords_file(file_name) -> list:
+    """
+    Function: read_stopwords_file(file_name: str) -> list
+    -> list, words of the file (one per line), blank lines and lines
+    starting with '#' are skipped
+    """
+    with open(file_name, 'r', encoding='utf-8') as fh:
+        return [
+            line.strip() for line in fh
+            if line.strip() and not line.lstrip().startswith(COMMENT)
+        ]
+
+
+def compile_stopwords(words=(), files=(), cache=None) -> frozenset:
+    """
+    Function: compile_stopwords([words]: iterable, [files]: iterable,
+                                [cache]: ResultCache) -> frozenset
+    Sanitizes words plus the words of each file, the result is cached
+    until a file changes (size or mtime), per process and, with cache and
+    files, on disk (entry keyed by the sha1 of words and the path, size
+    and mtime of each file, the words are stored joined by end lines)
+    -> frozenset, sanitized stop words
+    """
+    words = tuple(str(word) for word in words)
+    files = tuple(files)
+    stamps = []
+    for file_name in files:
+        stat = os.stat(file_name)
+        stamps.append(
+            (os.path.abspath(file_name), stat.st_size, stat.st_mtime_ns))
+    key = (words, tuple(stamps))
+    compiled = _COMPILED.get(key)
+    if compiled is not None:
+        return compiled
+    entry = None
+    if cache is not None and files:
+        entry = cache.key(
+            STOPWORDS_VERSION,
+            hashlib.sha1(const.LINE.join(words).encode('utf-8')).hexdigest(),
+            stamps)
+        stored = cache.get(entry)
+        if isinstance(stored, tuple) and len(stored) == 2:
+            compiled = frozenset(
+                stored[1].split(const.LINE) if stored[0] else ())
+    if compiled is None:
+        found = list(words)
+        for file_name in files:
+            found.extend(read_stopwords_file(file_name))
+        compiled = frozenset(sanitize(w) for w in found)
+        if entry is not None:
+            cache.put(entry, (len(compiled), const.LINE.join(compiled)))
+    _COMPILED[key] = compiled
+    return compiled
+
+
+class StopWords:
+    """
+    Class: StopWords
+        └──obj = StopWords([words]: iterable, [files]: iterable,
+                           [cache]: ResultCache, optional) -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _words:=frozenset, sanitized stop words
+    _files:=tuple, stopword files compiled into _words
+
+    Methods
+    -------
+    pop(text: str) -> str: Removes the stop words of text
+    pop_lines(lines: iterable) -> list: Removes the stop words of each line
+    filter(tokens: iterable) -> list: Tokens that are not stop words
+
+    Parameters
+    ----------
+    words:=iterable, stop words, default=()
+    files:=iterable, paths of stopword files (one word per line), default=()
+    cache:=ResultCache, keeps the words compiled from files on disk for
+        the next runs, default=None (cached per process only)
+    """
+
+    __slots__ = ('_words', '_files')
+
+    def __init__(self, words=(), files=(), cache=None) -> None:
+        """
+        StopWords => Method:__init__ to instantiate class attributes
+            └──obj = StopWords([words]: iterable, [files]: iterable,
+                               [cache]: ResultCache, optional) -> obj
+        """
+        self._files = tuple(files) if files else ()
+        self._words = compile_stopwords(words or (), self._files, cache)
+
+    def __getstate__(self) -> tuple:
+        return self._words, self._files
+
+    def __setstate__(self, state) -> None:
+        # unpickling restores the compiled words, no file is read
+        self._words, self._files = state
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word) -> bool:
+        return word in self._words
+
+    def __iter__(self):
+        return iter(sorted(self._words))
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}(words={len(self)}, '
+                f'files={self._files})')
+
+    @property
+    def words(self) -> frozenset:
+        """
+        StopWords => Property: words() -> frozenset
+        -> frozenset, sanitized stop words
+        """
+        return self._words
+
+    @property
+    def files(self) -> tuple:
+        """
+        StopWords => Property: files() -> tuple
+        -> tuple, stopword files compiled into words
+        """
+        return self._files
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        StopWords => Property: fingerprint() -> str
+        -> str, sha1 (hex) of the sorted words, identifies the stop words
+        a prebuilt index was itemized with
+        """
+        return hashlib.sha1(
+            '\n'.join(sorted(self._words)).encode('utf-8')).hexdigest()
+
+    def pop(self, text) -> str:
+        """
+        StopWords => Method: pop(text: str) -> str
+        -> str, text without its stop words (words split on single spaces)
+        """
+        words = self._words
+        return ' '.join([w for w in text.split(' ') if w not in words])
+
+    def pop_lines(self, lines) -> list:
+        """
+        StopWords => Method: pop_lines(lines: iterable) -> list
+        -> list, each line of lines without its stop words, in order
+        """
+        words = self._words
+        return [
+            ' '.join([w for w in line.split(' ') if w not in words])
+            for line in lines
+        ]
+
+    def filter(self, tokens) -> list:
+        """
+        StopWords => Method: filter(tokens: iterable) -> list
+        -> list, tokens that are not stop words, in order
+        """
+        words = self._words
+        return [t for t in tokens if t not in words]
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Class: TextCorpus
+        └──obj = TextCorpus(buffer: bytes, offsets: array) -> obj
+        └──obj = TextCorpus.from_items(items: iterable) -> obj
+
+Immutable text corpus held once as a single packed utf-8 buffer plus an
+offsets array, workers (threads or processes) read the lines as slices of
+the buffer instead of copying the itemized text
+"""
+from array import array
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+ENCODING = 'utf-8'
+
+
+class TextCorpus:
+    """
+    Class: TextCorpus
+        └──obj = TextCorpus(buffer: bytes, offsets: array) -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _buffer:=bytes, packed utf-8 lines (any object supporting the buffer
+        protocol, e.g. bytes, mmap, shared memory)
+    _view:=memoryview, read-only view of _buffer
+    _offsets:=array('q'), start of line i at _offsets[i], end at _offsets[i + 1]
+        (or a memoryview cast to 'q', e.g. read in place from a CorpusIndex)
+
+    Methods
+    -------
+    from_items(items: iterable) -> TextCorpus: Packs items into one buffer
+    line_bytes(index: int) -> memoryview: Line without copying nor decoding
+    lines() -> list: Every line decoded once
+
+    Parameters
+    ----------
+    buffer:=bytes, packed utf-8 lines
+    offsets:=array('q'), len(lines) + 1 byte offsets into buffer
+    """
+
+    __slots__ = ('_buffer', '_view', '_offsets')
+
+    def __init__(self, buffer=b'', offsets=None) -> None:
+        """
+        TextCorpus => Method:__init__ to instantiate class attributes
+            └──obj = TextCorpus(buffer: bytes, offsets: array) -> obj
+        """
+        self._buffer = buffer
+        self._view = memoryview(buffer).cast('B')
+        self._offsets = offsets if offsets is not None else array('q', [0])
+
+    @classmethod
+    def from_items(cls, items) -> 'TextCorpus':
+        """
+        TextCorpus => Method: from_items(items: iterable) -> TextCorpus
+        Packs every item (str) into a single buffer, in iteration order
+        """
+        offsets = array('q', [0])
+        chunks = []
+        size = 0
+        for item in items:
+            chunk = item.encode(ENCODING)
+            chunks.append(chunk)
+            size += len(chunk)
+            offsets.append(size)
+        return cls(b''.join(chunks), offsets)
+
+    def __reduce__(self) -> tuple:
+        return (type(self), (bytes(self._view), array('q', self._offsets)))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index) -> str:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TextCorpus index out of range")
+        return str(
+            self._view[self._offsets[index]:self._offsets[index + 1]],
+            ENCODING)
+
+    def __iter__(self):
+        view = self._view
+        offsets = self._offsets
+        for index in range(len(offsets) - 1):
+            yield str(view[offsets[index]:offsets[index + 1]], ENCODING)
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}(lines={len(self)}, '
+                f'nbytes={self.nbytes})')
+
+    @property
+    def buffer(self):
+        """
+        TextCorpus => Property: buffer() -> bytes
+        -> bytes, packed utf-8 lines
+        """
+        return self._buffer
+
+    @property
+    def offsets(self) -> array:
+        """
+        TextCorpus => Property: offsets() -> array
+        -> array('q'), byte offsets of the lines into buffer
+        """
+        return self._offsets
+
+    @property
+    def nbytes(self) -> int:
+        """
+        TextCorpus => Property: nbytes() -> int
+        -> int, size of the buffer plus the offsets array
+        """
+        return self._view.nbytes + \
+            self._offsets.itemsize * len(self._offsets)
+
+    def line_bytes(self, index) -> memoryview:
+        """
+        TextCorpus => Method: line_bytes(index: int) -> memoryview
+        -> memoryview, utf-8 bytes of line index (no copy)
+        """
+        return self._view[self._offsets[index]:self._offsets[index + 1]]
+
+    def lines(self) -> list:
+        """
+        TextCorpus => Method: lines() -> list
+        -> list, every line decoded once (str), for a worker reading each
+        line many times (e.g. once per key) instead of decoding it each time
+        """
+        return list(self)
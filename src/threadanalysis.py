@@ -5,15 +5,28 @@ Author: David Rush <davidprush@gmail.com>
 License: MIT
     Class: KeyTextAnalysis
         └──obj = KeyTextAnalysis(text_dict: dict, key_dict: dict,
-                                [fuzz_ratio]: int, optional) -> obj
+                                [fuzz_ratio]: int, [engine]: str,
+                                [jobs]: int, [chunk_size]: int,
+                                [backend]: str, [text_tokens]: dict,
+                                [key_tokens]: dict,
+                                [token_index]: TokenIndex, [mode]: str,
+                                [weighted]: bool, optional) -> obj
 
 """
+# pylint: disable=too-many-lines
+import os
 import sys
-import joblib
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from queue import Empty, Queue
 from threading import Thread
+from typing import NamedTuple
 
+from array import array
 from collections import defaultdict
 
+import joblib
 from fuzzywuzzy import fuzz
 
 import nltk
@@ -24,6 +37,19 @@ from tqdm import tqdm
 
 import constants as const
 
+from keyautomaton import KeyAutomaton
+from tokencache import TOKEN_CACHE, TokenCache
+from tokenindex import TokenIndex, TokenLines
+from qgramindex import QGramIndex
+from textcorpus import TextCorpus
+from itemizedcorpus import ItemizedCorpus
+from corpusindex import CorpusIndex
+from resultcache import content_digest
+from resultselect import select_keys
+from matchstats import MatchStats
+from proceduretimer import PROFILER, SpanTimes, clock
+from runprofiler import RUN_PROFILER
+
 
 """
 Module Requires: "punkt" for nltk
@@ -48,107 +74,246 @@ __email__ = "davidprush@gmail.com"
 __status__ = "Development"
 
 
-class KeyThreader(Thread):
+ENGINES = ('scan', 'aho')
+BACKENDS = ('thread', 'process')
+MATCH_MODES = ('auto', 'key', 'line')
+MATCH_VERSION = 1
+_WORKER = {}
+
+
+def as_text_corpus(items) -> TextCorpus:
     """
-    Class: KeyThreader
-        └──obj = KeyThreader(self, key: str, text: dict, fuzz: int) -> None:
+    Function: as_text_corpus(items: Mapping) -> TextCorpus
+    -> TextCorpus, the items (lines or keys) packed once, read in place
+    from an ItemizedCorpus or a CorpusIndex
+    """
+    if isinstance(items, (ItemizedCorpus, CorpusIndex)):
+        return items.as_text_corpus()
+    return TextCorpus.from_items(items)
 
-    ...
 
-    Attributes
-    ----------
-    _key:=str,
-    _text:=dict,
-    _fuzz:=int
-    _key_found:=dict,
-    _origin:=dict,
-    _count:=int,
-    _line:=int,
-    _flag:=bool,
+class MatchInputs(NamedTuple):
+    """
+    Class: MatchInputs
+        └──obj = MatchInputs(text: TextCorpus, fuzz_ratio: int,
+                             [weights]: array, [lines]: list,
+                             [direct]: dict, [token_index]: TokenIndex,
+                             [key_tokens]: dict, [qgram_index]: QGramIndex,
+                             [automaton]: KeyAutomaton, [token_keys]: dict,
+                             [key_qgram_index]: QGramIndex) -> obj
 
-    Methods
-    -------
-    run() -> None:
+    Read-only inputs of the matching workers, shared by the threads of a
+    pool (not copied) or sent once to each process of a process pool
 
-    Parameters
+    ...
+
+    Attributes
     ----------
-    key:=str,
-    text:=dict,
-    fuzz:=int, ratio for fuzzy-matching
+    text:=TextCorpus, shared (not copied) text lines
+    fuzz_ratio:=int, ratio for fuzzy-matching
         Uses the fuzzywuzzy library that implements:
             *Levenshtein distance =>
                 is a string metric for measuring the difference between
                 two sequences. Informally, the Levenshtein distance between
                 two words is the minimum number of single-character edits
+    weights:=array, optional, occurrences of each (unique) line of text in
+        the file, a matching line counts its occurrences (1 when omitted)
+    lines:=list, optional, lines of text decoded once and shared by the
+        threads of a pool (text.lines()), decoded by a KeyThreader when
+        omitted (e.g. once per process of a process pool)
+    direct:=dict, optional, key=>[line numbers (0-based)]: set of the direct
+        matches found by a KeyAutomaton, replaces the `key in item` test
+    token_index:=TokenIndex, optional, inverted index of the token tuples
+        of the lines of text, built with the shared TOKEN_CACHE when omitted
+    key_tokens:=dict, optional, key=>[tokens]: tuple
+    qgram_index:=QGramIndex, optional, q-gram index of the lines of text,
+        fuzzy scoring runs only on its candidates (every line when omitted)
+    automaton:=KeyAutomaton, keys compiled in a trie, the key ids of the
+        automaton are used by token_keys and key_qgram_index (LineThreader)
+    token_keys:=dict, key=>[tokens]: tuple, item=>[key ids]: list
+        (LineThreader)
+    key_qgram_index:=QGramIndex, q-gram index of the keys (LineThreader)
     """
 
-    def __init__(self, key: str, text: dict, fuzz: int) -> None:
-        """
-        Class: KeyThreader
-            └──obj = KeyThreader(self, key: str, text: dict, fuzz: int) -> None:
+    text: TextCorpus
+    fuzz_ratio: int
+    weights: array = None
+    lines: list = None
+    direct: dict = None
+    token_index: TokenIndex = None
+    key_tokens: dict = None
+    qgram_index: QGramIndex = None
+    automaton: KeyAutomaton = None
+    token_keys: dict = None
+    key_qgram_index: QGramIndex = None
 
-        ...
 
-        Attributes
-        ----------
-        _key:=str,
-        _text:=dict,
-        _fuzz:=int
-        _key_found:=dict,
-        _origin:=dict,
-        _count:=int,
-        _line:=int,
-        _flag:=bool,
+class MatchWorker(ABC, Thread):
+    """
+    Class: MatchWorker
+        └──obj = MatchWorker(work: Queue, inputs: MatchInputs,
+                             [pbar]: tqdm, optional) -> obj
 
-        Parameters
-        ----------
-        key:=str,
-        text:=dict,
-        fuzz:=int, ratio for fuzzy-matching
-            Uses the fuzzywuzzy library that implements:
-                *Levenshtein distance =>
-                    is a string metric for measuring the difference between
-                    two sequences. Informally, the Levenshtein distance between
-                    two words is the minimum number of single-character edits
+    Abstract pool worker, takes work units from the shared queue until it
+    is empty and adds the matches of each unit to key_found, the subclasses
+    (KeyThreader, LineThreader) implement match_unit
+
+    ...
+
+    Attributes
+    ----------
+    _work:=Queue, shared queue of work units
+    _inputs:=MatchInputs, text, fuzz ratio and indexes of the run
+    _pbar:=tqdm, progress bar updated after each work unit (or None)
+    _times:=SpanTimes, time of each match tier (None unless PROFILER is
+        enabled)
+    _stats:=MatchStats, pairs, hits, pruned pairs and time of each tier
+    _key_found:=dict, key=>[key]: str, item=>[match count]: int
+    _origin:=dict, key=>[key]: str, item=>[last line matching key]: list
+
+    Methods
+    -------
+    run() -> None: Evaluates work units from the queue until it is empty
+    match_unit(unit: list | range) -> dict: Matches of a work unit
+
+    Parameters
+    ----------
+    work:=Queue, shared queue of work units, None when match_unit is called
+        directly (process pool worker)
+    inputs:=MatchInputs, text, fuzz ratio and indexes of the run
+    pbar:=tqdm, optional, progress bar
+    """
+
+    def __init__(self, work, inputs, pbar=None) -> None:
+        """
+        MatchWorker => Method:__init__ to instantiate class attributes
+            └──obj = MatchWorker(work: Queue, inputs: MatchInputs,
+                                 [pbar]: tqdm, optional) -> obj
         """
         Thread.__init__(self)
-        self._key = key
-        self._text = text.copy()
-        self._fuzz = fuzz
+        self._work = work
+        self._inputs = inputs
+        self._pbar = pbar
+        self._times = SpanTimes() if PROFILER.enabled else None
+        self._stats = MatchStats()
         self._key_found = defaultdict(int)
         self._origin = defaultdict(list)
-        self._count = 0
-        self._line = 0
-        self._flag = False
 
     @property
     def count(self) -> int:
         """
-        KeyThreader => Property: count() -> int
+        MatchWorker => Property: count() -> int
+        -> int, total matches found by this worker
         """
-        return self._count
+        return sum(self._key_found.values())
 
     @property
-    def key(self) -> str:
+    def times(self) -> SpanTimes:
         """
-        KeyThreader => Property: key() -> str
+        MatchWorker => Property: times() -> SpanTimes
+        -> SpanTimes, time of each match tier (None unless profiling)
         """
-        return self._key
+        return self._times
+
+    @property
+    def stats(self) -> MatchStats:
+        """
+        MatchWorker => Property: stats() -> MatchStats
+        -> MatchStats, counters of each match tier of this worker
+        """
+        return self._stats
 
     @property
     def key_found(self) -> dict:
         """
-        KeyThreader => Property: key_found() -> dict
+        MatchWorker => Property: key_found() -> dict
         """
         return self._key_found
 
     @property
     def origin(self) -> dict:
         """
-        KeyThreader => Property: origin() -> dict
+        MatchWorker => Property: origin() -> dict
         """
         return self._origin
 
+    @RUN_PROFILER.profiled('keys2text_find', allocations=False)
+    def run(self) -> None:
+        """
+        MatchWorker => Method: run() -> None
+        Evaluates work units from the queue until it is empty
+        """
+        while True:
+            try:
+                unit = self._work.get_nowait()
+            except Empty:
+                break
+            for key, count in self.match_unit(unit).items():
+                self._key_found[key] += count
+            if self._pbar is not None:
+                self._pbar.update(len(unit))
+
+    @abstractmethod
+    def match_unit(self, unit) -> dict:
+        """
+        MatchWorker => Method: match_unit(unit: list | range) -> dict
+        -> dict, key=>[key]: str, item=>[match count]: int of the unit
+        """
+
+
+class KeyThreader(MatchWorker):
+    """
+    Class: KeyThreader
+        └──obj = KeyThreader(work: Queue, inputs: MatchInputs,
+                             [pbar]: tqdm, optional) -> obj
+
+    Key-driven pool worker, takes work units (lists of keys) from the shared
+    queue until it is empty and counts the matches of each key in the text
+
+    ...
+
+    Attributes
+    ----------
+    _key:=str, key currently evaluated
+    _line:=int, line currently evaluated (1-based)
+
+    Methods
+    -------
+    match_unit(unit: list) -> dict:
+    match_key(key: str) -> int:
+
+    Parameters
+    ----------
+    work:=Queue, shared queue of work units (list of keys), None when
+        match_key is called directly (process pool worker)
+    inputs:=MatchInputs, text, fuzz ratio, direct matches, token_index,
+        key_tokens, qgram_index and weights, the token index is built with
+        the shared TOKEN_CACHE and the lines are decoded when omitted
+    pbar:=tqdm, optional, progress bar
+    """
+
+    def __init__(self, work, inputs, pbar=None) -> None:
+        """
+        KeyThreader => Method:__init__ to instantiate class attributes
+            └──obj = KeyThreader(work: Queue, inputs: MatchInputs,
+                                 [pbar]: tqdm, optional) -> obj
+        """
+        if inputs.token_index is None:
+            inputs = inputs._replace(token_index=TokenIndex(
+                [TOKEN_CACHE.tokens(item) for item in inputs.text]))
+        if inputs.lines is None:
+            inputs = inputs._replace(lines=inputs.text.lines())
+        MatchWorker.__init__(self, work, inputs, pbar)
+        self._key = None
+        self._line = 0
+
+    @property
+    def key(self) -> str:
+        """
+        KeyThreader => Property: key() -> str
+        """
+        return self._key
+
     @property
     def line(self) -> int:
         """
@@ -156,41 +321,358 @@ class KeyThreader(Thread):
         """
         return self._line
 
-    def run(self) -> None:
+    def match_unit(self, unit) -> dict:
+        """
+        KeyThreader => Method: match_unit(unit: list) -> dict
+        Evaluates a work unit (list of keys), when PROFILER is tracing the
+        unit is kept as an event with its slowest key (skewed keys)
+        -> dict, key=>[key]: str, item=>[number of lines matching key]: int
+        (keys without matches are omitted)
+        """
+        found = {}
+        if not PROFILER.tracing:
+            for key in unit:
+                count = self.match_key(key)
+                if count > 0:
+                    found[key] = count
+            return found
+        start, cpu = clock()
+        slowest, slowest_time = None, -1.0
+        since = start
+        for key in unit:
+            count = self.match_key(key)
+            if count > 0:
+                found[key] = count
+            now = time.perf_counter()
+            if now - since > slowest_time:
+                slowest, slowest_time = key, now - since
+            since = now
+        PROFILER.event(
+            'unit', (start, since), time.thread_time() - cpu,
+            {'keys': len(unit), 'matches': len(found),
+             'slowest_key': slowest,
+             'slowest_ms': round(slowest_time * 1e3, 3)})
+        return found
+
+    def match_key(self, key) -> int:
+        """
+        KeyThreader => Method: match_key(key: str) -> int
+        Evaluates key against the candidate lines of the tiers only: the
+        direct lines of the automaton, the lines of the token index and the
+        q-gram candidates (a line containing key holds every q-gram of key,
+        so the q-gram candidates include the direct lines of a scan), counts
+        the pairs (key, line) of each tier in _stats
+        -> int, number of lines matching key (occurrences of the lines
+        with weights)
+        """
+        self._key = key
+        self._line = 0
+        direct_lines, token_lines, fuzzy_lines = self._lookup(key)
+        times = self._times
+        if times is not None:
+            since = clock()
+            scored = times.spent('fuzzy')
+        start = time.perf_counter()
+        lines = len(self._inputs.lines)
+        if fuzzy_lines is None:
+            candidates = range(lines)
+        else:
+            candidates = fuzzy_lines | token_lines
+            if direct_lines is not None:
+                candidates |= direct_lines
+            candidates = sorted(candidates)
+        matched, hits, scoring = self._match_lines(
+            key, candidates, direct_lines, token_lines, fuzzy_lines)
+        count = self._count_matches(key, matched)
+        # the automaton (direct) resolved the lines of key, only its hits
+        # are compared, a scan tests the candidate lines
+        self._stats.add(
+            'direct', lines,
+            len(candidates) if direct_lines is None else hits[0],
+            hits[0], time.perf_counter() - start - scoring)
+        lines -= hits[0]
+        self._stats.add('tokenized', lines, hits[1], hits[1])
+        self._stats.add(
+            'fuzzy', lines - hits[1], hits[3], hits[2], scoring)
+        if times is not None:
+            times.split('direct', since, exclude=tuple(
+                spent - before
+                for spent, before in zip(times.spent('fuzzy'), scored)))
+        return count
+
+    def _count_matches(self, key, matched) -> int:
+        """
+        KeyThreader => Method: _count_matches(key: str, matched: list) -> int
+        Counts the lines matching key and keeps the last one in _origin
+        -> int, number of lines matching key (occurrences of the lines
+        with weights)
+        """
+        if not matched:
+            return 0
+        weights = self._inputs.weights
+        count = len(matched) if weights is None \
+            else sum(weights[line] for line in matched)
+        self._origin[key] = [
+            "Line:=", matched[-1] + 1,
+            "Text:=", self._inputs.lines[matched[-1]],
+            "Count:=", count,
+            "Key:=", key
+        ]
+        return count
+
+    def _lookup(self, key) -> tuple:
+        """
+        KeyThreader => Method: _lookup(key: str) -> tuple
+        Looks up the lines of key in the indexes of the tiers, the time of
+        each lookup is added to its tier
+        -> tuple, (direct lines (None without an automaton), lines of the
+        token index, q-gram candidates (None without a q-gram index))
         """
-        KeyThreader => Property: line() -> None
-        """
-        for item in self._text:
-            self._flag = False
-            self._line += 1
-            kstr = str([s for s in word_tokenize(self._key) if len(s) > 3])
-            istr = str([s for s in word_tokenize(item) if len(s) > 3])
-            if self._key in item:
-                self._count += 1
-                self._flag = True
-            elif kstr in istr:
-                self._count += 1
-                self._flag = True
-            elif fuzz.partial_ratio(self._key, item) >= self._fuzz:
-                self._count += 1
-                self._flag = True
-            if self._flag:
-                self._origin[self._key] = [
-                    "Line:=", self._line,
-                    "Text:=", item,
-                    "Count:=", self._count,
-                    "Key:=", self._key
-                ]
-        if self._count > 0:
-            self._key_found[self._key] = self._count
-            self._flag = True
-
-
-class KeyTextAnalysis:
+        inputs = self._inputs
+        times = self._times
+        if times is not None:
+            since = clock()
+        start = time.perf_counter()
+        direct_lines = None if inputs.direct is None else inputs.direct[key]
+        ktoks = inputs.key_tokens[key] if inputs.key_tokens is not None \
+            else TOKEN_CACHE.tokens(key)
+        token_lines = set(inputs.token_index.lines_equal(ktoks))
+        tokenized = time.perf_counter()
+        if times is not None:
+            since = times.split('tokenized', since)
+        fuzzy_lines = None if inputs.qgram_index is None else set(
+            inputs.qgram_index.candidates(key, inputs.fuzz_ratio))
+        if times is not None:
+            times.split('fuzzy', since, calls=0)
+        self._stats.add('tokenized', seconds=tokenized - start)
+        self._stats.add('fuzzy', seconds=time.perf_counter() - tokenized)
+        return direct_lines, token_lines, fuzzy_lines
+
+    def _match_lines(
+        self, key, candidates, direct_lines, token_lines, fuzzy_lines
+    ) -> tuple:
+        """
+        KeyThreader => Method: _match_lines(key: str, candidates: iterable,
+                                            direct_lines: set,
+                                            token_lines: set,
+                                            fuzzy_lines: set) -> tuple
+        Evaluates key against each candidate line, by tier: direct, then
+        tokenized, then fuzzy
+        -> tuple, (line ids matching key: list, [direct, tokenized, fuzzy
+        hits, fuzzy scores]: list, time spent scoring: float)
+        """
+        text = self._inputs.lines
+        fuzz_ratio = self._inputs.fuzz_ratio
+        partial_ratio = fuzz.partial_ratio if self._times is None \
+            else self._times.tally('fuzzy', fuzz.partial_ratio)
+        matched = []
+        hits = [0, 0, 0, 0]
+        scoring = 0.0
+        for line in candidates:
+            self._line = line + 1
+            if direct_lines is not None:
+                direct = line in direct_lines
+            else:
+                direct = key in text[line]
+            if direct:
+                hits[0] += 1
+            elif line in token_lines:
+                # same result as str(key tokens) in str(line tokens), the
+                # sanitized tokens hold no brackets nor quotes
+                hits[1] += 1
+            elif fuzzy_lines is None or line in fuzzy_lines:
+                hits[3] += 1
+                score = time.perf_counter()
+                direct = partial_ratio(key, text[line]) >= fuzz_ratio
+                scoring += time.perf_counter() - score
+                if not direct:
+                    continue
+                hits[2] += 1
+            else:
+                continue
+            matched.append(line)
+        return matched, hits, scoring
+
+
+class LineThreader(MatchWorker):
+    """
+    Class: LineThreader
+        └──obj = LineThreader(work: Queue, inputs: MatchInputs,
+                              [pbar]: tqdm, optional) -> obj
+
+    Line-driven pool worker, takes work units (ranges of line ids) from the
+    shared queue until it is empty, evaluates each line once and looks up
+    the candidate keys in key-side indexes instead of scanning every key
+
+    ...
+
+    Attributes
+    ----------
+    _line:=int, line currently evaluated (1-based)
+
+    Methods
+    -------
+    match_unit(unit: range) -> dict:
+    match_line(line: int) -> set:
+
+    Parameters
+    ----------
+    work:=Queue, shared queue of work units (range of line ids), None when
+        match_unit is called directly (process pool worker)
+    inputs:=MatchInputs, text, fuzz ratio, automaton, token_keys,
+        key_qgram_index, token_index (token tuples of the lines of text)
+        and weights
+    pbar:=tqdm, optional, progress bar
+    """
+
+    def __init__(self, work, inputs, pbar=None) -> None:
+        """
+        LineThreader => Method:__init__ to instantiate class attributes
+            └──obj = LineThreader(work: Queue, inputs: MatchInputs,
+                                  [pbar]: tqdm, optional) -> obj
+        """
+        MatchWorker.__init__(self, work, inputs, pbar)
+        self._line = 0
+
+    @property
+    def line(self) -> int:
+        """
+        LineThreader => Property: line() -> int
+        """
+        return self._line
+
+    def match_unit(self, unit) -> dict:
+        """
+        LineThreader => Method: match_unit(unit: range) -> dict
+        Evaluates a work unit (range of line ids), when PROFILER is tracing
+        the unit is kept as an event with its slowest line
+        -> dict, key=>[key]: str, item=>[number of lines matching key]: int
+        (occurrences of the lines with weights)
+        """
+        keys = self._inputs.automaton.keys
+        weights = self._inputs.weights
+        found = defaultdict(int)
+        tracing = PROFILER.tracing
+        if tracing:
+            start, cpu = clock()
+            slowest, slowest_time = None, -1.0
+            since = start
+        for line in unit:
+            weight = 1 if weights is None else weights[line]
+            for kid in self.match_line(line):
+                found[keys[kid]] += weight
+            if tracing:
+                now = time.perf_counter()
+                if now - since > slowest_time:
+                    slowest, slowest_time = line + 1, now - since
+                since = now
+        if tracing:
+            PROFILER.event(
+                'unit', (start, since), time.thread_time() - cpu,
+                {'lines': f'{unit.start + 1}-{unit.stop}',
+                 'matches': len(found), 'slowest_line': slowest,
+                 'slowest_ms': round(slowest_time * 1e3, 3)})
+        return found
+
+    def match_line(self, line) -> set:
+        """
+        LineThreader => Method: match_line(line: int) -> set
+        Evaluates line (id) against the candidate keys of each tier,
+        counts the pairs (key, line) of each tier in _stats
+        -> set, ids of the keys matching the line
+        """
+        self._line = line + 1
+        inputs = self._inputs
+        times = self._times
+        if times is not None:
+            since = clock()
+        start = time.perf_counter()
+        item = inputs.text[line]
+        keys = inputs.automaton.keys
+        hits = inputs.automaton.find(item)
+        direct_hits = len(hits)
+        direct = time.perf_counter()
+        if times is not None:
+            since = times.split('direct', since)
+        hits.update(inputs.token_keys.get(inputs.token_index.lines[line], ()))
+        token_hits = len(hits) - direct_hits
+        tokenized = time.perf_counter()
+        if times is not None:
+            since = times.split('tokenized', since)
+        evaluated = 0
+        for kid in inputs.key_qgram_index.candidates(
+                item, inputs.fuzz_ratio, query_first=False):
+            if kid not in hits:
+                evaluated += 1
+                if fuzz.partial_ratio(keys[kid], item) >= inputs.fuzz_ratio:
+                    hits.add(kid)
+        if times is not None:
+            times.split('fuzzy', since)
+        self._stats.add(
+            'direct', len(keys), direct_hits, direct_hits, direct - start)
+        self._stats.add(
+            'tokenized', len(keys) - direct_hits, token_hits, token_hits,
+            tokenized - direct)
+        self._stats.add(
+            'fuzzy', len(keys) - direct_hits - token_hits, evaluated,
+            len(hits) - direct_hits - token_hits,
+            time.perf_counter() - tokenized)
+        for kid in hits:
+            self._origin[keys[kid]] = [
+                "Line:=", self._line,
+                "Text:=", item,
+                "Key:=", keys[kid]
+            ]
+        return hits
+
+
+def _init_process_worker(matcher, inputs, profile=False, trace=False) -> None:
+    """
+    Function: _init_process_worker(matcher: type, inputs: MatchInputs,
+                                   [profile]: bool, [trace]: bool) -> None
+    Process pool initializer, receives the text and indexes once per
+    worker process and keeps a matcher (KeyThreader or LineThreader, not
+    started) to evaluate the work units, profile times the match tiers,
+    trace keeps an event of each work unit, a forked copy of RUN_PROFILER
+    is disabled (the workers are not profiled)
+    """
+    PROFILER.reset()
+    RUN_PROFILER.disable()
+    if profile:
+        PROFILER.enable(trace=trace)
+    _WORKER['matcher'] = matcher(None, inputs)
+
+
+def _process_work_unit(unit) -> tuple:
+    """
+    Function: _process_work_unit(unit: list | range) -> tuple
+    Evaluates a work unit (list of keys or range of line ids) in a process
+    pool worker
+    -> tuple, (size of unit, key=>[match count] dict, time of each match
+    tier of the unit (SpanTimes.totals, None unless profiling), events of
+    the unit (list, empty unless tracing), counters of each match tier of
+    the unit (MatchStats.totals))
+    """
+    matcher = _WORKER['matcher']
+    key_found = dict(matcher.match_unit(unit))
+    matcher.origin.clear()
+    times = matcher.times.drain() if matcher.times is not None else None
+    return len(unit), key_found, times, PROFILER.drain_events(), \
+        matcher.stats.drain()
+
+
+# the attributes and properties follow the options of the command line
+class KeyTextAnalysis:  # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-public-methods
     """
     Class: KeyTextAnalysis
         └──obj = KeyTextAnalysis(text_dict: dict, key_dict: dict,
-                                [fuzz_ratio]: int, optional) -> obj
+                                [fuzz_ratio]: int, [engine]: str,
+                                [jobs]: int, [chunk_size]: int,
+                                [backend]: str, [text_tokens]: dict,
+                                [key_tokens]: dict,
+                                [token_index]: TokenIndex, [mode]: str,
+                                [weighted]: bool, optional) -> obj
 
     ...
 
@@ -199,10 +681,32 @@ class KeyTextAnalysis:
     _text_dict:=dict, text_dict parameter passed at instantiation
     _key_dict:=dict, key_dict parameter passed at instantiation
     _fuzz_ratio:=int, init to fuzz_ratio=99, see not below
-    _keys_found:=dict, key=>[unique text]: str, item=>[match count], int
+    _engine:=str, init to engine='scan', direct-match engine (see ENGINES)
+    _automaton:=KeyAutomaton, compiled keys when engine='aho', init to None
+    _text_corpus:=TextCorpus, text_dict packed once and shared by the workers
+    _text_tokens:=TokenLines | dict, pre-tokenized text (or None)
+    _key_tokens:=dict, key=>[tokens]: tuple, pre-tokenized keys (or None)
+    _line_tokens:=TokenLines | list, token tuple of each line of _text_corpus
+    _token_index:=TokenIndex, inverted token index of _text_corpus, reused by
+        later runs on the same text
+    _qgram_index:=QGramIndex, q-gram index of _text_corpus (fuzzy prefilter)
+    _mode:=str, init to mode='auto', matching mode (see MATCH_MODES)
+    _run_mode:=str, mode used by the last run ('key' or 'line')
+    _key_qgram_index:=QGramIndex, q-gram index of the keys (line-driven)
+    _weighted:=bool, init to weighted=True, counts line occurrences
+    _text_weights:=array('q'), occurrences of each line of _text_corpus
+    _jobs:=int, init to jobs=None (os.cpu_count()), size of the worker pool
+    _chunk_size:=int, init to chunk_size=None (CHUNK_SIZE), keys per work unit
+    _backend:=str, init to backend='thread', worker pool type (see BACKENDS)
+    _keys_found:=dict, key=>[unique text]: str, item=>[match count], int,
+        by match count descending (sorted from _key_counts when first read,
+        or set by the caller, e.g. within limits), None until then
+    _key_counts:=dict, key=>[unique text]: str, item=>[match count], int,
+        every key matched
     _keys2text_index:=list, metadata; incrementers; origin text
     _total_keys_found:=int, init to 0, total number of key matches
     _total_comparisons:=int, init to 0, total number of key to text evaluations
+    _match_stats:=MatchStats, counters of each match tier of the last run
     _has_key:=bool, init to False
 
     Methods
@@ -211,19 +715,33 @@ class KeyTextAnalysis:
         against the text dictionary (text_dict), populates the keys_found
         dictionary with the key and the total number of times the key appears
         in the text
-    _sort_keys_found() -> bool: Sorts the _keys_found (dict) in descending order
+    add_key_counts(counts: dict) -> None: Adds counts of a previous run
+    content_digests() -> tuple: Digests of the text and keys (ResultCache)
     echo_keys_found() -> bool: Prints the dictionary of key matches to console
     echo_keys2text_indexed() -> bool: Prints the list of analysis comparisons to console
     dump_keys2text_index() -> bool: Dumps indexed list to file indexed_list_dump.z
     dump_keys_found() -> bool: Dumps matches to file key_match_dump.z
     run_keys2text_all() -> bool:
+    _tokenize_corpus() -> None: Token tuples of the lines and keys, once
+    _prepare_matcher() -> tuple: Resolves the mode, builds its indexes
+    _run_thread_pool(...) -> None: KeyThreader/LineThreader pool of _jobs
+    _run_process_pool(...) -> None: Process pool of _jobs
+    _merge_key_found(key_found) -> None: Adds worker counts to _key_counts
+    _order_key_counts() -> None: Puts _key_counts in the order of key_dict
+    _sort_keys_found() -> None: Sorts _key_counts into _keys_found
+    _work_units() -> generator: Batches keys into work units for the pool
+    _line_units() -> generator: Batches lines into work units (line mode)
+    _index_keys() -> dict: Key-side indexes (line mode)
+    _key_automaton() -> KeyAutomaton: Automaton of the keys (compiled keys)
+    _find_direct_hits() -> dict: Direct matches of every key (engine='aho')
     _eval_direct_match(key, item) -> bool:
     _eval_tokenized_match(skey, item) -> bool:
     _eval_fuzzy_match(key, item) -> bool:
 
     Parameters
     ----------
-    text_dict:=dict, text_dict parameter passed at instantiation
+    text_dict:=dict | ItemizedCorpus, text_dict parameter passed at
+        instantiation
     key_dict:=dict, key_dict parameter passed at instantiation
     fuzz_ratio:=int, ratio for fuzzy-matching
         Uses the fuzzywuzzy library that implements:
@@ -231,33 +749,91 @@ class KeyTextAnalysis:
                 is a string metric for measuring the difference between
                 two sequences. Informally, the Levenshtein distance between
                 two words is the minimum number of single-character edits
+    engine:=str, direct-match engine, 'scan' tests every key against every
+        line, 'aho' compiles all keys into one KeyAutomaton and scans each
+        line once
+    jobs:=int, number of KeyThreader workers in the pool, the thread count
+        stays the same regardless of the size of key_dict
+    chunk_size:=int, number of keys batched into each work unit
+    backend:=str, worker pool type, 'thread' runs KeyThreader workers,
+        'process' runs the work units in a process pool (no GIL contention)
+    text_tokens:=TokenLines | dict, token ids of each item of text_dict (in
+        its order, ItemizeFileData.tokens) or item=>[tokens]: tuple
+    key_tokens:=TokenLines | dict, token ids of each key of key_dict (in its
+        order, ItemizeFileData.tokens) or key=>[tokens]: tuple
+    token_index:=TokenIndex, index of a previous run on the same text
+    mode:=str, 'key' evaluates each key against every line, 'line' evaluates
+        each line once against the candidate keys of key-side indexes,
+        'auto' picks 'line' when key_dict is larger than text_dict
+    weighted:=bool, True to count the occurrences of the matching lines
+        (the counts of text_dict, each unique line is matched once), False
+        to count the unique matching lines
     """
 
-    def __init__(
+    # the options mirror the keycollator command line, keyword-only
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         text_dict,
         key_dict,
-        fuzz_ratio=99
+        fuzz_ratio=99,
+        *,
+        engine='scan',
+        jobs=None,
+        chunk_size=None,
+        backend='thread',
+        text_tokens=None,
+        key_tokens=None,
+        token_index=None,
+        mode='auto',
+        weighted=True
     ) -> None:
         """
         (Class:KeyTextAnalysis) => Method:__init__ to instantiate class attributes
             └──obj = KeyTextAnalysis(text_dict: dict, key_dict: dict,
-                                    [fuzz_ratio]: int, optional) -> obj
+                                    [fuzz_ratio]: int, [engine]: str,
+                                    [jobs]: int, [chunk_size]: int,
+                                    [backend]: str, [text_tokens]: dict,
+                                    [key_tokens]: dict,
+                                    [token_index]: TokenIndex, [mode]: str,
+                                    [weighted]: bool, optional) -> obj
 
         Attributes
         ----------
         _text_dict:=dict, text_dict parameter passed at instantiation
         _key_dict:=dict, key_dict parameter passed at instantiation
         _fuzz_ratio:=int, init to fuzz_ratio=99, see not below
-        _keys_found:=dict, key=>[unique text]: str, item=>[match count], int
+        _engine:=str, init to engine='scan', direct-match engine (see ENGINES)
+        _automaton:=KeyAutomaton, compiled keys when engine='aho', init to None
+        _text_corpus:=TextCorpus, text_dict packed once and shared by the workers
+        _text_tokens:=TokenLines | dict, pre-tokenized text (or None)
+        _key_tokens:=dict, key=>[tokens]: tuple, pre-tokenized keys (or None)
+        _line_tokens:=TokenLines | list, token tuple of each line of _text_corpus
+        _token_index:=TokenIndex, inverted token index of _text_corpus, reused
+            by later runs on the same text
+        _qgram_index:=QGramIndex, q-gram index of _text_corpus (fuzzy prefilter)
+        _mode:=str, init to mode='auto', matching mode (see MATCH_MODES)
+        _run_mode:=str, mode used by the last run ('key' or 'line')
+        _key_qgram_index:=QGramIndex, q-gram index of the keys (line-driven)
+        _weighted:=bool, init to weighted=True, counts line occurrences
+        _text_weights:=array('q'), occurrences of each line of _text_corpus
+        _jobs:=int, init to jobs=None (os.cpu_count()), size of the worker pool
+        _chunk_size:=int, init to chunk_size=None (CHUNK_SIZE), keys per work unit
+        _backend:=str, init to backend='thread', worker pool type (see BACKENDS)
+        _keys_found:=dict, key=>[unique text]: str, item=>[match count], int,
+            by match count descending (sorted from _key_counts when first
+            read, or set by the caller, e.g. within limits), None until then
+        _key_counts:=dict, key=>[unique text]: str, item=>[match count], int,
+            every key matched
         _keys2text_index:=list, metadata; incrementers; origin text
         _total_keys_found:=int, init to 0, total number of key matches
         _total_comparisons:=int, init to 0, total number of key to text evaluations
+        _match_stats:=MatchStats, counters of each match tier of the last run
         _has_key:=bool, init to False
 
         Parameters
         ----------
-        text_dict:=dict, text_dict parameter passed at instantiation
+        text_dict:=dict | ItemizedCorpus, text_dict parameter passed at
+            instantiation
         key_dict:=dict, key_dict parameter passed at instantiation
         stopwords:=list, stopwords parameter passed at instantiation, upon init
                         the words are tokenized to eliminate all approximates
@@ -267,14 +843,53 @@ class KeyTextAnalysis:
                     is a string metric for measuring the difference between
                     two sequences. Informally, the Levenshtein distance between
                     two words is the minimum number of single-character edits
+        engine:=str, direct-match engine, 'scan' or 'aho' (see ENGINES)
+        jobs:=int, number of KeyThreader workers in the pool
+        chunk_size:=int, number of keys batched into each work unit
+        backend:=str, worker pool type, 'thread' or 'process' (see BACKENDS)
+        text_tokens:=TokenLines | dict, token ids of each item of text_dict
+            (in its order) or item=>[tokens]: tuple, items missing are
+            tokenized once (TokenCache of the run)
+        key_tokens:=TokenLines | dict, token ids of each key of key_dict (in
+            its order) or key=>[tokens]: tuple, keys missing are tokenized
+            once (TokenCache of the run)
+        token_index:=TokenIndex, index of a previous run, reused when it was
+            built over the same text
+        mode:=str, matching mode, 'key', 'line' or 'auto' (see MATCH_MODES)
+        weighted:=bool, counts the occurrences (text_dict counts) of the
+            matching lines instead of the unique matching lines
         """
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}")
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}")
+        if mode not in MATCH_MODES:
+            raise ValueError(f"mode must be one of {MATCH_MODES}")
         self._text_dict = text_dict
         self._key_dict = key_dict
         self._fuzz_ratio = fuzz_ratio
-        self._keys_found = defaultdict(int)
+        self._engine = engine
+        self._automaton = None
+        self._text_corpus = None
+        self._text_tokens = text_tokens
+        self._key_tokens = key_tokens
+        self._line_tokens = None
+        self._token_index = token_index
+        self._qgram_index = None
+        self._mode = mode
+        self._run_mode = None
+        self._weighted = weighted
+        self._text_weights = None
+        self._key_qgram_index = None
+        self._jobs = jobs if jobs else (os.cpu_count() or 1)
+        self._chunk_size = chunk_size if chunk_size else const.CHUNK_SIZE
+        self._backend = backend
+        self._keys_found = None
+        self._key_counts = defaultdict(int)
         self._keys2text_index = defaultdict(list)
         self._total_keys_found = 0
         self._total_comparisons = 0
+        self._match_stats = MatchStats()
         self._has_key = False
         self._total_threads = 0
 
@@ -337,10 +952,28 @@ class KeyTextAnalysis:
     def total_comparisons(self) -> int:
         """
         KeyTextAnalysis => Property: total_comparisons() -> int
-        -> int, value of _total_comparisons
+        -> int, value of _total_comparisons, pairs (key, line) compared by
+        the match tiers of the last run
         """
         return self._total_comparisons
 
+    @property
+    def total_matches(self) -> int:
+        """
+        KeyTextAnalysis => Property: total_matches() -> int
+        -> int, sum of the match counts of every key matched
+        """
+        return sum(self._key_counts.values())
+
+    @property
+    def match_stats(self) -> MatchStats:
+        """
+        KeyTextAnalysis => Property: match_stats() -> MatchStats
+        -> MatchStats, counters of each match tier of the last run (pairs,
+        compared, pruned, hits, time), empty if read from the cache
+        """
+        return self._match_stats
+
     @property
     def fuzz_ratio(self) -> int:
         """
@@ -356,12 +989,102 @@ class KeyTextAnalysis:
         """
         self._fuzz_ratio = value
 
+    @property
+    def engine(self) -> str:
+        """
+        KeyTextAnalysis => Property: engine() -> str
+        -> str, direct-match engine ('scan' or 'aho')
+        """
+        return self._engine
+
+    @property
+    def automaton(self) -> KeyAutomaton:
+        """
+        KeyTextAnalysis => Property: automaton() -> KeyAutomaton
+        -> KeyAutomaton, keys compiled by the 'aho' engine, otherwise None
+        """
+        return self._automaton
+
+    @property
+    def jobs(self) -> int:
+        """
+        KeyTextAnalysis => Property: jobs() -> int
+        -> int, size of the worker pool
+        """
+        return self._jobs
+
+    @jobs.setter
+    def jobs(self, value=None) -> None:
+        """
+        KeyTextAnalysis => Property: jobs(value: int) -> None
+        """
+        self._jobs = value if value else (os.cpu_count() or 1)
+
+    @property
+    def chunk_size(self) -> int:
+        """
+        KeyTextAnalysis => Property: chunk_size() -> int
+        -> int, number of keys in each work unit
+        """
+        return self._chunk_size
+
+    @chunk_size.setter
+    def chunk_size(self, value=None) -> None:
+        """
+        KeyTextAnalysis => Property: chunk_size(value: int) -> None
+        """
+        self._chunk_size = value if value else const.CHUNK_SIZE
+
+    @property
+    def backend(self) -> str:
+        """
+        KeyTextAnalysis => Property: backend() -> str
+        -> str, worker pool type ('thread' or 'process')
+        """
+        return self._backend
+
+    @property
+    def text_corpus(self) -> TextCorpus:
+        """
+        KeyTextAnalysis => Property: text_corpus() -> TextCorpus
+        -> TextCorpus, text lines shared by the workers (after keys2text_find)
+        """
+        return self._text_corpus
+
+    @property
+    def token_index(self) -> TokenIndex:
+        """
+        KeyTextAnalysis => Property: token_index() -> TokenIndex
+        -> TokenIndex, inverted token index of the text (after keys2text_find)
+        """
+        return self._token_index
+
+    @property
+    def qgram_index(self) -> QGramIndex:
+        """
+        KeyTextAnalysis => Property: qgram_index() -> QGramIndex
+        -> QGramIndex, q-gram index of the text (after keys2text_find)
+        """
+        return self._qgram_index
+
+    @property
+    def mode(self) -> str:
+        """
+        KeyTextAnalysis => Property: mode() -> str
+        -> str, matching mode used by the last run ('key' or 'line'),
+        the requested mode before the first run
+        """
+        return self._run_mode if self._run_mode else self._mode
+
     @property
     def keys_found(self) -> dict:
         """
         KeyTextAnalysis => Property: keys_found() -> dict
-        -> dict, containing the key matches with count totals
+        -> dict, containing the key matches with count totals, by count
+        descending (sorted once from key_counts unless set by the caller)
         """
+        if self._keys_found is None:
+            self._sort_keys_found()
         return self._keys_found
 
     @keys_found.setter
@@ -369,7 +1092,16 @@ class KeyTextAnalysis:
         """
         KeyTextAnalysis => Property: keys_found(obj: dict) -> None
         """
-        self._keys_found = dict(obj).copy
+        self._keys_found = dict(obj)
+
+    @property
+    def key_counts(self) -> dict:
+        """
+        KeyTextAnalysis => Property: key_counts() -> dict
+        -> dict, match count totals of every key matched by the last run
+        (and the counts added since), before any selection of keys_found
+        """
+        return self._key_counts
 
     @property
     def keys2text_index(self) -> dict:
@@ -379,6 +1111,7 @@ class KeyTextAnalysis:
         """
         return self._keys2text_index
 
+    @RUN_PROFILER.profiled()
     def keys2text_find(self) -> bool:
         """
         KeyTextAnalysis => Method: keys2text_find() -> bool
@@ -391,45 +1124,338 @@ class KeyTextAnalysis:
         Methods
         -------
         keys2text_find() -> bool, True if matches found, otherwise False
+            └──:_prepare_matcher() -> KeyThreader | LineThreader
+            └──:_run_thread_pool() | _run_process_pool(), pool of _jobs
             └──:_eval_direct_match(key, item) -> bool
                     └──:_eval_tokenized_match(key, item) -> bool
                             └──:_eval_fuzzy_matchy(key, item) -> bool
-                                    └──:_sort_keys_found() -> bool
 
         Returns
         -------
         -> bool, True if matches found, False otherwise
         """
+        self._keys2text_index = defaultdict(list)
+        self._keys_found = None
+        self._key_counts = defaultdict(int)
+        self._match_stats = MatchStats()
+        self._total_comparisons = 0
         if len(self._text_dict) != 0 and len(self._key_dict) != 0:
-            self._has_key = False
-            self._keys2text_index = defaultdict(list)
-            self._keys_found = defaultdict(int)
-            key_threader = {}
-            print("Analyzing text for keys...")
-            pbar = tqdm(total=(len(self._key_dict)))
+            self._pack_text()
+            self._tokenize_corpus()
+            matcher, inputs, units, total = self._prepare_matcher()
+            print(f"Analyzing text for keys ({self._run_mode}-driven)...")
+            pbar = tqdm(total=total)
+            sys.stdout.flush()
+            with PROFILER.span('match'):
+                if self._backend == 'process':
+                    self._run_process_pool(matcher, inputs, units, pbar)
+                else:
+                    self._run_thread_pool(matcher, inputs, units, pbar)
             sys.stdout.flush()
-            for key in self._key_dict:
-                key_threader[key] = KeyThreader(
-                    key,
-                    self._text_dict,
-                    self._fuzz_ratio
-                )
-                key_threader[key].start()
-                self._total_threads += 1
-                pbar.update(1)
-                sys.stdout.flush()
-            for key in key_threader:
-                key_threader[key].join()
-                self._keys_found = \
-                    self._keys_found | key_threader[key].key_found
-                self._keys2text_index = \
-                    self._keys2text_index | key_threader[key].key_found
             pbar.close()
-            if len(self._keys_found) != 0:
-                self._sort_keys_found()
-                self._has_key = True
+            self._order_key_counts()
+            self._total_comparisons = self._match_stats.comparisons
+        self._has_key = len(self._key_counts) != 0
         return self._has_key
 
+    def add_key_counts(self, counts) -> None:
+        """
+        KeyTextAnalysis => Method: add_key_counts(counts: dict) -> None
+        Adds counts (key=>[key]: str, item=>[count]: int) found outside
+        this run, e.g. read from a ResultCache or of a previous run over
+        the start of the text, to the matches (key_counts), keys_found is
+        sorted again when read
+        """
+        for key, count in counts.items():
+            self._key_counts[key] += count
+            self._keys2text_index[key] = self._key_counts[key]
+        self._keys_found = None
+        self._has_key = len(self._key_counts) != 0
+
+    def content_digests(self) -> tuple:
+        """
+        KeyTextAnalysis => Method: content_digests() -> tuple
+        Digests the content of the matching inputs (ResultCache entry of
+        the analysis), text_dict is packed once (_pack_text)
+        -> tuple, (digest of _text_corpus and of _text_weights when
+        weighted, digest of the keys)
+        """
+        self._pack_text()
+        return (content_digest(self._text_corpus, self._text_weights),
+                content_digest(as_text_corpus(self._key_dict)))
+
+    def _pack_text(self) -> None:
+        """
+        KeyTextAnalysis => Method: _pack_text() -> None
+        Packs text_dict into _text_corpus (and its counts into
+        _text_weights when weighted), once per analysis
+        """
+        if self._text_corpus is not None:
+            return
+        self._text_corpus = as_text_corpus(self._text_dict)
+        self._text_weights = array('q', (
+            count or 1 for count in self._text_dict.values()
+        )) if self._weighted else None
+
+    @PROFILER.timed('tokenize')
+    def _tokenize_corpus(self) -> None:
+        """
+        KeyTextAnalysis => Method: _tokenize_corpus() -> None
+        Aligns the token tuples of the text with the lines of _text_corpus
+        and completes the token tuples of the keys, each item is tokenized
+        once (pre-tokenized items are reused, token ids aligned with the
+        items are used as is, the others are tokenized with a TokenCache of
+        this run only), then builds the inverted
+        TokenIndex unless the index passed at instantiation matches the text,
+        a prebuilt CorpusIndex provides both (no tokenizing, no build), as
+        compiled keys (CorpusIndex) provide the token tuples of the keys
+        """
+        text_tokens = self._text_tokens if self._text_tokens else {}
+        key_tokens = self._key_tokens if self._key_tokens else {}
+        cache = TokenCache()
+        if isinstance(self._key_dict, CorpusIndex):
+            key_tokens = self._key_dict.line_tokens
+        if isinstance(key_tokens, TokenLines):
+            key_tokens = dict(zip(self._key_dict, key_tokens))
+        if isinstance(self._text_dict, CorpusIndex):
+            self._line_tokens = self._text_dict.line_tokens
+            self._token_index = self._text_dict.token_index
+        elif isinstance(text_tokens, TokenLines) and \
+                len(text_tokens) == len(self._text_dict):
+            # token ids aligned with the items (ItemizeFileData.tokens)
+            self._line_tokens = text_tokens
+        else:
+            if isinstance(text_tokens, TokenLines):
+                text_tokens = {}
+            self._line_tokens = [
+                text_tokens[item] if item in text_tokens
+                else cache.tokens(item)
+                for item in self._text_dict]
+        self._key_tokens = {
+            key: key_tokens[key] if key in key_tokens
+            else cache.tokens(key)
+            for key in self._key_dict}
+        if self._token_index is None or \
+                not self._token_index.matches(self._line_tokens):
+            self._token_index = TokenIndex(self._line_tokens)
+
+    @PROFILER.timed('index')
+    def _prepare_matcher(self) -> tuple:
+        """
+        KeyTextAnalysis => Method: _prepare_matcher() -> tuple
+        Resolves the matching mode ('auto' picks 'line' when the key
+        dictionary is larger than the text) and builds the indexes
+        of the mode
+
+        Returns
+        -------
+        -> tuple, (worker class, MatchInputs, work units, total items)
+        """
+        if self._mode == 'auto':
+            self._run_mode = 'line' \
+                if len(self._key_dict) > len(self._text_dict) else 'key'
+        else:
+            self._run_mode = self._mode
+        if self._run_mode == 'line':
+            self._match_stats.indexes = {
+                'direct': 'key automaton',
+                'tokenized': 'token index',
+                'fuzzy': 'key q-gram index'}
+            token_keys = self._index_keys()
+            inputs = MatchInputs(
+                self._text_corpus, self._fuzz_ratio,
+                weights=self._text_weights,
+                token_index=self._token_index,
+                automaton=self._automaton,
+                token_keys=token_keys,
+                key_qgram_index=self._key_qgram_index)
+            return LineThreader, inputs, \
+                self._line_units(), len(self._text_corpus)
+        self._match_stats.indexes = {
+            'direct': 'automaton' if self._engine == 'aho' else 'scan',
+            'tokenized': 'token index',
+            'fuzzy': 'q-gram index'}
+        self._qgram_index = QGramIndex(self._text_corpus)
+        inputs = MatchInputs(
+            self._text_corpus, self._fuzz_ratio,
+            weights=self._text_weights,
+            direct=self._find_direct_hits(),
+            token_index=self._token_index,
+            key_tokens=self._key_tokens,
+            qgram_index=self._qgram_index)
+        return KeyThreader, inputs, self._work_units(), len(self._key_dict)
+
+    def _run_thread_pool(self, matcher, inputs, units, pbar) -> None:
+        """
+        KeyTextAnalysis => Method: _run_thread_pool(matcher: type,
+                                                    inputs: MatchInputs,
+                                                    units: generator,
+                                                    pbar: tqdm) -> None
+        Runs the work units on a pool of _jobs matcher threads (KeyThreader
+        or LineThreader) and merges the matches of each worker into
+        _key_counts
+        """
+        work = Queue()
+        for unit in units:
+            work.put(unit)
+        if matcher is KeyThreader:
+            # every key reads the lines: decoded once for all the threads
+            inputs = inputs._replace(lines=inputs.text.lines())
+        key_threader = [
+            matcher(work, inputs, pbar=pbar)
+            for _ in range(min(self._jobs, work.qsize()))
+        ]
+        for worker in key_threader:
+            worker.start()
+            self._total_threads += 1
+        for worker in key_threader:
+            worker.join()
+            self._merge_key_found(worker.key_found)
+            self._match_stats.merge(worker.stats)
+            if worker.times is not None:
+                PROFILER.merge(worker.times)
+
+    def _run_process_pool(self, matcher, inputs, units, pbar) -> None:
+        """
+        KeyTextAnalysis => Method: _run_process_pool(matcher: type,
+                                                     inputs: MatchInputs,
+                                                     units: generator,
+                                                     pbar: tqdm) -> None
+        Runs the work units on a pool of _jobs processes, the text and
+        indexes are sent once to each process (initializer), the matches
+        of each work unit are merged into _key_counts as they complete
+        """
+        with ProcessPoolExecutor(
+            max_workers=self._jobs,
+            initializer=_init_process_worker,
+            initargs=(
+                matcher, inputs, PROFILER.enabled, PROFILER.tracing)
+        ) as executor:
+            self._total_threads += self._jobs
+            futures = [
+                executor.submit(_process_work_unit, unit)
+                for unit in units
+            ]
+            for future in as_completed(futures):
+                unit_size, key_found, times, events, stats = future.result()
+                self._merge_key_found(key_found)
+                self._match_stats.merge(stats)
+                if times is not None:
+                    PROFILER.merge(times)
+                PROFILER.add_events(events)
+                pbar.update(unit_size)
+
+    def _merge_key_found(self, key_found) -> None:
+        """
+        KeyTextAnalysis => Method: _merge_key_found(key_found: dict) -> None
+        Adds the match counts of a worker (or work unit) to _key_counts
+        """
+        for key, count in key_found.items():
+            self._key_counts[key] += count
+            self._keys2text_index[key] = self._key_counts[key]
+
+    def _order_key_counts(self) -> None:
+        """
+        KeyTextAnalysis => Method: _order_key_counts() -> None
+        Puts _key_counts (and _keys2text_index) in the order of key_dict,
+        the workers complete in any order, so the keys with equal counts
+        are then listed alike by both modes and any number of jobs
+        """
+        counts = self._key_counts
+        index = self._keys2text_index
+        self._key_counts = defaultdict(int, (
+            (key, counts[key]) for key in self._key_dict if key in counts))
+        self._keys2text_index = defaultdict(list, (
+            (key, index[key]) for key in self._key_counts if key in index))
+
+    def _work_units(self):
+        """
+        KeyTextAnalysis => Method: _work_units() -> generator
+        Batches the keys of the key dictionary (key_dict) into work
+        units of _chunk_size keys
+
+        Returns
+        -------
+        -> generator, work units (list of keys) for the worker pool
+        """
+        unit = []
+        for key in self._key_dict:
+            unit.append(key)
+            if len(unit) == self._chunk_size:
+                yield unit
+                unit = []
+        if unit:
+            yield unit
+
+    def _line_units(self):
+        """
+        KeyTextAnalysis => Method: _line_units() -> generator
+        Batches the lines of _text_corpus into work units of _chunk_size
+        lines (line-driven mode)
+
+        Returns
+        -------
+        -> generator, work units (range of line ids) for the worker pool
+        """
+        for start in range(0, len(self._text_corpus), self._chunk_size):
+            yield range(
+                start, min(start + self._chunk_size, len(self._text_corpus)))
+
+    def _index_keys(self) -> dict:
+        """
+        KeyTextAnalysis => Method: _index_keys() -> dict
+        Builds the key-side indexes of the line-driven mode, the keys
+        compiled in a KeyAutomaton (prefix trie, direct tier) and their
+        QGramIndex (fuzzy tier), ids follow the order of key_dict
+
+        Returns
+        -------
+        -> dict, key=>[tokens]: tuple, item=>[key ids]: list (tokenized tier)
+        """
+        self._automaton = self._key_automaton()
+        self._key_qgram_index = QGramIndex(self._automaton.keys)
+        token_keys = defaultdict(list)
+        for kid, key in enumerate(self._automaton.keys):
+            token_keys[self._key_tokens[key]].append(kid)
+        return dict(token_keys)
+
+    def _key_automaton(self) -> KeyAutomaton:
+        """
+        KeyTextAnalysis => Method: _key_automaton() -> KeyAutomaton
+        -> KeyAutomaton, of the key dictionary (key_dict), read from the
+        compiled keys (keycollator compile-keys) when key_dict holds one
+        """
+        automaton = getattr(self._key_dict, 'automaton', None)
+        return automaton if automaton is not None \
+            else KeyAutomaton(self._key_dict)
+
+    @PROFILER.timed('direct')
+    def _find_direct_hits(self) -> dict:
+        """
+        KeyTextAnalysis => Method: _find_direct_hits() -> dict
+        With engine='aho' compiles the key dictionary (key_dict) into a
+        KeyAutomaton and scans each line of the text dictionary (text_dict)
+        once, collecting the direct matches of every key (the scan time
+        is counted in the direct tier of _match_stats)
+
+        Returns
+        -------
+        -> dict, key=>[key]: str, item=>[line numbers (0-based)]: set
+        -> None, if engine is 'scan'
+        """
+        if self._engine != 'aho':
+            return None
+        self._automaton = self._key_automaton()
+        start = time.perf_counter()
+        keys = self._automaton.keys
+        direct_hits = {key: set() for key in keys}
+        for line, item in enumerate(self._text_corpus):
+            for kid in self._automaton.find(item):
+                direct_hits[keys[kid]].add(line)
+        self._match_stats.add(
+            'direct', seconds=time.perf_counter() - start)
+        return direct_hits
+
     def _eval_direct_match(self, key, item) -> bool:
         """
         KeyTextAnalysis => Method: _eval_direct_match(key, item) -> bool
@@ -442,7 +1468,7 @@ class KeyTextAnalysis:
         """
         if key in item:
             self._total_keys_found += 1
-            self._keys_found[key] += 1
+            self._key_counts[key] += 1
             self._has_key = True
             return True
         return False
@@ -461,7 +1487,7 @@ class KeyTextAnalysis:
         item_string = str(word_tokenize(item))
         if key_string in item_string:
             self._total_keys_found += 1
-            self._keys_found[key] += 1
+            self._key_counts[key] += 1
             self._has_key = True
             return True
         return False
@@ -481,33 +1507,19 @@ class KeyTextAnalysis:
         """
         if fuzz.partial_ratio(key, item) >= self._fuzz_ratio:
             self._total_keys_found += 1
-            self._keys_found[key] += 1
+            self._key_counts[key] += 1
             self._has_key = True
             return True
         return False
 
-    def _sort_keys_found(self) -> bool:
+    @PROFILER.timed('sort')
+    def _sort_keys_found(self) -> None:
         """
-        KeyTextAnalysis => Method: _sort_keys_found() -> bool
-        Sorts the keys_found (dict) in descending order
-        keys:=str, unique text (lines) from file filename
-        items:=int, iterative count, init to 0, increments
-        on every match added to the dictionary
-
-        post-condition:=First item/key (unique str) has the greatest
-        number of matches found in the text dictionary (text_dict)
-
-        Returns
-        -------
-        -> bool, True if has matches, otherwise False
+        KeyTextAnalysis => Method: _sort_keys_found() -> None
+        Sorts _key_counts into _keys_found by count descending (select_keys
+        without limits, ties keep the order of key_dict)
         """
-        if self._has_key:
-            self._keys_found = dict(sorted(
-                self._keys_found.items(),
-                key=lambda item: item[1],
-                reverse=True))
-            return True
-        return False
+        self._keys_found = select_keys(self._key_counts)
 
     def echo_keys_found(self) -> bool:
         """
@@ -515,17 +1527,16 @@ class KeyTextAnalysis:
         Prints the dictionary of key matches to console
         -> bool, True if has_matches, False otherwise
         """
-        if self._sort_keys_found():
+        if self._has_key:
+            keys_found = self.keys_found
             col_dict = defaultdict(list)
-            for i, item in enumerate(self._keys_found):
-                temp_str = "{0}.{1}".format(i + 1, item)
-                col_dict[
-                    i // (len(self._keys_found) // 4)
-                ].append("{0}[{1}]".format(
-                    ((temp_str + const.FSPC[0:(18 - len(temp_str))])
-                        if len(temp_str) <= 18
-                        else "{0}*".format(temp_str[0:17])),
-                    self._keys_found[item]))
+            per_column = -(-len(keys_found) // 4)
+            for i, item in enumerate(keys_found):
+                temp_str = f"{i + 1}.{item}"
+                cell = (temp_str + const.FSPC[0:(18 - len(temp_str))]) \
+                    if len(temp_str) <= 18 else f"{temp_str[0:17]}*"
+                col_dict[i // per_column].append(
+                    f"{cell}[{keys_found[item]}]")
             rows = max([
                 len(col_dict[0]),
                 len(col_dict[1]),
@@ -540,12 +1551,10 @@ class KeyTextAnalysis:
                     col_dict[2][row] if row < len(col_dict[2]) else "",
                     const.TAB,
                     col_dict[3][row] if row < len(col_dict[3]) else "")
-            print(
-                "*denotes truncated text [Analysis completed {0} threads]".format(
-                    self._total_threads))
+            print("*denotes truncated text "
+                  f"[Analysis completed {self._total_threads} threads]")
             return True
-        else:
-            return False
+        return False
 
     def echo_keys2text_indexed(self) -> bool:
         """
@@ -595,14 +1604,14 @@ class KeyTextAnalysis:
         -------
         -> bool, True if logs are dumped, otherwise False
         """
-        if len(self._keys_found) != 1:
+        keys_found = self.keys_found
+        if len(keys_found) != 1:
             key_match_list = []
-            for key in self._keys_found:
-                key_match_list.append([key, self._keys_found[key]])
+            for key in keys_found:
+                key_match_list.append([key, keys_found[key]])
             joblib.dump(key_match_list, 'keys_found_dump.z')
             return True
-        else:
-            return False
+        return False
 
     def run_keys2text_all(self) -> bool:
         """
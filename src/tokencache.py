@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Function: tokenize_items(items: iterable) -> TokenLines
+    Class: TokenCache
+        └──obj = TokenCache([max_items]: int, optional) -> obj
+
+Tokenizes each distinct item once (nltk word_tokenize), keeping only the
+tokens longer than MIN_TOKEN_LEN characters, so the matching tiers compare
+stored token tuples instead of re-tokenizing for every key/line pair
+
+The tokens of an itemized file are token id columns aligned with its items
+(tokenize_items), each distinct token is held once, not a str copy of
+every item, the TokenCache only memoizes the items tokenized on demand and
+holds at most max_items of them
+"""
+from array import array
+
+from nltk.tokenize import word_tokenize
+
+from tokenindex import TokenLines
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+MIN_TOKEN_LEN = 3
+MAX_ITEMS = 65536
+
+
+def tokenize(text) -> tuple:
+    """
+    Function: tokenize(text: str) -> tuple
+    -> tuple, tokens of text longer than MIN_TOKEN_LEN characters
+    """
+    return tuple(s for s in word_tokenize(text) if len(s) > MIN_TOKEN_LEN)
+
+
+def tokenize_items(items) -> TokenLines:
+    """
+    Function: tokenize_items(items: iterable) -> TokenLines
+    Tokenizes each item once, in iteration order (the items of an
+    ItemizedCorpus are distinct, nothing is memoized)
+    -> TokenLines, token ids of each item, aligned with items
+    """
+    vocab = {}
+    offsets = array('q', [0])
+    ids = array('i')
+    for item in items:
+        for token in tokenize(item):
+            tid = vocab.get(token)
+            if tid is None:
+                tid = vocab[token] = len(vocab)
+            ids.append(tid)
+        offsets.append(len(ids))
+    return TokenLines(tuple(vocab), offsets, ids)
+
+
+class TokenCache:
+    """
+    Class: TokenCache
+        └──obj = TokenCache([max_items]: int, optional) -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _cache:=dict, key=>[item]: str, item=>[tokens]: tuple
+    _max_items:=int, items memoized before _cache is emptied
+
+    Methods
+    -------
+    tokens(text: str) -> tuple: Tokens of text, tokenized once while cached
+    clear() -> None: Empties the cache
+
+    Parameters
+    ----------
+    max_items:=int, optional, items memoized before the cache is emptied,
+        default=MAX_ITEMS
+    """
+
+    def __init__(self, max_items=MAX_ITEMS) -> None:
+        """
+        TokenCache => Method:__init__ to instantiate class attributes
+            └──obj = TokenCache([max_items]: int, optional) -> obj
+        """
+        self._cache = {}
+        self._max_items = max_items
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, text) -> bool:
+        return text in self._cache
+
+    def tokens(self, text) -> tuple:
+        """
+        TokenCache => Method: tokens(text: str) -> tuple
+        Tokenizes text unless cached, a full cache is emptied first (single
+        dict operations, safe between the threads of a pool)
+        -> tuple, tokens of text longer than MIN_TOKEN_LEN characters
+        """
+        toks = self._cache.get(text)
+        if toks is None:
+            if len(self._cache) >= self._max_items:
+                self._cache.clear()
+            toks = self._cache[text] = tokenize(text)
+        return toks
+
+    def clear(self) -> None:
+        """
+        TokenCache => Method: clear() -> None
+        """
+        self._cache.clear()
+
+
+TOKEN_CACHE = TokenCache()
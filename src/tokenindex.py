@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+    Class: TokenIndex
+        └──obj = TokenIndex(lines: list) -> obj
+    Class: TokenLines
+        └──obj = TokenLines(vocab: tuple, offsets: array, ids: array) -> obj
+
+Inverted index from token to the ids (position) of the lines containing
+it, built once over the token tuples of the itemized text, answers which
+lines contain a token sequence by intersecting posting lists (rarest first)
+then checking the order of the tokens in the candidate lines
+"""
+from array import array
+from collections.abc import Sequence
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+
+class TokenIndex:
+    """
+    Class: TokenIndex
+        └──obj = TokenIndex(lines: list) -> obj
+
+    ...
+
+    Attributes
+    ----------
+    _lines:=list, token tuple of each line, the position is the line id
+    _postings:=dict, key=>[token]: str, item=>[sorted line ids]: array('i')
+    _empty:=array('i'), ids of the lines without tokens
+
+    Methods
+    -------
+    from_postings(lines, postings, empty) -> TokenIndex: Prebuilt index
+    matches(lines: list) -> bool: True if built over the same token tuples
+    lines_with_sequence(tokens: tuple) -> list: Lines containing tokens
+        contiguously and in order
+    lines_equal(tokens: tuple) -> list: Lines whose tokens equal tokens
+
+    Parameters
+    ----------
+    lines:=list, token tuple of each line of the text
+    """
+
+    def __init__(self, lines) -> None:
+        """
+        TokenIndex => Method:__init__ to instantiate class attributes
+            └──obj = TokenIndex(lines: list) -> obj
+        """
+        self._lines = lines
+        self._empty = array('i')
+        postings = {}
+        for lid, tokens in enumerate(lines):
+            if not tokens:
+                self._empty.append(lid)
+            for token in dict.fromkeys(tokens):
+                posting = postings.get(token)
+                if posting is None:
+                    posting = postings[token] = array('i')
+                posting.append(lid)
+        self._postings = postings
+
+    @classmethod
+    def from_postings(cls, lines, postings, empty) -> 'TokenIndex':
+        """
+        TokenIndex => Method: from_postings(lines: Sequence, postings: Mapping,
+                                            empty: Sequence) -> TokenIndex
+        Index over prebuilt token tuples and posting lists (e.g. read
+        in place from a CorpusIndex), nothing is recomputed
+        """
+        index = cls.__new__(cls)
+        index._lines = lines
+        index._postings = postings
+        index._empty = empty
+        return index
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __contains__(self, token) -> bool:
+        return token in self._postings
+
+    @property
+    def lines(self) -> list:
+        """
+        TokenIndex => Property: lines() -> list
+        -> list, token tuple of each line
+        """
+        return self._lines
+
+    @property
+    def vocabulary(self) -> int:
+        """
+        TokenIndex => Property: vocabulary() -> int
+        -> int, number of distinct tokens
+        """
+        return len(self._postings)
+
+    def matches(self, lines) -> bool:
+        """
+        TokenIndex => Method: matches(lines: list) -> bool
+        -> bool, True if the index was built over the same token tuples
+        (the index can be reused for this text), otherwise False
+        """
+        return self._lines is lines or self._lines == lines
+
+    def posting(self, token) -> array:
+        """
+        TokenIndex => Method: posting(token: str) -> array
+        -> array('i'), sorted ids of the lines containing token
+        """
+        return self._postings.get(token, array('i'))
+
+    def lines_with_sequence(self, tokens) -> list:
+        """
+        TokenIndex => Method: lines_with_sequence(tokens: tuple) -> list
+        Intersects the posting lists of tokens, rarest first, then keeps
+        the lines containing tokens contiguously and in order
+        -> list, sorted line ids
+        """
+        if not tokens:
+            return list(range(len(self._lines)))
+        postings = []
+        for token in set(tokens):
+            posting = self._postings.get(token)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        size = len(tokens)
+        found = []
+        for lid in sorted(candidates):
+            line = self._lines[lid]
+            start = line.index(tokens[0])
+            while start <= len(line) - size:
+                if line[start:start + size] == tokens:
+                    found.append(lid)
+                    break
+                try:
+                    start = line.index(tokens[0], start + 1)
+                except ValueError:
+                    break
+        return found
+
+    def lines_equal(self, tokens) -> list:
+        """
+        TokenIndex => Method: lines_equal(tokens: tuple) -> list
+        -> list, sorted ids of the lines whose token tuple equals tokens
+        """
+        if not tokens:
+            return list(self._empty)
+        size = len(tokens)
+        return [
+            lid for lid in self.lines_with_sequence(tokens)
+            if len(self._lines[lid]) == size]
+
+
+class TokenLines(Sequence):
+    """
+    Class: TokenLines
+        └──obj = TokenLines(vocab: tuple, offsets: array, ids: array) -> obj
+
+    Token tuple of each line, held as token id columns (the distinct
+    tokens once in vocab) and decoded from the token ids when a line is
+    read (sequence of tuples, like TokenIndex.lines), e.g. the tokens of an
+    ItemizedCorpus (tokenize_items) or read in place from a CorpusIndex
+
+    Methods
+    -------
+    vocabulary -> tuple: Token of each token id
+
+    Parameters
+    ----------
+    vocab:=tuple, token of each token id
+    offsets:=array('q'), token ids of line i at ids[offsets[i]:offsets[i + 1]]
+    ids:=array('i'), token ids of the lines
+    """
+
+    __slots__ = ('_vocab', '_offsets', '_ids')
+
+    def __init__(self, vocab, offsets, ids) -> None:
+        """
+        TokenLines => Method:__init__ to instantiate class attributes
+            └──obj = TokenLines(vocab: tuple, offsets: array,
+                                ids: array) -> obj
+        """
+        self._vocab = vocab
+        self._offsets = offsets
+        self._ids = ids
+
+    def __reduce__(self) -> tuple:
+        return (type(self), (
+            self._vocab, array('q', self._offsets), array('i', self._ids)))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index) -> tuple:
+        vocab = self._vocab
+        return tuple(vocab[tid] for tid in self._ids[
+            self._offsets[index]:self._offsets[index + 1]])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or len(self) != len(other):
+            return False
+        return all(mine == theirs for mine, theirs in zip(self, other))
+
+    __hash__ = None
+
+    @property
+    def vocabulary(self) -> tuple:
+        """
+        TokenLines => Property: vocabulary() -> tuple
+        -> tuple, token of each token id
+        """
+        return self._vocab
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2022 Rush Solutions, LLC
+Author: David Rush <davidprush@gmail.com>
+License: MIT
+
+Shared fixtures of the tests: the modules of src are imported by bare name
+(as they import each other), the token tuples are split on spaces (the
+matching tests pass them pre-tokenized, no nltk data is needed)
+"""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# pylint: disable=wrong-import-position
+import tokencache  # noqa: E402
+# pylint: enable=wrong-import-position
+
+__author__ = "David Rush"
+__copyright__ = "Copyright 2022, Rush Solutions, LLC"
+__credits__ = ["David Rush", "...", "...", "..."]
+__license__ = "MIT"
+__version__ = "0.0.5"
+__maintainer__ = "David Rush"
+__email__ = "davidprush@gmail.com"
+__status__ = "Development"
+
+WORDS = (
+    "account", "balance", "ledger", "invoice", "payment", "vendor",
+    "customer", "report", "journal", "entry", "audit", "revenue", "asset",
+    "tax", "net", "due")
+
+
+def split_tokens(items) -> dict:
+    """
+    Function: split_tokens(items: iterable) -> dict
+    -> dict, key=>[item]: str, item=>[tokens]: tuple, words of each item
+    longer than MIN_TOKEN_LEN characters (tokenize without nltk)
+    """
+    return {item: tuple(
+        word for word in item.split()
+        if len(word) > tokencache.MIN_TOKEN_LEN) for item in items}
+
+
+def random_line(rnd, words=(1, 8)) -> str:
+    """
+    Function: random_line(rnd: random.Random, [words]: tuple) -> str
+    -> str, words of WORDS (a few with a number) joined by spaces
+    """
+    return ' '.join(
+        rnd.choice(WORDS) + (str(rnd.randint(0, 9)) if rnd.random() < .2
+                             else '')
+        for _ in range(rnd.randint(*words)))
+
+
+@pytest.fixture(name='rnd')
+def fixture_rnd():
+    """
+    Fixture: rnd -> random.Random, seeded for repeatable corpora
+    """
+    return random.Random(7)
+
+
+@pytest.fixture
+def make_lines(rnd):
+    """
+    Fixture: make_lines -> function(count: int, [words]: tuple) -> list,
+    random lines of rnd
+    """
+    return lambda count, words=(1, 8): [
+        random_line(rnd, words) for _ in range(count)]
+
+
+@pytest.fixture
+def tokens_of():
+    """
+    Fixture: tokens_of -> function(items: iterable) -> dict, split_tokens
+    """
+    return split_tokens
+
+
+@pytest.fixture
+def split_tokenizer(monkeypatch):
+    """
+    Fixture: split_tokenizer -> None, the token cache splits on spaces
+    (runs through the cli without the nltk tokenizer data)
+    """
+    monkeypatch.setattr(tokencache, 'word_tokenize', str.split)
+
+
+@pytest.fixture
+def in_tmp_path(tmp_path, monkeypatch):
+    """
+    Fixture: in_tmp_path -> None, runs the test in tmp_path (the analysis
+    dumps its results in the working directory)
+    """
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,68 @@
+"""Tests of the compiled keys (KeyAutomaton arrays in a corpus index)."""
+import pytest
+
+from corpusindex import CorpusIndex, write_corpus_index
+from keyautomaton import KeyAutomaton
+from threadanalysis import KeyTextAnalysis
+
+
+def test_to_arrays_from_arrays_round_trip(make_lines):
+    """from_arrays restores an automaton that finds the same keys."""
+    keys = sorted(set(make_lines(80, (1, 3)))) + ['', 'a', 'due']
+    automaton = KeyAutomaton(keys)
+    arrays = automaton.to_arrays()
+    restored = KeyAutomaton.from_arrays(keys, arrays)
+    assert restored.keys == automaton.keys
+    assert restored.nodes == automaton.nodes
+    assert restored.to_arrays() == arrays
+    for line in make_lines(200) + ['', 'due']:
+        assert restored.find(line) == automaton.find(line)
+        assert restored.find_keys(line) == {k for k in keys if k in line}
+
+
+def test_from_arrays_of_memoryviews(make_lines):
+    """from_arrays reads the tables from memoryviews."""
+    keys = sorted(set(make_lines(30, (1, 2))))
+    automaton = KeyAutomaton(keys)
+    views = {name: memoryview(table)
+             for name, table in automaton.to_arrays().items()}
+    restored = KeyAutomaton.from_arrays(keys, views)
+    for line in make_lines(100):
+        assert restored.find(line) == automaton.find(line)
+
+
+@pytest.mark.usefixtures('in_tmp_path')
+def test_compiled_keys_restore_the_automaton(tmp_path, make_lines, tokens_of):
+    """Compiled keys find the same matches as the key dict."""
+    keys = dict.fromkeys(make_lines(40, (1, 3)), 1)
+    tokens = tokens_of(keys)
+    automaton = KeyAutomaton(keys)
+    path = str(tmp_path / 'keys.txt.kck')
+    write_corpus_index(
+        path, keys, [tokens[key] for key in keys], automaton=automaton)
+    compiled = CorpusIndex(path)
+    text = dict.fromkeys(make_lines(200), 1)
+    try:
+        assert compiled.automaton.keys == list(keys)
+        assert compiled.automaton.to_arrays() == automaton.to_arrays()
+        found = {}
+        for key_dict in (keys, compiled):
+            analysis = KeyTextAnalysis(
+                text, key_dict, 90, engine='aho', text_tokens=tokens_of(text),
+                key_tokens=tokens)
+            analysis.run_keys2text_all()
+            found[type(key_dict).__name__] = dict(analysis.keys_found)
+        assert found['CorpusIndex'] == found['dict']
+    finally:
+        compiled.close()
+
+
+def test_index_without_automaton(tmp_path):
+    """An index written without automaton has none."""
+    path = str(tmp_path / 'text.kci')
+    write_corpus_index(path, {'tax due': 1}, [()])
+    index = CorpusIndex(path)
+    try:
+        assert index.automaton is None
+    finally:
+        index.close()
@@ -0,0 +1,130 @@
+"""Tests of the prebuilt corpus index (corpusindex) and of the TokenIndex."""
+import os
+
+import pytest
+
+from corpusindex import (
+    CorpusIndex, index_is_current, index_is_stale, is_corpus_index,
+    write_corpus_index)
+from extractfile import ItemizeFileData
+from stopwords import StopWords
+from tokenindex import TokenIndex
+
+pytestmark = pytest.mark.usefixtures('split_tokenizer')
+
+
+def contains(line, tokens) -> bool:
+    """Whether tokens is a contiguous run of the tokens of line."""
+    return any(
+        tuple(line[start:start + len(tokens)]) == tokens
+        for start in range(len(line) - len(tokens) + 1))
+
+
+@pytest.fixture(name='text_file')
+def fixture_text_file(tmp_path, make_lines):
+    """Fixture: text_file -> str, text file with repeated lines."""
+    lines = make_lines(300)
+    lines += lines[:100] + ['', 'the', 'net due']
+    path = tmp_path / 'text.txt'
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+@pytest.fixture(name='itemized')
+def fixture_itemized(text_file):
+    """Fixture: itemized -> ItemizeFileData, text_file tokenized."""
+    ifd = ItemizeFileData(text_file, StopWords(['the']))
+    ifd.itemize_file()
+    ifd.tokenize_items()
+    return ifd
+
+
+def test_lines_with_sequence_and_lines_equal(make_lines, tokens_of):
+    """The TokenIndex lookups equal a scan of the token tuples."""
+    items = make_lines(200)
+    lines = [tokens_of([item])[item] for item in items]
+    index = TokenIndex(lines)
+    queries = {line[i:j] for line in lines[:40]
+               for i in range(len(line)) for j in range(i + 1, len(line) + 1)}
+    queries |= {('ledger', 'ledger'), ('zzzz',), ()}
+    for query in queries:
+        assert index.lines_with_sequence(query) == [
+            lid for lid, line in enumerate(lines) if contains(line, query)]
+        assert index.lines_equal(query) == [
+            lid for lid, line in enumerate(lines) if tuple(line) == query]
+
+
+def test_write_and_load_round_trip(tmp_path, itemized):
+    """A written index loads the corpus, tokens and metadata."""
+    path = str(tmp_path / 'text.kci')
+    header = itemized.write_index(path)
+    assert is_corpus_index(path)
+    assert not is_corpus_index(itemized.filename)
+    corpus = itemized.itemized_text
+    assert header['lines'] == len(corpus)
+    index = CorpusIndex(path)
+    try:
+        assert list(index) == list(corpus)
+        assert list(index.values()) == list(corpus.values())
+        assert list(index.first_lines) == list(corpus.first_lines)
+        assert index.metadata['source'] == os.path.abspath(itemized.filename)
+        assert list(index.line_tokens) == list(itemized.tokens)
+        built = TokenIndex(list(itemized.tokens))
+        for tokens in set(itemized.tokens):
+            assert index.token_index.lines_equal(tokens) == \
+                built.lines_equal(tokens)
+            assert index.token_index.lines_with_sequence(tokens[:2]) == \
+                built.lines_with_sequence(tokens[:2])
+        for item in list(corpus)[:50]:
+            assert index[item] == corpus[item]
+        assert index.index('not an item') == -1
+    finally:
+        index.close()
+
+
+def test_itemize_reads_the_index_in_place(tmp_path, itemized):
+    """ItemizeFileData reads an index file without itemizing."""
+    path = str(tmp_path / 'text.kci')
+    itemized.write_index(path)
+    loaded = ItemizeFileData(path, StopWords(['the']))
+    loaded.itemize_file()
+    assert isinstance(loaded.itemized_text, CorpusIndex)
+    assert list(loaded.itemized_text) == list(itemized.itemized_text)
+    assert loaded.unique_item_count == itemized.unique_item_count
+    assert loaded.file_item_count == itemized.file_item_count
+
+
+def test_index_is_stale(tmp_path, text_file, itemized):
+    """An index is stale once the content of its source changes."""
+    path = str(tmp_path / 'text.kci')
+    metadata = itemized.write_index(path)['metadata']
+    assert not index_is_stale(metadata)
+    assert index_is_current(path, text_file)
+    os.utime(text_file, (1, 1))
+    assert not index_is_stale(metadata)
+    with open(text_file, 'r+', encoding='utf-8') as fh:
+        text = fh.read()
+        fh.seek(0)
+        fh.write(text.replace('a', 'b', 1))
+    assert index_is_stale(metadata)
+    assert not index_is_current(path, text_file)
+    with open(text_file, 'a', encoding='utf-8') as fh:
+        fh.write('account\n')
+    assert index_is_stale(metadata)
+    assert not index_is_stale({})
+    assert not index_is_stale({'source': str(tmp_path / 'missing.txt')})
+
+
+def test_write_corpus_index_of_a_dict(tmp_path, tokens_of):
+    """A plain dict of items is written and loaded back."""
+    corpus = {'tax due': 2, 'net 30': 1, '': 1}
+    tokens = tokens_of(corpus)
+    path = str(tmp_path / 'dict.kci')
+    write_corpus_index(path, corpus, [tokens[item] for item in corpus])
+    index = CorpusIndex(path)
+    try:
+        assert dict(index.items()) == corpus
+        assert list(index.first_lines) == [0, 1, 2]
+        assert index.token_index.lines_equal(()) == [0, 1, 2]
+    finally:
+        index.close()
@@ -0,0 +1,139 @@
+"""Tests of the line sources of the text file (extractfile)."""
+import pytest
+
+from extractfile import ItemizeFileData, byte_ranges, iter_blocks, line_end
+from sanitizer import sanitize_buffer
+
+END_LINES = ('\n', '\r\n', '\r')
+
+LINE_CASES = {
+    'crlf': 'alpha beta\r\ngamma delta\r\nalpha beta\r\n',
+    'bare cr': 'alpha beta\rgamma delta\nepsilon\n',
+    'mixed': 'Tax Due\rtax due\r\nnet  30\n\rTAX DUE!\r\n\r\ntax due',
+    'no final end line': 'alpha beta\ngamma delta',
+    'final bare cr': 'alpha beta\r',
+    'blank lines': '\r\n\r\n\r\n\n\r',
+    'empty': '',
+}
+STRADDLE = 'ab\r\ncd\r\r\nef\rgh\n\ri j\r\n' * 5
+
+
+def itemize(file_name, **options) -> tuple:
+    """Itemizes a file, the items with their counts, origins and lines."""
+    data = ItemizeFileData(file_name, **options)
+    data.itemize_file()
+    corpus = data.itemized_text
+    return (dict(corpus.items()),
+            {item: corpus.first_line(item) for item in corpus},
+            data.file_item_count)
+
+
+@pytest.fixture(name='write_text')
+def fixture_write_text(tmp_path):
+    """Writes text as utf-8 bytes (end lines kept as is) to a file."""
+    def write(text, name='text.txt'):
+        path = tmp_path / name
+        path.write_bytes(text.encode('utf-8'))
+        return str(path)
+    return write
+
+
+@pytest.mark.parametrize('text', LINE_CASES.values(), ids=LINE_CASES.keys())
+def test_line_sources_agree(write_text, text):
+    """List, stream and mmap give the same items, counts and origins."""
+    file_name = write_text(text)
+    expected = itemize(file_name)
+    assert itemize(file_name, stream=True) == expected
+    assert itemize(file_name, mapped=True) == expected
+
+
+def test_bare_cr_ends_a_line(write_text):
+    """A bare '\\r' ends a line of the memory-mapped file like text mode."""
+    file_name = write_text(LINE_CASES['bare cr'])
+    counts, origins, lines = itemize(file_name, mapped=True)
+    assert counts == {'alpha beta': 1, 'gamma delta': 1, 'epsilon': 1}
+    assert origins == {'alpha beta': 0, 'gamma delta': 1, 'epsilon': 2}
+    assert lines == 3
+
+
+def test_random_end_lines(write_text, rnd, make_lines):
+    """The line sources agree on random lines with mixed end lines."""
+    text = ''.join(
+        line + rnd.choice(END_LINES) for line in make_lines(500))
+    file_name = write_text(text + 'last line without end line')
+    expected = itemize(file_name)
+    assert expected[2] == 501
+    assert itemize(file_name, stream=True) == expected
+    assert itemize(file_name, mapped=True) == expected
+
+
+def test_raw_line_of_the_mapping(write_text):
+    """raw_line decodes the mapped lines with a '\\n' end line."""
+    file_name = write_text(LINE_CASES['mixed'])
+    data = ItemizeFileData(file_name, mapped=True)
+    data.itemize_file()
+    raw = ItemizeFileData(file_name).get_raw()
+    assert [data.raw_line(index) for index in range(len(raw))] == raw
+    data.close()
+
+
+@pytest.mark.parametrize('buffer, start, end, stop', [
+    (b'ab\ncd', 0, 5, 3),
+    (b'ab\r\ncd', 0, 6, 4),
+    (b'ab\rcd', 0, 5, 3),
+    (b'ab\r\ncd', 0, 3, 4),
+    (b'ab\r\ncd', 3, 6, 4),
+    (b'ab\r', 0, 3, 3),
+    (b'abcd', 0, 4, -1),
+])
+def test_line_end(buffer, start, end, stop):
+    """line_end finds the end of a line, a '\\r\\n' is never split."""
+    assert line_end(buffer, start, end) == stop
+
+
+@pytest.mark.parametrize('jobs', (2, 3, 7))
+@pytest.mark.parametrize('text', list(LINE_CASES.values()) + [STRADDLE],
+                         ids=list(LINE_CASES.keys()) + ['straddle'])
+def test_jobs_agree(write_text, text, jobs):
+    """jobs > 1 gives the items, counts, origins and lines of jobs=1."""
+    file_name = write_text(text)
+    assert itemize(file_name, jobs=jobs) == itemize(file_name)
+
+
+def test_jobs_agree_on_random_end_lines(write_text, rnd, make_lines):
+    """The byte ranges of random lines with mixed end lines agree."""
+    text = ''.join(
+        line + rnd.choice(END_LINES) for line in make_lines(2000))
+    file_name = write_text(text)
+    assert itemize(file_name, jobs=5) == itemize(file_name)
+
+
+def test_byte_ranges_are_aligned(write_text):
+    """The byte ranges cover the file and end after whole end lines."""
+    file_name = write_text(STRADDLE)
+    data = STRADDLE.encode('utf-8')
+    for parts in range(1, len(data) + 2):
+        ranges = byte_ranges(file_name, parts)
+        assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+        for (_, stop), (start, _) in zip(ranges, ranges[1:]):
+            assert stop == start
+            assert data[stop - 1:stop] in (b'\n', b'\r')
+            assert data[stop - 1:stop + 1] != b'\r\n'
+
+
+def test_blocks_are_aligned(write_text):
+    """Blocks of any size sanitize to the lines of the whole file."""
+    file_name = write_text(STRADDLE)
+    expected = sanitize_buffer(STRADDLE.encode('utf-8'))
+    for size in range(1, 12):
+        lines = []
+        for block in iter_blocks(file_name, size=size):
+            lines.extend(sanitize_buffer(block))
+        assert lines == expected
+
+
+def test_byte_ranges_of_bare_cr_lines(write_text):
+    """A file of bare '\\r' end lines is still split into byte ranges."""
+    file_name = write_text('alpha beta\r' * 40)
+    assert byte_ranges(file_name, 4) == [
+        (0, 110), (110, 220), (220, 330), (330, 440)]
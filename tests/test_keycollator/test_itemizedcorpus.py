@@ -0,0 +1,126 @@
+"""Tests of the compact store of the itemized text (itemizedcorpus)."""
+import pytest
+
+import itemizedcorpus
+from itemizedcorpus import CorpusColumn, ItemizedCorpus
+from threadanalysis import KeyTextAnalysis
+from tokencache import tokenize_items
+
+ODD_ITEMS = (
+    '', ' ', '  two  spaces ', '007 bond', '12 34', 'x1y22z333',
+    '0', '9 ', 'café ² ٣ digits', 'tab\there', 'a' * 300, '1' * 41)
+
+
+def fill(lines) -> tuple:
+    """Adds lines to a corpus, with the expected counts and origins."""
+    corpus = ItemizedCorpus()
+    counts = {}
+    origins = {}
+    for line, item in enumerate(lines):
+        origins.setdefault(item, line)
+        counts[item] = counts.get(item, 0) + 1
+        corpus.add(item, line)
+    return corpus, counts, origins
+
+
+@pytest.fixture(name='decoded')
+def fixture_decoded(monkeypatch):
+    """Codes decoded by the corpora of the test, in order."""
+    decoded = []
+    decode = ItemizedCorpus._decode  # pylint: disable=protected-access
+
+    def counted(self, data):
+        decoded.append(data)
+        return decode(self, data)
+    monkeypatch.setattr(ItemizedCorpus, '_decode', counted)
+    return decoded
+
+
+def test_lookup_counts_and_origins(rnd, make_lines):
+    """The corpus keeps the counts and first lines of a dict in order."""
+    lines = make_lines(400) + list(ODD_ITEMS)
+    lines += [rnd.choice(lines) for _ in range(400)]
+    corpus, counts, origins = fill(lines)
+    assert len(corpus) == len(counts)
+    assert list(corpus) == list(counts)
+    assert list(corpus.values()) == list(counts.values())
+    assert dict(corpus.items()) == counts
+    for item, count in counts.items():
+        assert item in corpus
+        assert corpus[item] == count
+        assert corpus.first_line(item) == origins[item]
+        assert corpus.first_lines[corpus.index(item)] == origins[item]
+    assert dict(CorpusColumn(corpus, corpus.first_lines)) == origins
+
+
+def test_missing_items(make_lines):
+    """Items never added are not found."""
+    corpus, _, _ = fill(make_lines(50))
+    for item in ('unknown words', 'account ledger zzz', '123456789'):
+        assert item not in corpus
+        assert corpus.index(item) == -1
+        with pytest.raises(KeyError):
+            _ = corpus[item]
+        with pytest.raises(KeyError):
+            corpus.first_line(item)
+
+
+def test_add_counts_and_returns_the_item_id():
+    """add counts the item and returns its id."""
+    corpus = ItemizedCorpus()
+    assert corpus.add('tax due', 3) == 0
+    assert corpus.add('net 30', 5, 4) == 1
+    assert corpus.add('tax due', 9, 2) == 0
+    assert list(corpus.items()) == [('tax due', 3), ('net 30', 4)]
+    assert list(corpus.first_lines) == [3, 5]
+
+
+def test_as_text_corpus_decodes_every_item(make_lines):
+    """as_text_corpus decodes every item in order."""
+    corpus, counts, _ = fill(make_lines(200) + list(ODD_ITEMS))
+    assert list(corpus.as_text_corpus()) == list(counts)
+
+
+def test_items_are_decoded_once(decoded, make_lines):
+    """Iterations and as_text_corpus share one decoding of the items."""
+    corpus, counts, _ = fill(make_lines(200))
+    text = corpus.as_text_corpus()
+    assert list(corpus) == list(counts)
+    assert dict(corpus.items()) == counts
+    assert corpus.as_text_corpus() is text
+    assert len(decoded) == len(counts)
+    corpus.add('brand new item', 999)
+    corpus.add('brand new item', 1000)
+    assert list(corpus)[-1] == 'brand new item'
+    assert len(decoded) == 2 * len(counts) + 1
+
+
+@pytest.mark.usefixtures('in_tmp_path', 'split_tokenizer')
+def test_analysis_decodes_the_items_once(decoded, make_lines):
+    """Tokenizing and a weighted analysis decode each item once."""
+    text, text_counts, _ = fill(make_lines(300) * 2)
+    keys, key_counts, _ = fill(make_lines(30, (1, 2)))
+    text_tokens = tokenize_items(text)
+    analysis = KeyTextAnalysis(
+        text, keys, 90, engine='aho', text_tokens=text_tokens)
+    analysis.content_digests()
+    analysis.keys2text_find()
+    assert analysis.text_corpus is text.as_text_corpus()
+    assert len(decoded) == len(text_counts) + len(key_counts)
+
+
+def test_full_vocabulary_stores_new_words_as_is(monkeypatch, make_lines):
+    """New words past MAX_WORDS are stored as is and still found."""
+    monkeypatch.setattr(itemizedcorpus, 'MAX_WORDS', 8)
+    lines = make_lines(300) + list(ODD_ITEMS)
+    corpus, counts, origins = fill(lines + lines[::3])
+    assert list(corpus) == list(counts)
+    assert list(corpus.values()) == list(counts.values())
+    assert all(corpus.first_line(item) == origins[item] for item in counts)
+    assert 'missing words' not in corpus
+
+
+def test_store_is_smaller_than_the_items(make_lines):
+    """The word-coded store takes fewer bytes than the items."""
+    corpus, counts, _ = fill(make_lines(2000))
+    assert corpus.nbytes < sum(len(item) for item in counts)
@@ -0,0 +1,40 @@
+"""Tests of the Aho-Corasick direct-match engine (keyautomaton, engine='aho')."""
+import pytest
+
+from keyautomaton import KeyAutomaton
+from threadanalysis import KeyTextAnalysis
+
+
+def test_find_keys_equals_substring_test(make_lines):
+    """find_keys returns the keys that are substrings of the line."""
+    keys = sorted(set(make_lines(60, (1, 2)))) + ['a', 'ent', 'tax tax']
+    automaton = KeyAutomaton(keys)
+    assert automaton.build()
+    for line in make_lines(300):
+        assert automaton.find_keys(line) == {k for k in keys if k in line}
+
+
+def test_empty_automaton_finds_nothing():
+    """An automaton without keys builds nothing and finds nothing."""
+    automaton = KeyAutomaton()
+    assert not automaton.build()
+    assert automaton.find_keys('account ledger') == set()
+
+
+@pytest.mark.usefixtures('in_tmp_path')
+@pytest.mark.parametrize('mode', ['key', 'line'])
+@pytest.mark.parametrize('fuzz_ratio', [0, 80, 100])
+def test_automaton_and_scan_find_the_same_keys(
+        make_lines, tokens_of, mode, fuzz_ratio):
+    """The aho engine finds the same keys and counts as the scan."""
+    text = dict.fromkeys(make_lines(300), 1)
+    keys = dict.fromkeys(make_lines(40, (1, 3)) + ['zzz', 'a'], 0)
+    found = {}
+    for engine in ('scan', 'aho'):
+        analysis = KeyTextAnalysis(
+            text, keys, fuzz_ratio, engine=engine, jobs=2, mode=mode,
+            text_tokens=tokens_of(text), key_tokens=tokens_of(keys))
+        analysis.run_keys2text_all()
+        found[engine] = dict(analysis.keys_found)
+    assert found['aho'] == found['scan']
+    assert found['scan']
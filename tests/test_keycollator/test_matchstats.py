@@ -0,0 +1,72 @@
+"""Tests of the counters of the match tiers (matchstats)."""
+import json
+
+import pytest
+
+from matchstats import FIELDS, TIERS, MatchStats
+from threadanalysis import KeyTextAnalysis
+
+
+def test_add_merge_and_drain():
+    """The pairs not evaluated by a tier are pruned, workers add up."""
+    worker = MatchStats()
+    worker.add('direct', pairs=10, evaluated=10, hits=4, seconds=.5)
+    worker.add('tokenized', pairs=6, evaluated=2, hits=1)
+    worker.add('fuzzy', pairs=5, evaluated=3, hits=2)
+    stats = MatchStats({'fuzzy': 'q-gram index'})
+    stats.merge(worker)
+    stats.merge(worker.drain())
+    assert worker.totals() == {tier: (0, 0, 0, 0, 0.0) for tier in TIERS}
+    assert stats.totals() == {
+        'direct': (20, 20, 0, 8, 1.0),
+        'tokenized': (12, 4, 8, 2, 0.0),
+        'fuzzy': (10, 6, 4, 4, 0.0)}
+    assert (stats.pairs, stats.comparisons, stats.pruned, stats.hits) == (
+        20, 16, 4, 14)
+    assert stats.rows()[2] == [
+        'fuzzy', 'q-gram index', 10, 6, 4, 4, '0.000']
+    assert stats.rows()[0][1] == '-'
+
+
+def test_write(tmp_path):
+    """write dumps the totals and each tier (with its index) as JSON."""
+    stats = MatchStats({'direct': 'key automaton'})
+    stats.add('direct', pairs=8, evaluated=3, hits=3)
+    stats.add('tokenized', pairs=5, evaluated=5, hits=1)
+    stats.add('fuzzy', pairs=4, evaluated=1)
+    file_name = str(tmp_path / 'stats.json')
+    written = stats.write(file_name, {'keys': 2, 'text': 4})
+    with open(file_name, encoding='utf-8') as fh:
+        assert json.load(fh) == written
+    assert written['keys'] == 2 and written['pairs'] == 8
+    assert written['comparisons'] == 5 and written['pruned'] == 3
+    assert written['tiers']['direct']['index'] == 'key automaton'
+    assert written['tiers']['fuzzy']['index'] is None
+    assert set(written['tiers']['tokenized']) == set(FIELDS) | {'index'}
+
+
+@pytest.mark.parametrize('jobs', [1, 3])
+@pytest.mark.parametrize('mode', ['key', 'line'])
+@pytest.mark.parametrize('engine', ['scan', 'aho'])
+def test_tier_totals_of_a_run(make_lines, tokens_of, engine, mode, jobs):
+    """Every pair reaches the first tier, is matched, compared or pruned."""
+    text = dict.fromkeys(make_lines(150), 1)
+    keys = dict.fromkeys(make_lines(60, (1, 3)), 0)
+    analysis = KeyTextAnalysis(
+        text, keys, 90, engine=engine, mode=mode, jobs=jobs,
+        weighted=False, text_tokens=tokens_of(text),
+        key_tokens=tokens_of(keys))
+    analysis.keys2text_find()
+    stats = analysis.match_stats
+    assert stats.pairs == len(text) * len(keys)
+    left = stats.pairs
+    for tier in TIERS:
+        pairs, evaluated, pruned, hits = stats.totals()[tier][:4]
+        assert pairs == left
+        assert pairs == evaluated + pruned
+        assert hits <= evaluated
+        left = pairs - hits
+    assert stats.hits == sum(analysis.key_counts.values())
+    assert stats.comparisons == stats.pairs - stats.pruned
+    assert analysis.total_comparisons == stats.comparisons
+    assert stats.hits and stats.pruned
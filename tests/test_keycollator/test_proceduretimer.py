@@ -0,0 +1,189 @@
+"""Tests of the span profiler of the pipeline stages (proceduretimer)."""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from proceduretimer import SpanProfiler, SpanTimes, clock
+
+
+def busy(seconds) -> None:
+    """Spends seconds of wall and CPU time."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@pytest.fixture(name='profiler')
+def fixture_profiler():
+    """An enabled profiler of the test only."""
+    profiler = SpanProfiler()
+    profiler.enable()
+    return profiler
+
+
+def test_spans_nest_inside_their_parents(profiler):
+    """Each span is recorded under its path, within its parent's time."""
+    with profiler.span('run') as run:
+        for _ in range(3):
+            with profiler.span('ingest'):
+                busy(.002)
+        with profiler.span('analyze'):
+            with profiler.span('match') as match:
+                busy(.005)
+    assert run == ('run',)
+    assert match == ('run', 'analyze', 'match')
+    spans = profiler.spans
+    assert list(spans) == [
+        ('run',), ('run', 'ingest'), ('run', 'analyze'),
+        ('run', 'analyze', 'match')]
+    assert spans[('run', 'ingest')][0] == 3
+    for path, (calls, wall, cpu) in spans.items():
+        assert calls >= 1 and wall > 0 and cpu >= 0
+        if len(path) > 1:
+            children = sum(total[1] for child, total in spans.items()
+                           if child[:-1] == path[:-1])
+            assert children <= spans[path[:-1]][1]
+
+
+def test_timed_and_disabled_spans(profiler):
+    """timed records each call, a disabled profiler records nothing."""
+    @profiler.timed()
+    def stage():
+        return profiler.path()
+
+    @profiler.timed('named')
+    def named():
+        return profiler.path()
+    assert stage()[-1].endswith('stage')
+    assert named() == ('named',)
+    assert named() == ('named',)
+    assert profiler.spans[('named',)][0] == 2
+    profiler.disable()
+    profiler.reset()
+    with profiler.span('ignored') as path:
+        assert path is None
+    assert named() == ()
+    assert not profiler.spans
+
+
+def test_thread_spans_nest_in_the_main_thread(profiler):
+    """A span of a thread without open spans nests in the main span."""
+    def ingest():
+        with profiler.span('read'):
+            busy(.001)
+    with profiler.span('run'):
+        worker = threading.Thread(target=ingest)
+        worker.start()
+        worker.join()
+    assert ('run', 'read') in profiler.spans
+
+
+def test_merge_span_times(profiler):
+    """The totals of SpanTimes are recorded as children of a span."""
+    times = SpanTimes()
+    since = clock()
+    busy(.002)
+    since = times.split('direct', since)
+    times.split('fuzzy', since, calls=0)
+    tokenize = times.tally('tokenize', str.split)
+    assert tokenize('a b') == ['a', 'b']
+    assert list(times.iterate('read', 'abc')) == ['a', 'b', 'c']
+    assert times.totals()['read'][0] == 3
+    assert times.spent('direct')[0] >= .002
+    assert times.spent('missing') == (0.0, 0.0)
+    with profiler.span('match'):
+        profiler.merge(times)
+    profiler.merge(times.drain(), parent=('other',))
+    assert not times
+    for name, calls in (('direct', 1), ('fuzzy', 0), ('tokenize', 1)):
+        assert profiler.spans[('match', name)][0] == calls
+        assert profiler.spans[('other', name)][0] == calls
+    assert profiler.spans[('match', 'direct')][1] >= .002
+
+
+def test_tree_is_depth_first(profiler, capsys):
+    """tree lists the spans depth first, children in order of opening."""
+    with profiler.span('run'):
+        with profiler.span('ingest'):
+            with profiler.span('sanitize'):
+                pass
+        with profiler.span('analyze'):
+            pass
+    with profiler.span('report'):
+        pass
+    assert [row[:2] for row in profiler.tree()] == [
+        (0, 'run'), (1, 'ingest'), (2, 'sanitize'), (1, 'analyze'),
+        (0, 'report')]
+    profiler.echo_tree()
+    out = capsys.readouterr().out.splitlines()
+    assert out[0].startswith('Span') and len(out) == 6
+    assert out[3].lstrip().startswith('└──sanitize')
+
+
+@pytest.fixture(name='traced')
+def fixture_traced():
+    """A tracing profiler with nested spans and a worker event."""
+    profiler = SpanProfiler()
+    profiler.enable(trace=True)
+    with profiler.span('run'):
+        with profiler.span('match'):
+            start = time.perf_counter()
+            busy(.001)
+            profiler.event('unit 0', (start, time.perf_counter()), .001,
+                           {'items': 8})
+    profiler.add_events([dict(profiler.events[0], pid=os.getpid() + 1)])
+    return profiler
+
+
+def test_chrome_trace(traced, tmp_path):
+    """The Chrome trace loads as JSON with an 'X' event of each event."""
+    file_name = str(tmp_path / 'trace.json')
+    traced.write_trace(file_name)
+    with open(file_name, encoding='utf-8') as fh:
+        trace = json.load(fh)
+    assert trace['displayTimeUnit'] == 'ms'
+    complete = [e for e in trace['traceEvents'] if e['ph'] == 'X']
+    assert sorted(e['name'] for e in complete) == [
+        'match', 'run', 'unit 0', 'unit 0']
+    assert min(e['ts'] for e in complete) == 0
+    assert all(e['dur'] >= 0 for e in complete)
+    run = next(e for e in complete if e['name'] == 'run')
+    match = next(e for e in complete if e['name'] == 'match')
+    assert run['ts'] <= match['ts']
+    assert match['ts'] + match['dur'] <= run['ts'] + run['dur'] + 1
+    assert match['args']['path'] == 'run/match'
+    unit = next(e for e in complete if e['name'] == 'unit 0')
+    assert unit['args'] == {'items': 8, 'cpu_ms': 1.0}
+    names = {e['args']['name'] for e in trace['traceEvents']
+             if e['name'] == 'process_name'}
+    assert names == {'keycollator', f'worker {os.getpid() + 1}'}
+    assert any(e['name'] == 'thread_name' for e in trace['traceEvents'])
+
+
+def test_flat_trace(traced, tmp_path):
+    """The flat trace loads as JSON with the spans and the events."""
+    file_name = str(tmp_path / 'trace.json')
+    assert traced.write_trace(file_name, fmt='flat')
+    with open(file_name, encoding='utf-8') as fh:
+        trace = json.load(fh)
+    assert [span['path'] for span in trace['spans']] == ['run', 'run/match']
+    assert all(span['calls'] == 1 for span in trace['spans'])
+    events = trace['events']
+    assert len(events) == 4
+    assert events[0]['start'] == 0
+    assert [e['start'] for e in events] == sorted(e['start'] for e in events)
+    assert {e['cat'] for e in events} == {'span', 'worker'}
+    with pytest.raises(ValueError):
+        traced.trace('csv')
+
+
+def test_events_need_tracing(profiler):
+    """Without tracing no event is kept."""
+    with profiler.span('run'):
+        profiler.event('unit 0', (0.0, 1.0))
+    profiler.add_events([{'name': 'unit 1'}])
+    assert not profiler.events
+    assert not profiler.trace()['traceEvents']
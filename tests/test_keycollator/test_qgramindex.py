@@ -0,0 +1,66 @@
+"""Tests of the q-gram prefilter of the fuzzy tier (qgramindex)."""
+import pytest
+
+from fuzzywuzzy import fuzz
+
+from qgramindex import QGramIndex, min_shared_qgrams, qgrams
+
+
+def mutate(rnd, text) -> str:
+    """Applies up to three random character edits to text."""
+    chars = list(text)
+    for _ in range(rnd.randint(0, 3)):
+        if not chars:
+            break
+        pos = rnd.randrange(len(chars))
+        edit = rnd.random()
+        if edit < .33:
+            chars[pos] = rnd.choice('abcdefxyz ')
+        elif edit < .66:
+            del chars[pos]
+        else:
+            chars.insert(pos, rnd.choice('abcdefxyz '))
+    return ''.join(chars)
+
+
+def test_qgrams_counts_overlapping_grams():
+    """qgrams counts each overlapping gram of the string."""
+    assert qgrams('aaaa', 2) == {'aa': 3}
+    assert sum(qgrams('ledger', 3).values()) == 4
+
+
+def test_min_shared_qgrams_at_most_the_grams_of_the_string():
+    """The q-gram bound never exceeds the grams of the string."""
+    for length in range(0, 40):
+        for fuzz_ratio in (1, 50, 80, 99, 100):
+            need = min_shared_qgrams(length, fuzz_ratio, 3)
+            assert need <= max(length - 2, 0)
+    assert min_shared_qgrams(30, 100, 3) == 28
+
+
+@pytest.mark.parametrize('fuzz_ratio', [60, 75, 90, 100])
+def test_candidates_have_no_false_negatives(rnd, make_lines, fuzz_ratio):
+    """Every line scoring at least fuzz_ratio is a candidate."""
+    items = make_lines(250)
+    queries = make_lines(20, (1, 3)) + [
+        mutate(rnd, rnd.choice(items)) for _ in range(40)] + ['', 'x']
+    index = QGramIndex(items)
+    for query in queries:
+        candidates = set(index.candidates(query, fuzz_ratio))
+        for iid, item in enumerate(items):
+            if fuzz.partial_ratio(query, item) >= fuzz_ratio:
+                assert iid in candidates, (query, item)
+        reverse = set(index.candidates(query, fuzz_ratio, False))
+        for iid, item in enumerate(items):
+            if fuzz.partial_ratio(item, query) >= fuzz_ratio:
+                assert iid in reverse, (item, query)
+
+
+def test_candidates_are_sorted_and_prune(make_lines):
+    """The candidates are sorted line ids and leave lines out."""
+    items = make_lines(200)
+    index = QGramIndex(items)
+    candidates = index.candidates('payment vendor', 90)
+    assert candidates == sorted(candidates)
+    assert len(candidates) < len(items)
+    assert index.candidates('payment vendor', 0) == list(range(len(items)))
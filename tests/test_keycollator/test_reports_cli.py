@@ -0,0 +1,92 @@
+"""Tests of the keycollator command line (timings, trace, stats, profile)."""
+import json
+import os
+import pstats
+
+import pytest
+
+from click.testing import CliRunner
+
+import keycollator
+from proceduretimer import PROFILER
+from runprofiler import RUN_PROFILER
+
+pytestmark = pytest.mark.usefixtures('split_tokenizer', 'run_dir')
+
+
+@pytest.fixture(name='run_dir')
+def fixture_run_dir(tmp_path, monkeypatch, make_lines):
+    """Fixture: run_dir -> Path, text, key and result files."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'text.txt').write_text('\n'.join(make_lines(300)) + '\n')
+    (tmp_path / 'keys.txt').write_text(
+        '\n'.join(make_lines(20, (1, 2))) + '\n')
+    (tmp_path / 'out.csv').write_text('')
+    yield tmp_path
+    PROFILER.disable()
+    PROFILER.reset()
+    RUN_PROFILER.disable()
+    RUN_PROFILER.reset()
+
+
+def run(*options) -> str:
+    """Runs the cli without the result cache, returns its output."""
+    result = CliRunner().invoke(keycollator.cli, [
+        '-t', 'text.txt', '-k', 'keys.txt', '-r', 'out.csv', '--no-cache',
+        '--jobs', '2'] + list(options))
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+@pytest.mark.parametrize('backend', ['thread', 'process'])
+def test_chrome_trace_of_a_run(run_dir, backend):
+    """--trace-file writes the stages and the work units of the workers."""
+    output = run('--trace-file', 'trace.json', '--backend', backend)
+    assert 'trace events (chrome) to trace.json' in output
+    with open(run_dir / 'trace.json', encoding='utf-8') as fh:
+        events = json.load(fh)['traceEvents']
+    spans = {e['args']['path'] for e in events if e.get('cat') == 'span'}
+    assert {'main', 'main/ingest', 'main/analyze'} <= spans
+    assert any(e.get('cat') == 'worker' for e in events)
+
+
+def test_flat_trace_and_timings(run_dir):
+    """--trace-format flat writes the span totals, --timings the tree."""
+    output = run('--trace-file', 'trace.json', '--trace-format', 'flat',
+                 '--timings')
+    assert 'Wall(s)' in output
+    with open(run_dir / 'trace.json', encoding='utf-8') as fh:
+        trace = json.load(fh)
+    paths = [span['path'] for span in trace['spans']]
+    assert paths[0] == 'main'
+    assert all(path.startswith('main') for path in paths)
+    assert trace['events']
+
+
+def test_stats_of_a_run(run_dir):
+    """--stats prints the tiers, --stats-file writes their totals."""
+    output = run('--stats', '--stats-file', 'stats.json')
+    assert 'Pruned' in output and 'tokenized' in output
+    with open(run_dir / 'stats.json', encoding='utf-8') as fh:
+        stats = json.load(fh)
+    assert stats['pairs'] == stats['keys'] * stats['text']
+    for tier in stats['tiers'].values():
+        assert tier['pairs'] == tier['evaluated'] + tier['pruned']
+    assert stats['comparisons'] == stats['pairs'] - stats['pruned']
+    assert stats['hits'] == sum(
+        tier['hits'] for tier in stats['tiers'].values())
+    assert not stats['cached']
+
+
+def test_profile_of_a_run(run_dir):
+    """--profile writes the profile of each stage and the report."""
+    output = run('--profile', 'profile')
+    assert 'Wrote the profile of the run to profile' in output
+    written = set(os.listdir(run_dir / 'profile'))
+    assert {'keycollator.prof', 'main.prof', 'itemize_file.prof',
+            'keys2text_find.prof', 'profile.txt'} <= written
+    assert pstats.Stats(str(run_dir / 'profile' / 'main.prof')).total_calls
+    report = (run_dir / 'profile' / 'profile.txt').read_text(
+        encoding='utf-8')
+    assert 'Stage: itemize_file top allocation sites' in report
+    assert not RUN_PROFILER.enabled
@@ -0,0 +1,68 @@
+"""Tests of the persistent match-result cache (resultcache)."""
+import os
+
+from resultcache import ResultCache, content_digest
+from textcorpus import TextCorpus
+
+
+def entries(cache) -> set:
+    """Names of the entries in the cache directory."""
+    return {name[:-len('.z')] for name in os.listdir(cache.directory)}
+
+
+def test_get_put_and_counters(tmp_path):
+    """put stores an entry, get reads it and counts hits and misses."""
+    cache = ResultCache(str(tmp_path / 'cache'))
+    key = ResultCache.key('v1', 'text digest', 'keys digest', 90)
+    assert cache.get(key) is None
+    cache.put(key, {'tax due': 3})
+    assert cache.get(key) == {'tax due': 3}
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert key != ResultCache.key('v1', 'text digest', 'keys digest', 80)
+    assert cache.clear() == 1
+    assert cache.get(key) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """Past max_bytes, the least recently used entries are removed."""
+    value = {f'key {i}': i for i in range(200)}
+    probe = ResultCache(str(tmp_path / 'probe'))
+    probe.put('probe', value)
+    size = os.path.getsize(os.path.join(probe.directory, 'probe.z'))
+    cache = ResultCache(str(tmp_path / 'cache'), max_bytes=int(size * 2.5))
+    cache.put('first', value)
+    cache.put('second', value)
+    os.utime(os.path.join(cache.directory, 'first.z'), (1, 1))
+    os.utime(os.path.join(cache.directory, 'second.z'), (2, 2))
+    assert cache.get('first') == value
+    cache.put('third', value)
+    assert entries(cache) == {'first', 'third'}
+    cache.put('fourth', value)
+    assert entries(cache) == {'third', 'fourth'}
+
+
+def test_most_recent_entry_is_kept_beyond_max_bytes(tmp_path):
+    """The entry just written is kept even past max_bytes."""
+    cache = ResultCache(str(tmp_path / 'cache'), max_bytes=1)
+    cache.put('only', {'tax due': 1})
+    assert entries(cache) == {'only'}
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    """An unreadable entry is a miss and is removed."""
+    cache = ResultCache(str(tmp_path / 'cache'))
+    cache.put('entry', [1, 2])
+    with open(os.path.join(cache.directory, 'entry.z'), 'wb') as fh:
+        fh.write(b'not a joblib file')
+    assert cache.get('entry') is None
+    assert not entries(cache)
+
+
+def test_content_digest_of_lines_and_counts():
+    """The content digest covers the lines, their split and counts."""
+    corpus = TextCorpus.from_items(['tax due', 'net 30'])
+    same = TextCorpus.from_items(['tax due', 'net 30'])
+    split = TextCorpus.from_items(['tax', 'due', 'net 30'])
+    assert content_digest(corpus) == content_digest(same)
+    assert content_digest(corpus) != content_digest(split)
+    assert content_digest(corpus, [1, 2]) != content_digest(corpus, [2, 1])
@@ -0,0 +1,112 @@
+"""Tests of the keycollator command line (result cache options)."""
+import os
+
+import pytest
+
+from click.testing import CliRunner
+
+import constants as const
+import corpusindex
+import extractonator
+import keycollator
+from resultcache import ResultCache
+
+pytestmark = pytest.mark.usefixtures('split_tokenizer', 'run_dir')
+
+
+@pytest.fixture(name='run_dir')
+def fixture_run_dir(tmp_path, monkeypatch, make_lines):
+    """Fixture: run_dir -> Path, text, key and result files."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'text.txt').write_text('\n'.join(make_lines(300)) + '\n')
+    (tmp_path / 'keys.txt').write_text(
+        '\n'.join(make_lines(20, (1, 2))) + '\n')
+    (tmp_path / 'out.csv').write_text('')
+    return tmp_path
+
+
+def run(*options) -> tuple:
+    """Runs the cli, returns its output and the result file."""
+    result = CliRunner().invoke(keycollator.cli, [
+        '-t', 'text.txt', '-k', 'keys.txt', '-r', 'out.csv'] + list(options))
+    assert result.exit_code == 0, result.output
+    with open('out.csv', encoding='utf-8') as fh:
+        return result.output, fh.read()
+
+
+def test_second_run_reads_the_cache():
+    """The second run reads the results from the cache."""
+    output, first = run()
+    assert '(cached)' not in output
+    assert first
+    output, second = run()
+    assert '(cached)' in output
+    assert second == first
+    assert os.listdir(const.CACHE_DIR)
+
+
+def test_no_cache_matches_again():
+    """--no-cache neither reads nor writes the cache."""
+    _, first = run('--no-cache')
+    assert not os.path.exists(const.CACHE_DIR)
+    run()
+    output, again = run('--no-cache')
+    assert '(cached)' not in output
+    assert again == first
+
+
+def test_changed_text_matches_again(run_dir):
+    """A text file changed since the last run is matched again."""
+    run()
+    with open(run_dir / 'text.txt', 'a', encoding='utf-8') as fh:
+        fh.write('tax due\n')
+    output, changed = run()
+    assert '(cached)' not in output
+    _, expected = run('--no-cache')
+    assert changed == expected
+
+
+def test_rewrite_keeping_size_and_mtime(run_dir):
+    """A rewrite keeping the size and mtime fails the probe of the hit."""
+    text = run_dir / 'text.txt'
+    run()
+    stat = os.stat(text)
+    content = text.read_text(encoding='utf-8')
+    text.write_text(content[:100].upper() + content[100:], encoding='utf-8')
+    os.utime(text, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    output, rerun = run()
+    assert '(cached)' not in output
+    _, expected = run('--no-cache')
+    assert rerun == expected
+
+
+def test_lookup_hashes_only_a_hit(monkeypatch):
+    """The files are probed only to store or confirm an entry, read once."""
+    probes = []
+    reads = []
+    span_digest = extractonator.span_digest
+    get = ResultCache.get
+
+    def probe(file_name, end):
+        probes.append(file_name)
+        return span_digest(file_name, end)
+
+    def read(cache, key):
+        reads.append(key)
+        return get(cache, key)
+
+    def no_digest(file_name):
+        raise AssertionError(f'{file_name} hashed in full')
+
+    monkeypatch.setattr(extractonator, 'span_digest', probe)
+    monkeypatch.setattr(ResultCache, 'get', read)
+    monkeypatch.setattr(corpusindex, 'file_digest', no_digest)
+    output, first = run()
+    assert '(cached)' not in output
+    assert probes == ['text.txt', 'keys.txt']
+    assert len(reads) == 1
+    output, second = run()
+    assert '(cached)' in output
+    assert second == first
+    assert probes == ['text.txt', 'keys.txt'] * 2
+    assert len(reads) == 2
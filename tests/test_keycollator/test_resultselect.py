@@ -0,0 +1,77 @@
+"""Tests of the result selection of a run (resultselect)."""
+import pytest
+
+from resultselect import select_keys
+
+
+def legacy_sort(counts) -> dict:
+    """Previous KeyTextAnalysis._sort_keys_found, sorted by count."""
+    return dict(sorted(
+        counts.items(), key=lambda item: item[1], reverse=True))
+
+
+def legacy_limit(found, limit) -> dict:
+    """Previous KeyKrawler._limresult, keys past limit are removed."""
+    found = dict(found)
+    if limit is not None:
+        for i, item in enumerate(list(found)):
+            if i >= limit:
+                del found[item]
+    return found
+
+
+def legacy_select(counts, limit=None, lbound=None, ubound=None) -> dict:
+    """Sort, bounds (as _purge_limits meant them) then limit."""
+    found = {
+        key: count for key, count in legacy_sort(counts).items()
+        if (lbound is None or count >= lbound)
+        and (ubound is None or count <= ubound)}
+    return legacy_limit(found, limit)
+
+
+@pytest.fixture(name='counts')
+def fixture_counts(rnd, make_lines):
+    """Counts of random keys, most counts are shared by several keys."""
+    return {key: rnd.randint(0, 6) for key in make_lines(400, (1, 3))}
+
+
+@pytest.mark.parametrize('limit', (None, 0, 1, 5, 37, 10_000))
+def test_limit_keeps_the_legacy_order(counts, limit):
+    """The top limit keys, ties in the order of the sorted counts."""
+    selected = select_keys(counts, limit)
+    assert list(selected.items()) == list(
+        legacy_limit(legacy_sort(counts), limit).items())
+
+
+def test_no_limit_sorts_every_key(counts):
+    """Without a limit every key is kept, by count descending."""
+    selected = select_keys(counts)
+    assert len(selected) == len(counts)
+    assert list(selected.values()) == sorted(counts.values(), reverse=True)
+
+
+def test_limit_zero_keeps_nothing(counts):
+    """A limit of 0 keeps no key (as _limresult removed every key)."""
+    assert not select_keys(counts, 0)
+    assert not select_keys({}, 3)
+
+
+@pytest.mark.parametrize('lbound, ubound', (
+    (None, None), (2, None), (None, 3), (2, 4), (3, 3), (5, 1), (7, None)))
+@pytest.mark.parametrize('limit', (None, 0, 10))
+def test_bounds(counts, limit, lbound, ubound):
+    """Keys with counts outside lbound..ubound are skipped."""
+    selected = select_keys(counts, limit, lbound, ubound)
+    assert list(selected.items()) == list(
+        legacy_select(counts, limit, lbound, ubound).items())
+    assert all((lbound is None or count >= lbound) and
+               (ubound is None or count <= ubound)
+               for count in selected.values())
+
+
+def test_ties_keep_the_order_of_counts():
+    """Keys with equal counts keep their order in counts."""
+    counts = {'d': 1, 'a': 2, 'c': 2, 'b': 1, 'e': 2, 'f': 0}
+    assert list(select_keys(counts)) == ['a', 'c', 'e', 'd', 'b', 'f']
+    assert list(select_keys(counts, 4)) == ['a', 'c', 'e', 'd']
+    assert list(select_keys(counts, 2, 1, 1)) == ['d', 'b']
@@ -0,0 +1,109 @@
+"""Tests of the cProfile and tracemalloc profile of a run (runprofiler)."""
+import os
+import pstats
+import threading
+import tracemalloc
+
+import pytest
+
+from runprofiler import REPORT, RUN, RunProfiler
+
+
+def inner_work() -> list:
+    """Work of the inner stage."""
+    return [str(i) * 8 for i in range(2000)]
+
+
+def outer_work() -> int:
+    """Work of the outer stage only."""
+    return sum(range(1000))
+
+
+def functions(stats) -> set:
+    """Names of the functions of a profile."""
+    return {func[2] for func in stats.stats}
+
+
+@pytest.fixture(name='profiler')
+def fixture_profiler():
+    """An enabled profiler of the test only (tracemalloc stopped after)."""
+    profiler = RunProfiler()
+    profiler.enable()
+    yield profiler
+    profiler.disable()
+
+
+def test_nested_stages_do_not_overlap(profiler):
+    """The profile of the enclosing stage is paused in an inner stage."""
+    with profiler.stage('outer'):
+        outer_work()
+        with profiler.stage('inner'):
+            inner_work()
+    assert profiler.stages == ['inner', 'outer']
+    assert 'inner_work' in functions(profiler.stats('inner'))
+    assert 'inner_work' not in functions(profiler.stats('outer'))
+    assert 'outer_work' in functions(profiler.stats('outer'))
+    assert {'inner_work', 'outer_work'} <= functions(profiler.stats())
+    assert profiler.stats('missing') is None
+
+
+def test_pool_threads_add_to_the_stage(profiler):
+    """The profiled calls of each thread add to the same stage."""
+    @profiler.profiled(allocations=False)
+    def unit():
+        return inner_work()
+    threads = [threading.Thread(target=unit) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    unit()
+    assert profiler.stages == ['unit']
+    assert profiler.stats('unit').stats
+    assert not profiler.top_allocations('unit')
+
+
+def test_allocation_sites_of_a_stage(profiler):
+    """The memory grown during a stage is listed by allocation site."""
+    with profiler.stage('alloc'):
+        kept = inner_work()
+    sites = profiler.top_allocations('alloc')
+    assert kept and sites
+    site, size, count = sites[0]
+    assert site.startswith(__file__ + ':')
+    assert size > 2000 * 8 and count >= 2000
+
+
+def test_disabled_profiler_records_nothing():
+    """A disabled profiler neither profiles nor traces."""
+    profiler = RunProfiler()
+    with profiler.stage('ignored') as profile:
+        assert profile is None
+    assert not profiler.stages
+    was_tracing = tracemalloc.is_tracing()
+    profiler.enable()
+    profiler.disable()
+    assert tracemalloc.is_tracing() == was_tracing
+
+
+def test_write_the_profiles_and_the_report(profiler, tmp_path):
+    """write dumps a loadable profile of each stage and the report."""
+    directory = str(tmp_path / 'profile')
+    assert not profiler.write(directory)
+    with profiler.stage('outer'):
+        outer_work()
+        with profiler.stage('inner'):
+            kept = inner_work()
+    written = profiler.write(directory)
+    assert kept
+    assert [os.path.basename(path) for path in written] == [
+        RUN + '.prof', 'inner.prof', 'outer.prof', REPORT]
+    for path in written[:-1]:
+        assert pstats.Stats(path).total_calls > 0
+    with open(written[-1], encoding='utf-8') as fh:
+        report = fh.read()
+    assert 'Run: hot functions by cumulative time' in report
+    assert 'Stage: inner (1 profiles' in report
+    assert 'Stage: outer top allocation sites' in report
+    profiler.reset()
+    assert not profiler.stages
@@ -0,0 +1,95 @@
+"""Tests of the state of the incremental runs (runstate)."""
+import os
+
+import pytest
+
+from runstate import IncrementalState, span_digest
+
+COUNTS = {'tax due': 2, 'net 30': 1}
+
+
+@pytest.fixture(name='log_file')
+def fixture_log_file(tmp_path, make_lines):
+    """Fixture: log_file -> str, text file of complete lines."""
+    path = tmp_path / 'run.log'
+    path.write_text('\n'.join(make_lines(200)) + '\n')
+    return str(path)
+
+
+def saved(log_file, params='params') -> int:
+    """Saves the state of a run to the end of log_file."""
+    IncrementalState(log_file, params).save(os.path.getsize(log_file), COUNTS)
+    return os.path.getsize(log_file)
+
+
+def test_resumes_after_an_append(log_file):
+    """An appended file resumes at the end of the previous run."""
+    end = saved(log_file)
+    with open(log_file, 'a', encoding='utf-8') as fh:
+        fh.write('tax due today\n')
+    state = IncrementalState(log_file, 'params')
+    assert state.load() == end
+    assert state.offset == end
+    assert state.counts == COUNTS
+
+
+def test_no_previous_run_is_a_full_run(log_file):
+    """Without a saved state the run starts at the beginning."""
+    state = IncrementalState(log_file, 'params')
+    assert state.load() == 0
+    assert state.counts == {}
+
+
+def test_changed_params_fall_back_to_a_full_run(log_file):
+    """Other parameters start a full run."""
+    saved(log_file)
+    state = IncrementalState(log_file, 'other params')
+    assert state.load() == 0
+    assert state.counts == {}
+
+
+def test_truncated_file_falls_back_to_a_full_run(log_file):
+    """A file shorter than the saved offset starts a full run."""
+    end = saved(log_file)
+    with open(log_file, 'r+', encoding='utf-8') as fh:
+        fh.truncate(end // 2)
+    assert IncrementalState(log_file, 'params').load() == 0
+
+
+def test_extended_partial_line_falls_back_to_a_full_run(log_file):
+    """A partial last line that grew starts a full run."""
+    with open(log_file, 'a', encoding='utf-8') as fh:
+        fh.write('partial line')
+    saved(log_file)
+    with open(log_file, 'a', encoding='utf-8') as fh:
+        fh.write(' extended\n')
+    assert IncrementalState(log_file, 'params').load() == 0
+
+
+def test_partial_line_unchanged_resumes(log_file):
+    """An unchanged partial last line resumes."""
+    saved(log_file)
+    with open(log_file, 'a', encoding='utf-8') as fh:
+        fh.write('partial line')
+    end = saved(log_file)
+    assert IncrementalState(log_file, 'params').load() == end
+
+
+def test_rewritten_start_falls_back_to_a_full_run(log_file):
+    """A change before the saved offset starts a full run."""
+    end = saved(log_file)
+    digest = span_digest(log_file, end)
+    with open(log_file, 'r+', encoding='utf-8') as fh:
+        first = fh.read(1)
+        fh.seek(0)
+        fh.write('x' if first != 'x' else 'y')
+    assert IncrementalState(log_file, 'params').load() == 0
+    assert span_digest(log_file, end) != digest
+
+
+def test_unreadable_state_falls_back_to_a_full_run(log_file):
+    """An unreadable state file starts a full run."""
+    state = IncrementalState(log_file, 'params')
+    with open(state.path, 'w', encoding='utf-8') as fh:
+        fh.write('not a state')
+    assert state.load() == 0
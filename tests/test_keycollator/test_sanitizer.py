@@ -0,0 +1,80 @@
+"""Tests of the compiled text sanitizer (sanitizer)."""
+import io
+import string
+
+import pytest
+
+import constants as const
+from sanitizer import sanitize, sanitize_buffer
+
+WORDS = (
+    "Account", "balance", "LEDGER", "invoice,", "payment.", "vendor's",
+    "(customer)", "report;", "journal-entry", "audit!", "revenue?", "tax:",
+    "  ", "   ", "\t", "#1", "$500", "50%", "[x]", "a_b", "~/path")
+NON_ASCII = ("café", "naïve", "Straße", "ΣΊΣΥΦΟΣ", "日本語", "½ ²", "“quoted”")
+END_LINES = ('\n', '\r\n', '\r')
+
+
+def legacy_sanitize(text=None) -> str:
+    """Previous ItemizeFileData._sanitize_text, reference of the output."""
+    if text is None:
+        return None
+    text = text.lower()
+    while '  ' in text:
+        text = text.replace('  ', ' ')
+    text = text.replace(const.LINE, '')
+    return text.translate(text.maketrans('', '', string.punctuation))
+
+
+def legacy_lines(text) -> list:
+    """Lines of text read in text mode, sanitized by legacy_sanitize."""
+    return [legacy_sanitize(line)
+            for line in io.StringIO(text, newline=None).readlines()]
+
+
+def random_text(rnd, ascii_only, end_line, count=200) -> str:
+    """Random lines of WORDS (and NON_ASCII) ending with end_line."""
+    words = WORDS if ascii_only else WORDS + NON_ASCII
+    return ''.join(
+        ' '.join(rnd.choice(words) for _ in range(rnd.randint(0, 10))) +
+        end_line for _ in range(count))
+
+
+def test_sanitize_matches_legacy(rnd):
+    """sanitize returns the output of the legacy loop on each line."""
+    for line in random_text(rnd, False, '\n').splitlines(True):
+        assert sanitize(line) == legacy_sanitize(line)
+    for text in (None, '', ' ', '\n', '  \n', 'A  B   C\n', 'Été,  ÇA!'):
+        assert sanitize(text) == legacy_sanitize(text)
+
+
+@pytest.mark.parametrize('end_line', END_LINES, ids=('lf', 'crlf', 'cr'))
+@pytest.mark.parametrize('ascii_only', (True, False), ids=('ascii', 'utf8'))
+@pytest.mark.parametrize('convert', (str, bytes, bytearray, memoryview),
+                         ids=('str', 'bytes', 'bytearray', 'memoryview'))
+@pytest.mark.parametrize('final', (True, False),
+                         ids=('end line', 'no final end line'))
+def test_sanitize_buffer_matches_legacy(
+        rnd, end_line, ascii_only, convert, final):
+    """sanitize_buffer gives the legacy lines of a text mode read."""
+    text = random_text(rnd, ascii_only, end_line)
+    if not final:
+        text += 'Last,  LINE'
+    buffer = text if convert is str else convert(text.encode('utf-8'))
+    assert sanitize_buffer(buffer) == legacy_lines(text)
+
+
+@pytest.mark.parametrize('text', (
+    '', '\n', '\r', '\r\n', '\n\r', '\r\r\n\n', 'a\rb', 'A  \r\n  B',
+    'x\r\ny\rz\nw', '  \r  \n', 'é\r'))
+def test_sanitize_buffer_end_lines(text):
+    """'\\r\\n', '\\r' and '\\n' split str and bytes like text mode."""
+    assert sanitize_buffer(text) == legacy_lines(text)
+    assert sanitize_buffer(text.encode('utf-8')) == legacy_lines(text)
+
+
+def test_sanitize_buffer_invalid_utf8():
+    """Invalid utf-8 is replaced as the streamed file decodes it."""
+    buffer = b'Caf\xe9  OK\nna\xc3\xafve!\n'
+    text = str(buffer, 'utf-8', 'replace')
+    assert sanitize_buffer(buffer) == legacy_lines(text)
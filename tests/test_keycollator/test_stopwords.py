@@ -0,0 +1,139 @@
+"""Tests of the compiled stop words (stopwords)."""
+import os
+import pickle
+
+import pytest
+
+import constants as const
+import stopwords
+from resultcache import ResultCache
+from sanitizer import sanitize
+from stopwords import StopWords, compile_stopwords, read_stopwords_file
+
+STOPWORDS_FILE = '# ledger terms\nNet\n\n   \n  #due\nLedger,\n  tax  \n'
+
+
+@pytest.fixture(name='stopwords_file')
+def fixture_stopwords_file(tmp_path):
+    """A stopwords file with comment and blank lines."""
+    path = tmp_path / 'stopwords.txt'
+    path.write_text(STOPWORDS_FILE, encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture(name='cache')
+def fixture_cache(tmp_path):
+    """A result cache in the temporary directory."""
+    return ResultCache(str(tmp_path / 'cache'))
+
+
+@pytest.fixture(name='no_compiled', autouse=True)
+def fixture_no_compiled(monkeypatch):
+    """Each test starts with an empty per-process cache."""
+    monkeypatch.setattr(stopwords, '_COMPILED', {})
+
+
+def test_comment_and_blank_lines_are_skipped(stopwords_file):
+    """Lines starting with '#' and blank lines are not stop words."""
+    assert read_stopwords_file(stopwords_file) == ['Net', 'Ledger,', 'tax']
+    words = StopWords(files=[stopwords_file])
+    assert set(words) == {'net', 'ledger', 'tax'}
+    assert 'due' not in words
+
+
+def test_default_words_and_files_are_joined(stopwords_file):
+    """The words and the words of each file are sanitized together."""
+    words = StopWords(['The', 'of'], [stopwords_file])
+    assert set(words) == {'the', 'of', 'net', 'ledger', 'tax'}
+    assert words.files == (stopwords_file,)
+    assert StopWords(const.STOP_WORDS).words == {
+        sanitize(word) for word in const.STOP_WORDS}
+
+
+def test_pop():
+    """pop removes the stop words split on single spaces."""
+    words = StopWords(['the', 'of'])
+    assert words.pop('the net of the tax') == 'net tax'
+    assert words.pop('the') == ''
+    assert words.pop('tax  the due') == 'tax  due'
+
+
+def test_pop_lines_matches_pop(make_lines):
+    """pop_lines gives pop of each line, in order."""
+    words = StopWords(['tax', 'due', 'net'])
+    lines = make_lines(300)
+    assert words.pop_lines(lines) == [words.pop(line) for line in lines]
+    assert words.pop_lines(iter(['net tax', 'tax report'])) == ['', 'report']
+
+
+def test_filter():
+    """filter keeps the tokens that are not stop words, in order."""
+    words = StopWords(['the', 'of'])
+    assert words.filter(('the', 'ledger', 'of', 'tax', 'the')) == [
+        'ledger', 'tax']
+    assert words.filter(()) == []
+
+
+def test_pickle_keeps_the_compiled_words(stopwords_file, monkeypatch):
+    """Unpickled stop words are the compiled words, no file is read."""
+    words = StopWords(['the'], [stopwords_file])
+    data = pickle.dumps(words)
+    monkeypatch.setattr(stopwords, 'read_stopwords_file', _no_read)
+    copy = pickle.loads(data)
+    assert copy.words == words.words
+    assert copy.files == words.files
+    assert copy.fingerprint == words.fingerprint
+
+
+def test_compiled_once_per_process(stopwords_file, monkeypatch):
+    """The same words and unchanged files are compiled once."""
+    compiled = compile_stopwords(['the'], [stopwords_file])
+    monkeypatch.setattr(stopwords, 'read_stopwords_file', _no_read)
+    assert compile_stopwords(['the'], [stopwords_file]) is compiled
+
+
+def test_compiled_words_are_kept_on_disk(stopwords_file, cache, monkeypatch):
+    """A new process restores the compiled words from the cache."""
+    compiled = compile_stopwords(['the'], [stopwords_file], cache)
+    assert len(os.listdir(cache.directory)) == 1
+    monkeypatch.setattr(stopwords, '_COMPILED', {})
+    monkeypatch.setattr(stopwords, 'read_stopwords_file', _no_read)
+    assert compile_stopwords(['the'], [stopwords_file], cache) == compiled
+    assert cache.hits == 1
+
+
+def test_changed_file_is_compiled_again(stopwords_file, cache):
+    """A stopwords file of another size or mtime is read again."""
+    compile_stopwords([], [stopwords_file], cache)
+    with open(stopwords_file, 'a', encoding='utf-8') as fh:
+        fh.write('journal\n')
+    assert 'journal' in compile_stopwords([], [stopwords_file], cache)
+    stat = os.stat(stopwords_file)
+    with open(stopwords_file, 'w', encoding='utf-8') as fh:
+        fh.write('ledger\nreport\n'.ljust(stat.st_size - 1) + '\n')
+    os.utime(stopwords_file,
+             ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert compile_stopwords([], [stopwords_file], cache) == {
+        'ledger', 'report'}
+    assert cache.hits == 0
+
+
+def test_empty_stopwords_file_is_cached(tmp_path, cache, monkeypatch):
+    """An empty file compiles (and restores) to no stop words."""
+    path = tmp_path / 'empty.txt'
+    path.write_text('# nothing\n', encoding='utf-8')
+    assert compile_stopwords([], [str(path)], cache) == frozenset()
+    monkeypatch.setattr(stopwords, '_COMPILED', {})
+    monkeypatch.setattr(stopwords, 'read_stopwords_file', _no_read)
+    assert compile_stopwords([], [str(path)], cache) == frozenset()
+
+
+def test_words_only_are_not_written(cache):
+    """Words without files are compiled per process only."""
+    compile_stopwords(const.STOP_WORDS, (), cache)
+    assert not os.path.isdir(cache.directory) or not os.listdir(
+        cache.directory)
+
+
+def _no_read(file_name):
+    raise AssertionError(f'{file_name} read again')
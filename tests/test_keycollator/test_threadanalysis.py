@@ -0,0 +1,76 @@
+"""Tests of the matching modes and weighted counts (threadanalysis)."""
+import pytest
+
+from threadanalysis import KeyTextAnalysis
+
+
+def analyze(text, keys, tokens_of, fuzz_ratio=90, **options):
+    """Runs a match of keys over text, the analysis once matched."""
+    analysis = KeyTextAnalysis(
+        text, keys, fuzz_ratio, text_tokens=tokens_of(text),
+        key_tokens=tokens_of(keys), **options)
+    analysis.keys2text_find()
+    return analysis
+
+
+@pytest.mark.parametrize('jobs', [1, 3])
+@pytest.mark.parametrize('engine', ['scan', 'aho'])
+@pytest.mark.parametrize('fuzz_ratio', [60, 90, 100])
+def test_key_and_line_modes_agree(
+        make_lines, tokens_of, engine, fuzz_ratio, jobs):
+    """The line-driven mode finds the keys and counts of the key mode."""
+    text = dict.fromkeys(make_lines(120), 1)
+    keys = dict.fromkeys(make_lines(200, (1, 3)) + ['zzz', 'a'], 0)
+    found = {}
+    for mode in ('key', 'line'):
+        analysis = analyze(text, keys, tokens_of, fuzz_ratio,
+                           engine=engine, jobs=jobs, mode=mode)
+        assert analysis.mode == mode
+        found[mode] = analysis.keys_found
+    assert found['line'] == found['key']
+    assert list(found['line'].items()) == list(found['key'].items())
+    assert found['key']
+
+
+def test_auto_mode_follows_the_corpus_sizes(make_lines, tokens_of):
+    """auto is line-driven for more keys than lines, else key-driven."""
+    text = dict.fromkeys(make_lines(60), 1)
+    keys = dict.fromkeys(make_lines(150, (1, 2)), 0)
+    few_keys = dict.fromkeys(list(keys)[:20], 0)
+    for key_dict, expected in ((keys, 'line'), (few_keys, 'key')):
+        auto = analyze(text, key_dict, tokens_of)
+        assert auto.mode == expected
+        other = analyze(text, key_dict, tokens_of,
+                        mode='key' if expected == 'line' else 'line')
+        assert auto.keys_found == other.keys_found
+
+
+
+def occurrence_counts(text, keys, tokens_of, **options) -> tuple:
+    """Counts of the lines matched, by occurrences and once per line."""
+    occurrences = {}
+    lines = {}
+    for times in set(text.values()):
+        part = {line: 1 for line, count in text.items() if count == times}
+        found = analyze(part, keys, tokens_of, weighted=False, **options)
+        for key, count in found.key_counts.items():
+            occurrences[key] = occurrences.get(key, 0) + times * count
+            lines[key] = lines.get(key, 0) + count
+    return occurrences, lines
+
+
+@pytest.mark.parametrize('mode', ['key', 'line'])
+@pytest.mark.parametrize('engine', ['scan', 'aho'])
+def test_weighted_counts_are_line_occurrences(
+        rnd, make_lines, tokens_of, engine, mode):
+    """Each matched line counts its occurrences, as if matched each time."""
+    text = {line: rnd.randint(1, 4) for line in make_lines(150)}
+    keys = dict.fromkeys(make_lines(40, (1, 3)), 0)
+    occurrences, lines = occurrence_counts(
+        text, keys, tokens_of, engine=engine, mode=mode)
+    weighted = analyze(text, keys, tokens_of, engine=engine, mode=mode)
+    assert dict(weighted.key_counts) == occurrences
+    unique = analyze(text, keys, tokens_of, engine=engine, mode=mode,
+                     weighted=False)
+    assert dict(unique.key_counts) == lines
+    assert occurrences != lines
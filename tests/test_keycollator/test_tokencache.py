@@ -0,0 +1,72 @@
+"""Tests of the tokenizing of the keys and text lines (tokencache)."""
+import pytest
+
+import tokencache
+from tokencache import TokenCache, tokenize, tokenize_items
+
+
+@pytest.fixture(name='tokenized')
+def fixture_tokenized(monkeypatch):
+    """Texts tokenized by the tests, in order (split on spaces)."""
+    tokenized = []
+
+    def split(text):
+        tokenized.append(text)
+        return text.split()
+    monkeypatch.setattr(tokencache, 'word_tokenize', split)
+    return tokenized
+
+
+@pytest.mark.usefixtures('tokenized')
+def test_tokens_longer_than_min_token_len():
+    """Only the tokens longer than MIN_TOKEN_LEN characters are kept."""
+    assert tokenize('the net tax ledger due account') == ('ledger', 'account')
+    assert not tokenize('a an the')
+    assert not tokenize('')
+
+
+def test_text_is_tokenized_once_while_cached(tokenized, make_lines):
+    """A cached text is not tokenized again."""
+    cache = TokenCache()
+    lines = make_lines(200)
+    first = [cache.tokens(line) for line in lines]
+    again = [cache.tokens(line) for line in lines]
+    assert again == first
+    assert all(a is b for a, b in zip(first, again))
+    assert len(tokenized) == len(set(lines)) == len(cache)
+    assert first == [tokenize(line) for line in lines]
+
+
+def test_full_cache_is_emptied(tokenized):
+    """A full cache is emptied before a new text is memoized."""
+    cache = TokenCache(max_items=3)
+    for text in ('account one', 'ledger two', 'invoice three'):
+        cache.tokens(text)
+    assert len(cache) == 3
+    cache.tokens('ledger two')
+    assert len(cache) == 3 and len(tokenized) == 3
+    assert cache.tokens('payment due') == ('payment',)
+    assert len(cache) == 1
+    assert 'payment due' in cache and 'account one' not in cache
+    cache.tokens('account one')
+    assert len(tokenized) == 5
+
+
+@pytest.mark.usefixtures('tokenized')
+def test_cache_never_exceeds_max_items(make_lines):
+    """The cache holds at most max_items texts."""
+    cache = TokenCache(max_items=16)
+    for line in make_lines(500):
+        cache.tokens(line)
+        assert len(cache) <= 16
+    cache.clear()
+    assert not cache
+
+
+def test_tokenize_items_aligned_with_the_items(tokenized, make_lines):
+    """tokenize_items gives the tokens of each item, in item order."""
+    items = list(dict.fromkeys(make_lines(300) + ['', 'a an']))
+    lines = tokenize_items(items)
+    assert len(tokenized) == len(items)
+    assert list(lines) == [tokenize(item) for item in items]
+    assert len(lines.vocabulary) == len(set(lines.vocabulary))
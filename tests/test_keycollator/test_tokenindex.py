@@ -0,0 +1,60 @@
+"""Tests of the inverted token index of the text (tokenindex)."""
+import pytest
+
+from tokenindex import TokenIndex
+
+TOKENS = ('account', 'ledger', 'invoice', "vendor's", 'tax"due', "it's")
+
+
+def legacy_lines(ktoks, lines) -> list:
+    """Lines of the previous tokenized tier, str(list) in str(list)."""
+    kstr = str(list(ktoks))
+    return [lid for lid, itoks in enumerate(lines) if kstr in str(list(itoks))]
+
+
+def sequence_lines(ktoks, lines) -> list:
+    """Lines holding ktoks contiguously and in order (brute force)."""
+    size = len(ktoks)
+    return [lid for lid, itoks in enumerate(lines) if any(
+        itoks[i:i + size] == ktoks for i in range(len(itoks) - size + 1))]
+
+
+@pytest.fixture(name='lines')
+def fixture_lines(rnd):
+    """Random token tuples, a few empty, with repeated tokens."""
+    return [tuple(rnd.choice(TOKENS) for _ in range(rnd.randint(0, 5)))
+            for _ in range(500)]
+
+
+def test_lines_equal_matches_the_legacy_rule(rnd, lines):
+    """lines_equal gives the lines of str(key tokens) in str(line tokens)."""
+    index = TokenIndex(lines)
+    keys = set(lines[::7])
+    keys.update(tuple(rnd.choice(TOKENS) for _ in range(rnd.randint(1, 3)))
+                for _ in range(200))
+    keys.update({(), ('missing',), ('account', 'missing')})
+    for ktoks in keys:
+        assert index.lines_equal(ktoks) == legacy_lines(ktoks, lines)
+
+
+def test_lines_with_sequence(rnd, lines):
+    """lines_with_sequence gives the lines holding the tokens in order."""
+    index = TokenIndex(lines)
+    for _ in range(300):
+        ktoks = tuple(rnd.choice(TOKENS) for _ in range(rnd.randint(1, 3)))
+        assert index.lines_with_sequence(ktoks) == sequence_lines(
+            ktoks, lines)
+    assert index.lines_with_sequence(()) == list(range(len(lines)))
+    assert not index.lines_with_sequence(('missing', 'ledger'))
+
+
+def test_postings_and_reuse(lines):
+    """Each token posts the sorted lines holding it, once per line."""
+    index = TokenIndex(lines)
+    assert index.vocabulary == len({t for itoks in lines for t in itoks})
+    for token in TOKENS:
+        assert list(index.posting(token)) == [
+            lid for lid, itoks in enumerate(lines) if token in itoks]
+    assert not index.posting('missing') and 'missing' not in index
+    assert index.matches(lines) and index.matches(list(lines))
+    assert not index.matches(lines[1:])